@@ -5,12 +5,15 @@
 
 echo "🔄 Updating PROJECT_REPORT.md with screenshot references..."
 
-# Backup the original file
-cp PROJECT_REPORT.md PROJECT_REPORT_BACKUP.md
-echo "✅ Backup created: PROJECT_REPORT_BACKUP.md"
+# Snapshot the original file (python3 snapshot_store.py list / restore N)
+python3 snapshot_store.py save PROJECT_REPORT.md -m "before add_screenshots.sh" || exit 1
 
-# Replace placeholders with actual screenshot references
-sed -i.bak '
+# Replace placeholders with actual screenshot references, via a temp file
+# next to the report so it is swapped in whole (and no .bak is left behind)
+tmp=$(mktemp PROJECT_REPORT.md.XXXXXX) || exit 1
+trap 'rm -f "$tmp"' EXIT
+
+sed '
 # Screenshot 1
 /### Screenshot 1: Add New Courier Order/,/\*\*\[SPACE FOR SCREENSHOT\]\*\*/ {
     s|\*\*\[SPACE FOR SCREENSHOT\]\*\*|![Add New Courier Form](screenshots/crud_operations/01_create_form.png)|
@@ -120,10 +123,11 @@ sed -i.bak '
 /### Screenshot 22: Responsive Mobile View/,/\*\*\[SPACE FOR SCREENSHOT\]\*\*/ {
     s|\*\*\[SPACE FOR SCREENSHOT\]\*\*|![Mobile View](screenshots/frontend_features/22_mobile_view.png)|
 }
-' PROJECT_REPORT.md
+' PROJECT_REPORT.md > "$tmp" || exit 1
 
-# Remove backup file
-rm PROJECT_REPORT.md.bak
+# mktemp creates the file 0600; keep the report's own mode (GNU, then BSD stat)
+chmod "$(stat -c %a PROJECT_REPORT.md 2>/dev/null || stat -f %Lp PROJECT_REPORT.md)" "$tmp"
+mv "$tmp" PROJECT_REPORT.md
 
 echo "✅ Screenshots added to PROJECT_REPORT.md!"
 echo ""
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Node courier API, for load tests without MySQL
+
+Serves the routes exercised by load_test.py with the same request and
+response shapes as server/routes/couriers.js and reports.js, backed by
+courier_db (an in-memory SQLite copy of the sample data by default):
+
+    python api_standin.py --port 5055                 # sqlite:// fixture
+    python api_standin.py --db sqlite:///load.db
+    python api_standin.py --db mysql://root@localhost/courier_management
+
+On MySQL the stored procedures are CALLed like the Node routes; on SQLite
+they are emulated (the triggers are part of the SQLite schema). Database
+work runs on a thread pool the size of the Node connection pool; SQLite
+has a single writer, so it gets one thread.
+"""
+
+import argparse
+import datetime
+import decimal
+import json
+import sys
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from courier_db import POOL_SIZE, Database, DatabaseError
+from lazy_imports import lazy_module
+from report_data import QUERIES
+
+asyncio = lazy_module('asyncio')
+
+COURIER_SELECT = """
+    SELECT c.*, u.name AS customer_name, u.email AS customer_email,
+           a.name AS admin_name, a.email AS admin_email
+    FROM Couriers c
+    LEFT JOIN Users u ON c.customer_id = u.user_id
+    LEFT JOIN Admins a ON c.managed_by_admin_id = a.admin_id
+    WHERE c.courier_id = ?"""
+
+ALL_COURIERS = """
+    SELECT c.courier_id, c.customer_id, c.managed_by_admin_id, c.bill_number,
+           c.pickup_address, c.delivery_address, c.status, c.created_at,
+           u.name AS customer_name, u.email AS customer_email,
+           a.name AS admin_name, a.email AS admin_email
+    FROM Couriers c
+    LEFT JOIN Users u ON c.customer_id = u.user_id
+    LEFT JOIN Admins a ON c.managed_by_admin_id = a.admin_id
+    ORDER BY c.created_at DESC"""
+
+TRACK = """
+    SELECT c.*, u.name as customer_name, u.email, u.phone, u.address
+    FROM Couriers c
+    JOIN Users u ON c.customer_id = u.user_id
+    WHERE c.bill_number = ? AND u.name LIKE ?"""
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, body):
+        super().__init__(body.get('message', ''))
+        self.status = status
+        self.body = body
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return str(value)
+
+
+def _dicts(cursor):
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _drain(cursor):
+    # CALL returns an extra status result set on MySQL
+    while cursor.nextset():
+        pass
+
+
+class CourierApi:
+    """The route handlers; each runs synchronously on a database worker thread"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def _rows(self, query, params=()):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.db.sql(query), params)
+            rows = _dicts(cursor)
+            cursor.close()
+            return rows
+
+    def add(self, body):
+        fields = ['customer_id', 'admin_id', 'bill_number', 'pickup_address', 'delivery_address']
+        if not all(body.get(field) for field in fields):
+            raise HttpError(400, {'success': False, 'message': 'All fields are required'})
+        params = [body[field] for field in fields]
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                if self.db.kind == 'mysql':
+                    cursor.execute('CALL AddCourierOrder(%s, %s, %s, %s, %s)', params)
+                    rows = _dicts(cursor)
+                    _drain(cursor)
+                else:
+                    cursor.execute("INSERT INTO Couriers (customer_id, managed_by_admin_id, bill_number, "
+                                   "pickup_address, delivery_address, status) VALUES (?, ?, ?, ?, ?, 'Pending')",
+                                   params)
+                    cursor.execute(COURIER_SELECT, (cursor.lastrowid,))
+                    rows = _dicts(cursor)
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            raise HttpError(500, {'success': False, 'message': 'Failed to add courier order', 'error': str(e)})
+        return 201, {'success': True, 'message': 'Courier order added successfully using stored procedure',
+                     'data': rows[0] if rows else None}
+
+    def update_status(self, courier_id, body):
+        new_status, email = body.get('new_status'), body.get('changed_by_admin_email')
+        if not new_status or not email:
+            raise HttpError(400, {'success': False, 'message': 'Status and admin email are required'})
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                if self.db.kind == 'mysql':
+                    cursor.execute('CALL UpdateCourierStatus(%s, %s, %s)', (courier_id, new_status, email))
+                    _drain(cursor)
+                else:
+                    cursor.execute('SELECT status FROM Couriers WHERE courier_id = ?', (courier_id,))
+                    row = cursor.fetchone()
+                    if row is None:
+                        raise ValueError('Courier not found')
+                    cursor.execute('UPDATE Couriers SET status = ? WHERE courier_id = ?', (new_status, courier_id))
+                    cursor.execute('INSERT INTO Delivery_History (courier_id, old_status, new_status, '
+                                   'changed_by_admin_email) VALUES (?, ?, ?, ?)',
+                                   (courier_id, row[0], new_status, email))
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            raise HttpError(500, {'success': False, 'message': 'Failed to update courier status', 'error': str(e)})
+        return 200, {'success': True,
+                     'message': 'Courier status updated successfully using stored procedure '
+                                '(Trigger fired automatically)',
+                     'courier_id': courier_id, 'new_status': new_status}
+
+    def track(self, query):
+        bill_number, name = query.get('billNumber'), query.get('name')
+        if not bill_number or not name:
+            raise HttpError(400, {'success': False, 'message': 'Bill number and name are required'})
+        rows = self._rows(TRACK, (bill_number, f'%{name}%'))
+        if not rows:
+            raise HttpError(404, {'success': False, 'message': 'No courier found with this bill number and name'})
+        return 200, {'success': True, 'courier': rows[0]}
+
+    def join(self):
+        rows = self._rows(QUERIES['join'])
+        return 200, {'success': True, 'message': 'JOIN Query executed successfully',
+                     'query_type': 'JOIN (Couriers + Users + Admins)', 'count': len(rows), 'data': rows}
+
+    def couriers(self):
+        rows = self._rows(ALL_COURIERS)
+        return 200, {'success': True, 'count': len(rows), 'data': rows}
+
+    def users(self):
+        return 200, {'success': True, 'data': self._rows('SELECT user_id, name, email FROM Users ORDER BY name')}
+
+    def admins(self):
+        return 200, {'success': True, 'data': self._rows('SELECT admin_id, name, email FROM Admins ORDER BY name')}
+
+    def dispatch(self, method, path, query, body):
+        """Route a request to its handler; returns (status, JSON body)"""
+        parts = path.rstrip('/').split('/')
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'OK', 'message': 'Courier Management System API stand-in is running'}
+        if method == 'POST' and path == '/api/couriers/add':
+            return self.add(body)
+        if method == 'PUT' and len(parts) == 5 and path.startswith('/api/couriers/update-status/'):
+            return self.update_status(unquote(parts[4]), body)
+        if method == 'GET':
+            handler = {
+                '/api/couriers/track': lambda: self.track(query),
+                '/api/reports/join': self.join,
+                '/api/couriers': self.couriers,
+                '/api/couriers/data/users': self.users,
+                '/api/couriers/data/admins': self.admins,
+            }.get(path.rstrip('/'))
+            if handler:
+                return handler()
+        raise HttpError(404, {'success': False, 'message': 'Route not found', 'path': path})
+
+
+def _bad_request(message):
+    return HttpError(400, {'success': False, 'message': message})
+
+
+async def _read_request(reader):
+    """
+    Parse one HTTP/1.1 request; returns None when the client closed the
+    connection before sending one, raises HttpError(400) for a malformed one
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise _bad_request('Request header too large')
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise _bad_request('Malformed request line')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise _bad_request('Invalid Content-Length')
+    raw = await reader.readexactly(length) if length else b''
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+    return method, target, raw, keep_alive
+
+
+def _response(status, body, keep_alive):
+    payload = json.dumps(body, default=_json_default).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + payload
+
+
+async def start_server(db, host='127.0.0.1', port=0, workers=None):
+    """Start the stand-in on host:port (0 = any free port); returns (server, executor)"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    api = CourierApi(db)
+    workers = workers or (POOL_SIZE if db.kind == 'mysql' else 1)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='standin-db')
+    loop = asyncio.get_running_loop()
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HttpError as e:
+                    # The rest of the stream cannot be framed; answer and hang up
+                    writer.write(_response(e.status, e.body, False))
+                    await writer.drain()
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, target, raw, keep_alive = request
+                url = urlsplit(target)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError as e:
+                    status, payload = 400, {'success': False, 'message': f'Invalid JSON body: {e}'}
+                else:
+                    try:
+                        status, payload = await loop.run_in_executor(
+                            executor, api.dispatch, method, url.path, query, body)
+                    except HttpError as e:
+                        status, payload = e.status, e.body
+                    except Exception as e:
+                        status, payload = 500, {'success': False, 'message': 'Internal server error',
+                                                'error': str(e)}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    return server, executor
+
+
+async def serve(db, host, port):
+    server, executor = await start_server(db, host, port)
+    bound = server.sockets[0].getsockname()
+    print(f"🚀 Stand-in API ({db.kind}) on http://{bound[0]}:{bound[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for the courier REST API')
+    parser.add_argument('--db', default='sqlite://', help='Database DSN (default: %(default)s, see courier_db.py)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args(argv)
+
+    try:
+        db = Database(args.db)
+    except DatabaseError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    try:
+        asyncio.run(serve(db, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark the report rewrite stages and the placeholder PNG renderer
+
+Synthesizes reports with 10, 100, 1,000 and 10,000 screenshot placeholder
+sections (copies of the ones in bench/template.md), runs them through
+the screenshots -> text -> data1 -> data2 -> fixes chain and renders the
+placeholder images. Each stage is also timed as the plain per-rule
+re.sub() loop the scripts used before the engine, on the same input, and
+checked to produce the same output. Each size runs in a fresh process so its peak RSS is
+its own. Results are written as JSON; pass a previous run as --baseline to
+fail when throughput drops by more than --threshold.
+
+    python3 bench/run.py
+    python3 bench/run.py --sizes 10,100 --output bench/latest.json --baseline bench/baseline.json
+    python3 bench/run.py --template 3            # sections from PROJECT_REPORT.md snapshot 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+REPORT = os.path.join(HERE, 'PROJECT_REPORT.md')
+# The report's screenshot sections before any stage ran
+TEMPLATE = os.path.join(HERE, 'bench', 'template.md')
+PLACEHOLDER = '[SPACE FOR SCREENSHOT]'
+SIZES = [10, 100, 1000, 10000]
+CHAIN = ['screenshots', 'text', 'data1', 'data2', 'fixes']
+RENDER_LIMIT = 50
+THRESHOLD = 0.25
+
+# One '### Screenshot N' section, through to the next heading (or the end)
+SECTION = re.compile(r'^### Screenshot \d+:.*?(?=^#|\Z)', re.MULTILINE | re.DOTALL)
+
+
+def placeholder_sections(ref=None):
+    """The placeholder sections of bench/template.md, or of snapshot ref of the report"""
+    if ref is None:
+        with open(TEMPLATE, 'r') as f:
+            text = f.read()
+        where = os.path.relpath(TEMPLATE, HERE)
+    else:
+        from snapshot_store import store_for
+
+        store = store_for(REPORT)
+        entry = store.get(ref, os.path.basename(REPORT))
+        text = store.read(entry)
+        where = f"snapshot #{entry['id']}"
+    sections = [s for s in SECTION.findall(text) if PLACEHOLDER in s]
+    if not sections:
+        raise ValueError(f"No screenshot placeholders in {where}")
+    return sections
+
+
+def synthesize(size, sections):
+    """A report with `size` placeholder sections, cycling through the template's"""
+    parts = ['# Benchmark Report\n\n']
+    for i in range(size):
+        if i % len(sections) == 0:
+            parts.append('## Part %d\n\n' % (i // len(sections) + 1))
+        parts.append(sections[i % len(sections)])
+    return ''.join(parts)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def best_of(repeat, func, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def sub_loop(rules, content):
+    """The replacement loop the engine replaced: one re.sub() pass per rule"""
+    for rule in rules:
+        content = rule.regex.sub(rule.replacement, content)
+    return content
+
+
+def bench_size(size, repeat, render_limit, sections):
+    """Run one report size; called in a fresh worker process"""
+    from generate_placeholder_screenshots import SCREENSHOTS, create_placeholder, load_fonts
+    from report_pipeline import select_stages
+
+    content = synthesize(size, sections)
+    result = {'sections': size, 'bytes': len(content.encode('utf-8')), 'stages': {}}
+
+    for stage in select_stages(CHAIN):
+        stage.engine  # compile outside the timed region
+        size_mb = len(content.encode('utf-8')) / (1024 * 1024)
+        seconds, (output, counts) = best_of(repeat, stage.engine.rewrite, content)
+        loop_seconds, loop_output = best_of(repeat, sub_loop, stage.engine.rules, content)
+        result['stages'][stage.name] = {
+            'seconds': seconds,
+            'loop_seconds': loop_seconds,
+            'same_as_loop': loop_output == output,
+            'sections_per_s': size / seconds,
+            'mb_per_s': size_mb / seconds,
+            'matches': sum(counts.values()),
+        }
+        content = output
+
+    images = [SCREENSHOTS[i % len(SCREENSHOTS)] for i in range(min(size, render_limit))]
+    load_fonts()
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for i, (_, title, description, bg_color, text_color) in enumerate(images):
+            create_placeholder(os.path.join(tmp, '%05d.png' % i), title, description, bg_color, text_color)
+        seconds = time.perf_counter() - start
+    result['render'] = {'images': len(images), 'seconds': seconds, 'images_per_s': len(images) / seconds}
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def throughputs(results):
+    """Flatten a run to {'<size>/<stage>': throughput}"""
+    flat = {}
+    for run in results['runs']:
+        for name, stage in run['stages'].items():
+            flat['%d/%s' % (run['sections'], name)] = stage['sections_per_s']
+        flat['%d/render' % run['sections']] = run['render']['images_per_s']
+    return flat
+
+
+def regressions(results, baseline, threshold):
+    """[(key, baseline, current)] for every throughput that dropped by more than threshold"""
+    current, before = throughputs(results), throughputs(baseline)
+    return [(key, before[key], current[key]) for key in sorted(current, key=_sort_key)
+            if key in before and current[key] < before[key] * (1 - threshold)]
+
+
+def _sort_key(key):
+    size, name = key.split('/')
+    return int(size), name
+
+
+def print_run(run):
+    print(f"📄 {run['sections']:>6} sections  {run['bytes'] / 1024:>9.0f} KB  "
+          f"peak RSS {run['peak_rss_mb']:.0f} MB")
+    for name, stage in run['stages'].items():
+        print(f"   {name:<12} {stage['seconds'] * 1000:>9.1f} ms  {stage['sections_per_s']:>11.0f} sections/s  "
+              f"{stage['mb_per_s']:>7.1f} MB/s  {stage['matches']:>6} matches  "
+              f"{stage['loop_seconds'] / stage['seconds']:>5.1f}x vs re.sub loop"
+              f"{'' if stage['same_as_loop'] else '  ❌ output differs'}")
+    render = run['render']
+    print(f"   {'render':<12} {render['seconds'] * 1000:>9.1f} ms  {render['images_per_s']:>11.1f} images/s  "
+          f"({render['images']} images)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the report rewrite stages and PNG renderer')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help='Comma-separated placeholder section counts (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='Keep the best of N runs per stage (default: 3)')
+    parser.add_argument('--render-limit', type=int, default=RENDER_LIMIT,
+                        help='Images rendered per size at most (default: %(default)s)')
+    parser.add_argument('-o', '--output', default=os.path.join(HERE, 'bench', 'latest.json'),
+                        help='Where to write the JSON results (default: bench/latest.json)')
+    parser.add_argument('--template', metavar='REF',
+                        help='Snapshot of PROJECT_REPORT.md to copy placeholder sections from '
+                             '(default: bench/template.md)')
+    parser.add_argument('--baseline', help='Previous results JSON to compare throughput against')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='Allowed throughput drop vs the baseline, as a fraction (default: %(default)s)')
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    try:
+        sections = placeholder_sections(args.template)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    results = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'runs': [],
+    }
+    for size in sizes:
+        # A fresh process per size keeps peak RSS per size
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            run = pool.submit(bench_size, size, args.repeat, args.render_limit, sections).result()
+        results['runs'].append(run)
+        print_run(run)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"\n❌ {len(slower)} throughput regression(s) beyond {args.threshold:.0%}:")
+            for key, before, now in slower:
+                print(f"   {key:<20} {before:>11.1f} -> {now:>11.1f}/s ({now / before - 1:+.0%})")
+            return 1
+        print(f"✅ No throughput regressions beyond {args.threshold:.0%} vs {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
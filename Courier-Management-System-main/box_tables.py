@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Render rows as the ╔═╦╗ box tables used throughout PROJECT_REPORT.md
+
+Column widths are computed in one pass over columnar data (NumPy string
+lengths for NumPy columns) and measured in terminal display cells, so East
+Asian wide characters and emoji stay aligned. Rows are formatted with one
+precompiled format string per table.
+"""
+
+import itertools
+import sys
+import unicodedata
+
+SAMPLE_ROWS = 1000
+
+
+class TableWidthError(ValueError):
+    """A streamed cell is wider than its column, which was already printed"""
+
+
+def _cell(value):
+    return '' if value is None else str(value)
+
+
+def _cells(values):
+    """Stringify a row or column, mapping None to ''"""
+    if None in values:
+        return ['' if value is None else str(value) for value in values]
+    return list(map(str, values))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def char_width(char):
+    """Display cells taken by one character: 0 (combining), 1 or 2 (wide/emoji)"""
+    if unicodedata.combining(char) or char in '\u200b\u200c\u200d\ufe0e\ufe0f':
+        return 0
+    if unicodedata.east_asian_width(char) in ('W', 'F'):
+        return 2
+    # Most emoji are 'W'; a few pictographs in the supplementary planes are 'N'
+    return 2 if ord(char) >= 0x1F000 else 1
+
+
+def display_width(text):
+    if text.isascii():
+        return len(text)
+    return sum(char_width(char) for char in text)
+
+
+def column_width(column):
+    """Widest display width in a list of strings"""
+    if not column:
+        return 0
+    if _all_ascii(column):
+        return max(map(len, column))
+    return max(map(display_width, column))
+
+
+def _numpy_for(column):
+    """The numpy module if column is a NumPy array, else None (only callers that use NumPy import it)"""
+    np = sys.modules.get('numpy')
+    return np if np is not None and isinstance(column, np.ndarray) else None
+
+
+def _array_width(array):
+    """Widest display width in a NumPy unicode array, vectorized when it is all ASCII"""
+    np = sys.modules['numpy']
+    if array.size == 0:
+        return 0
+    # '<U' arrays hold UCS-4 code points, so the max code point tells ASCII apart
+    if np.ascontiguousarray(array).view(np.uint32).max() < 128:
+        return int(np.char.str_len(array).max())
+    return max(map(display_width, array.tolist()))
+
+
+def text_column(column):
+    """Stringify one column and return (list of strings, widest display width)"""
+    np = _numpy_for(column)
+    if np is not None and column.dtype.kind != 'O':
+        array = column if column.dtype.kind == 'U' else column.astype(np.str_)
+        return array.tolist(), _array_width(array)
+    texts = _cells(list(column))
+    return texts, column_width(texts)
+
+
+def column_widths(headers, columns):
+    """Width of each column of strings: its widest cell or its header"""
+    return [max(display_width(header), column_width(column))
+            for header, column in zip(headers, columns)]
+
+
+def _border(widths, left, mid, right):
+    return left + mid.join('═' * (w + 2) for w in widths) + right
+
+
+def _pad(text, width, how):
+    gap = width - display_width(text)
+    if how == 'right':
+        return ' ' * gap + text
+    if how == 'center':
+        return ' ' * (gap // 2) + text + ' ' * (gap - gap // 2)
+    return text + ' ' * gap
+
+
+def _spec(width, how):
+    return '%' + ('' if how == 'right' else '-') + str(width) + 's'
+
+
+def _all_ascii(texts):
+    return all(map(str.isascii, texts))
+
+
+def _header(headers, widths):
+    return '║ ' + ' ║ '.join(_pad(h, w, 'center') for h, w in zip(headers, widths)) + ' ║'
+
+
+def _default_align(first_row, count):
+    first = first_row if first_row is not None else [None] * count
+    return ['right' if _is_number(value) else 'left' for value in first]
+
+
+def render_columns(headers, columns, align=None):
+    """
+    Render columnar data as a box table.
+
+    Each column is a list or a NumPy array (measured vectorized). Widths are
+    exact; numeric columns are right-aligned unless align says otherwise.
+    Returns the table without a trailing newline.
+    """
+    if align is None:
+        align = _default_align([column[0] if len(column) else None for column in columns], len(headers))
+        align = [how if not _is_numeric_array(column) else 'right' for how, column in zip(align, columns)]
+
+    texts, widths, specs = [], [], []
+    for header, column, how in zip(headers, columns, align):
+        cells, width = text_column(column)
+        width = max(display_width(header), width)
+        if _all_ascii(cells):
+            specs.append(_spec(width, how))
+        else:
+            # Pad by display width up front; the format string then copies cells as-is
+            cells = [_pad(text, width, how) for text in cells]
+            specs.append('%s')
+        texts.append(cells)
+        widths.append(width)
+    fmt = '║ ' + ' ║ '.join(specs) + ' ║'
+
+    lines = [_border(widths, '╔', '╦', '╗'), _header(headers, widths), _border(widths, '╠', '╬', '╣')]
+    lines.extend(fmt % row for row in zip(*texts))
+    lines.append(_border(widths, '╚', '╩', '╝'))
+    return '\n'.join(lines)
+
+
+def _is_numeric_array(column):
+    return _numpy_for(column) is not None and column.dtype.kind in 'iuf'
+
+
+def render_table(headers, rows, align=None):
+    """Render a whole box table from row sequences (no trailing newline)"""
+    rows = list(rows)
+    if align is None:
+        align = _default_align(rows[0] if rows else None, len(headers))
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in headers]
+    return render_columns(headers, columns, align)
+
+
+def iter_table(headers, rows, widths=None, align=None, sample=SAMPLE_ROWS):
+    """
+    Yield the lines of a box table one at a time.
+
+    Column widths come from widths if given, else from the headers and the
+    first `sample` rows (all of them when sample is None). Memory is bounded
+    by the sampled prefix. A later cell wider than its column raises
+    TableWidthError: the lines above it are already out, and cutting the
+    cell would silently change the data (ids past the sample's 999 ...).
+    """
+    rows = iter(rows)
+    prefix = list(rows if sample is None else itertools.islice(rows, sample))
+    if align is None:
+        align = _default_align(prefix[0] if prefix else None, len(headers))
+    prefix = [_cells(row) for row in prefix]
+    if widths is None:
+        columns = [list(column) for column in zip(*prefix)] if prefix else [[] for _ in headers]
+        widths = column_widths(headers, columns)
+    fmt = '║ ' + ' ║ '.join(_spec(w, how) for w, how in zip(widths, align)) + ' ║'
+
+    # Every cell is padded to at least its width, so an ASCII row fits exactly
+    # when the formatted line has this length
+    line_length = len(fmt % tuple('' for _ in widths))
+
+    def line(number, cells):
+        out = fmt % tuple(cells)
+        if len(out) == line_length and ''.join(cells).isascii():
+            return out
+        for header, text, w in zip(headers, cells, widths):
+            if display_width(text) > w:
+                raise TableWidthError(f"row {number}: {header} value {text!r} is wider than its column "
+                                      f"({display_width(text)} > {w} cells)")
+        parts = [_pad(text, w, how) for text, w, how in zip(cells, widths, align)]
+        return '║ ' + ' ║ '.join(parts) + ' ║'
+
+    for header, w in zip(headers, widths):
+        if display_width(header) > w:
+            raise TableWidthError(f"header {header!r} is wider than its column ({w} cells)")
+    yield _border(widths, '╔', '╦', '╗')
+    yield _header(headers, widths)
+    yield _border(widths, '╠', '╬', '╣')
+    for number, cells in enumerate(prefix, 1):
+        yield line(number, cells)
+    for number, row in enumerate(rows, len(prefix) + 1):
+        yield line(number, _cells(row))
+    yield _border(widths, '╚', '╩', '╝')
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Bulk-load courier orders from a CSV or JSONL file
+
+Instead of one CALL AddCourierOrder per order, rows are validated in memory
+and inserted with multi-row INSERTs, one transaction per batch:
+
+    python bulk_ingest.py orders.csv --db mysql://root@localhost/courier_management
+    python bulk_ingest.py orders.jsonl --db sqlite:///load.db --batch-size 5000 --bloom
+
+Each record needs customer_id, admin_id (or managed_by_admin_id),
+bill_number, pickup_address and delivery_address; status is optional and
+defaults to 'Pending' like the procedure. customer_id/admin_id are checked
+against the Users/Admins ids loaded up front, and bill_number against the
+Couriers UNIQUE index (a hash set, or a Bloom filter with --bloom whose
+hits are confirmed with one IN query per batch). Rejected records go to
+--rejects with the reason. After every committed batch a checkpoint is
+written, so an interrupted load resumes after the last committed record.
+The checkpoint only applies to the same input (path, size and mtime). A
+run killed between a commit and its checkpoint re-reads that batch; its
+rows found in Couriers past the checkpoint's last courier_id, exactly as
+the input has them, are counted as inserted by the earlier run rather
+than rejected as duplicates.
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+from courier_db import STATUSES, Database, DatabaseError
+
+BATCH_SIZE = 1000
+COLUMNS = ['customer_id', 'managed_by_admin_id', 'bill_number', 'pickup_address', 'delivery_address', 'status']
+# Bound parameters per statement: SQLITE_MAX_VARIABLE_NUMBER before SQLite 3.32
+# (MySQL allows 65535), so one INSERT carries at most 166 rows
+MAX_VARIABLES = 999
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings (no false negatives)"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        a, b = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(a + i * b) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BillIndex:
+    """Known bill numbers: exact set, or Bloom filter confirmed against the database"""
+
+    def __init__(self, db, bloom=False, expected=0):
+        self.db = db
+        rows = db.iter_rows('SELECT bill_number FROM Couriers')
+        next(rows)
+        if bloom:
+            count = db.query('SELECT COUNT(*) FROM Couriers')[1][0][0]
+            self.known = BloomFilter(count + expected)
+        else:
+            self.known = set()
+        for (bill_number,) in rows:
+            self.known.add(bill_number)
+        self.bloom = bloom
+
+    def taken(self, bill_numbers):
+        """The subset of bill_numbers already used (in the database or earlier in this load)"""
+        maybe = [b for b in bill_numbers if b in self.known]
+        if not self.bloom or not maybe:
+            return set(maybe)
+        taken = set()
+        for start in range(0, len(maybe), MAX_VARIABLES):
+            chunk = maybe[start:start + MAX_VARIABLES]
+            query = 'SELECT bill_number FROM Couriers WHERE bill_number IN (%s)' % ', '.join('?' * len(chunk))
+            taken.update(row[0] for row in self.db.query(query, chunk)[1])
+        return taken
+
+    def add(self, bill_number):
+        self.known.add(bill_number)
+
+
+def read_records(path):
+    """Yield dicts from a CSV (header row) or JSONL file, streamed"""
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, 'r', newline='') as f:
+            yield from csv.DictReader(f)
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def validate(record, user_ids, admin_ids):
+    """Return (row tuple, None) or (None, reason) for one input record"""
+    values = {key: _text(record.get(key)) for key in
+              ['customer_id', 'bill_number', 'pickup_address', 'delivery_address', 'status']}
+    values['admin_id'] = _text(record.get('admin_id') or record.get('managed_by_admin_id'))
+    missing = [key for key in ['customer_id', 'admin_id', 'bill_number', 'pickup_address', 'delivery_address']
+               if not values[key]]
+    if missing:
+        return None, 'missing ' + ', '.join(missing)
+    try:
+        customer_id, admin_id = int(values['customer_id']), int(values['admin_id'])
+    except ValueError:
+        return None, 'customer_id and admin_id must be integers'
+    if customer_id not in user_ids:
+        return None, f'unknown customer_id {customer_id}'
+    if admin_id not in admin_ids:
+        return None, f'unknown admin_id {admin_id}'
+    status = values['status'] or 'Pending'
+    if status not in STATUSES:
+        return None, f'invalid status {status!r}'
+    if len(values['bill_number']) > 50:
+        return None, 'bill_number longer than 50 characters'
+    return (customer_id, admin_id, values['bill_number'], values['pickup_address'],
+            values['delivery_address'], status), None
+
+
+def input_identity(path):
+    """What a checkpoint is keyed on: the input's path, size and mtime"""
+    st = os.stat(path)
+    return {'input': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def load_checkpoint(path, input_path):
+    try:
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    identity = input_identity(input_path)
+    return checkpoint if all(checkpoint.get(key) == value for key, value in identity.items()) else None
+
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def last_courier_id(db):
+    return db.query('SELECT MAX(courier_id) FROM Couriers')[1][0][0] or 0
+
+
+def insert_batch(db, rows):
+    """
+    Insert rows with multi-row INSERTs (MAX_VARIABLES parameters each) in
+    one transaction; returns the highest courier_id afterwards
+    """
+    per_statement = MAX_VARIABLES // len(COLUMNS)
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            values = ', '.join(['(%s)' % ', '.join('?' * len(COLUMNS))] * len(chunk))
+            query = 'INSERT INTO Couriers (%s) VALUES %s' % (', '.join(COLUMNS), values)
+            cursor.execute(db.sql(query), [value for row in chunk for value in row])
+        cursor.execute('SELECT MAX(courier_id) FROM Couriers')
+        last_id = cursor.fetchone()[0]
+        conn.commit()
+        cursor.close()
+    return last_id
+
+
+def rows_since(db, last_id, bill_numbers):
+    """{bill_number: row tuple} for Couriers rows with these bill numbers inserted after courier last_id"""
+    stored = {}
+    for start in range(0, len(bill_numbers), MAX_VARIABLES - 1):
+        chunk = bill_numbers[start:start + MAX_VARIABLES - 1]
+        query = 'SELECT %s FROM Couriers WHERE courier_id > ? AND bill_number IN (%s)' % (
+            ', '.join(COLUMNS), ', '.join('?' * len(chunk)))
+        stored.update((row[2], tuple(row)) for row in db.query(query, [last_id] + chunk)[1])
+    return stored
+
+
+def ingest(db, path, batch_size=BATCH_SIZE, bloom=False, checkpoint_path=None, rejects_path=None,
+           expected=0, verbose=True):
+    """Load path into Couriers; returns the checkpoint totals plus this run's 'new' rows and 'seconds'"""
+    user_ids = {row[0] for row in db.query('SELECT user_id FROM Users')[1]}
+    admin_ids = {row[0] for row in db.query('SELECT admin_id FROM Admins')[1]}
+    start = time.perf_counter()
+    bills = BillIndex(db, bloom, expected)
+    print(f"📇 Preloaded {len(user_ids)} users, {len(admin_ids)} admins and the bill number index "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    checkpoint = None
+    if checkpoint_path:
+        checkpoint = load_checkpoint(checkpoint_path, path)
+    if checkpoint:
+        print(f"⏩ Resuming after record {checkpoint['records']} "
+              f"({checkpoint['inserted']} inserted, {checkpoint['rejected']} rejected so far)")
+        # The interrupted run may have committed its next batch without checkpointing it
+        unconfirmed_until = checkpoint['records'] + checkpoint.get('batch_size', batch_size)
+    else:
+        checkpoint = dict(input_identity(path), records=0, inserted=0, rejected=0, last_id=last_courier_id(db))
+        unconfirmed_until = 0
+    checkpoint['batch_size'] = batch_size
+
+    resumed_inserted = checkpoint['inserted']
+    recovered = 0
+    records = itertools.islice(read_records(path), checkpoint['records'], None)
+    rejects = open(rejects_path, 'a') if rejects_path else None
+    start = time.perf_counter()
+    try:
+        for number in itertools.count(1):
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+            batch_start = time.perf_counter()
+            first = checkpoint['records'] + 1
+            rows, reasons = [], []
+            for offset, record in enumerate(batch):
+                row, reason = validate(record, user_ids, admin_ids)
+                if row is None:
+                    reasons.append((first + offset, reason, record))
+                else:
+                    rows.append((first + offset, row))
+
+            taken = bills.taken([row[2] for _, row in rows])
+            stored = {}
+            if first <= unconfirmed_until and taken and 'last_id' in checkpoint:
+                stored = rows_since(db, checkpoint['last_id'], [row[2] for number, row in rows
+                                                                if number <= unconfirmed_until and row[2] in taken])
+            fresh, seen, committed = [], set(), 0
+            for record_number, row in rows:
+                if stored.get(row[2]) == row and row[2] not in seen:
+                    # Inserted after the checkpoint, by the interrupted run
+                    seen.add(row[2])
+                    committed += 1
+                elif row[2] in taken or row[2] in seen:
+                    reasons.append((record_number, f'duplicate bill_number {row[2]}', None))
+                else:
+                    seen.add(row[2])
+                    fresh.append(row)
+            recovered += committed
+            if committed and not fresh:
+                checkpoint['last_id'] = last_courier_id(db)
+
+            if fresh:
+                checkpoint['last_id'] = insert_batch(db, fresh)
+                for row in fresh:
+                    bills.add(row[2])
+            if rejects is not None:
+                for record_number, reason, record in sorted(reasons, key=lambda r: r[0]):
+                    rejects.write(json.dumps({'record': record_number, 'reason': reason,
+                                              'data': record}, default=str) + '\n')
+                rejects.flush()
+
+            checkpoint['records'] += len(batch)
+            checkpoint['inserted'] += len(fresh) + committed
+            checkpoint['rejected'] += len(reasons)
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - batch_start
+            if verbose:
+                print(f"  batch {number:>5}: {len(fresh):>6} inserted, {len(reasons):>5} rejected "
+                      f"in {elapsed * 1000:>7.1f} ms ({len(batch) / elapsed:>9.0f} rows/s)")
+    finally:
+        if rejects is not None:
+            rejects.close()
+
+    if recovered:
+        print(f"♻  {recovered} row(s) were committed by the interrupted run after its last checkpoint")
+    seconds = time.perf_counter() - start
+    return dict(checkpoint, new=checkpoint['inserted'] - resumed_inserted - recovered, seconds=seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk-load courier orders from CSV or JSONL')
+    parser.add_argument('input', help='Orders file (.csv with a header row, or .jsonl)')
+    parser.add_argument('--db', help='Database DSN (default: $COURIER_DB or the server MySQL settings)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Rows per INSERT/transaction (default: %(default)s)')
+    parser.add_argument('--bloom', action='store_true',
+                        help='Index existing bill numbers in a Bloom filter instead of a set (less memory)')
+    parser.add_argument('--expected-rows', type=int, default=0,
+                        help='Rows expected in the input, to size the Bloom filter')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <input>.checkpoint.json)')
+    parser.add_argument('--no-checkpoint', action='store_true', help='Do not write or resume from a checkpoint')
+    parser.add_argument('--rejects', help='Append rejected records with reasons to this JSONL file')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print per-batch stats')
+    args = parser.parse_args(argv)
+
+    checkpoint_path = None if args.no_checkpoint else (args.checkpoint or args.input + '.checkpoint.json')
+    try:
+        db = Database(args.db)
+    except DatabaseError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    try:
+        stats = ingest(db, args.input, args.batch_size, args.bloom, checkpoint_path, args.rejects,
+                       args.expected_rows, verbose=not args.quiet)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    rate = stats['new'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"\n✅ {stats['new']} rows inserted in {stats['seconds']:.2f}s ({rate:.0f} rows/s); "
+          f"totals: {stats['inserted']} inserted, {stats['rejected']} rejected of {stats['records']} records")
+    if checkpoint_path:
+        print(f"📌 Checkpoint: {checkpoint_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Bulk courier status updates (end-of-day scans) in batched transactions
+
+Instead of one PUT /update-status/:id -> CALL UpdateCourierStatus per
+courier, updates are grouped into transactions of --batch-size couriers and
+run --concurrency at a time over the courier_db connection pool:
+
+    python bulk_status_update.py scans.csv --db mysql://root@localhost/courier_management
+    python bulk_status_update.py --from-status "In Transit" --status Delivered \\
+        --admin admin1@courier.com --db sqlite:///courier.db
+    python bulk_status_update.py scans.jsonl --batch-size 1 --procedure   # one CALL per courier, for comparison
+
+Input records carry courier_id, new_status and changed_by_admin_email (the
+PUT body plus the id); --status/--admin fill in missing fields. Each batch
+does what the procedure does, set-wise: lock the couriers (SELECT ... FOR
+UPDATE, in courier_id order so concurrent batches cannot deadlock each
+other), one UPDATE per new status, and one multi-row Delivery_History
+INSERT. The UPDATE fires after_courier_status_update and
+after_courier_delivered per row, so Courier_Audit and Comments get the same
+rows as with the procedure. Batches that hit a deadlock or lock wait
+timeout are rolled back and retried with backoff; a courier_id that is
+still in flight holds back later batches that touch it, so the updates
+apply in input order.
+
+With --procedure a deadlock never reaches the client as such: the
+procedure's EXIT HANDLER rolls back and re-signals every SQL error as
+SQLSTATE 45000 'Error updating courier status', the same error a missing
+courier gets. A CALL that fails that way for a courier that exists is
+retried on its own (the earlier couriers of the batch are committed).
+
+Per batch the tool counts the Courier_Audit and Comments rows the triggers
+wrote (before/after COUNTs inside the transaction) and reports write
+amplification: rows written per courier update.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+
+from bulk_ingest import MAX_VARIABLES, _text, read_records
+from courier_db import POOL_SIZE, STATUSES, Database, DatabaseError
+from lazy_imports import lazy_module
+
+asyncio = lazy_module('asyncio')
+
+BATCH_SIZE = 1000
+RETRIES = 5
+# Backoff before retry n is RETRY_DELAY * 2**n seconds, plus jitter
+RETRY_DELAY = 0.05
+# MySQL ER_LOCK_WAIT_TIMEOUT and ER_LOCK_DEADLOCK
+RETRYABLE_ERRORS = {1205, 1213}
+# ER_SIGNAL_EXCEPTION: what UpdateCourierStatus re-signals any error as
+SIGNAL_ERROR = 1644
+
+TRIGGER_COUNTS = """
+    SELECT (SELECT COUNT(*) FROM Courier_Audit WHERE courier_id IN ({ids})),
+           (SELECT COUNT(*) FROM Comments WHERE courier_id IN ({ids}))"""
+FROM_STATUS_PAGE = """
+    SELECT courier_id FROM Couriers WHERE status = ? AND courier_id > ?
+    ORDER BY courier_id LIMIT ?"""
+
+
+class BatchError(Exception):
+    """A batch that failed for good (not retryable, or out of retries)"""
+
+    def __init__(self, error, attempts):
+        super().__init__(str(error))
+        self.attempts = attempts
+
+
+def validate(record, default_status=None, default_admin=None):
+    """Return ((courier_id, new_status, admin_email), None) or (None, reason) for one input record"""
+    courier_id = _text(record.get('courier_id'))
+    status = _text(record.get('new_status') or record.get('status')) or default_status
+    email = _text(record.get('changed_by_admin_email') or record.get('admin_email')) or default_admin
+    if not courier_id:
+        return None, 'missing courier_id'
+    try:
+        courier_id = int(courier_id)
+    except ValueError:
+        return None, 'courier_id must be an integer'
+    if not status or not email:
+        return None, 'Status and admin email are required'
+    if status not in STATUSES:
+        return None, f'invalid status {status!r}'
+    return (courier_id, status, email), None
+
+
+def updates_from_status(db, from_status, status, email, page_size=BATCH_SIZE):
+    """Yield an update for every courier currently in from_status (keyset pages of ids)"""
+    last = 0
+    while True:
+        ids = [row[0] for row in db.query(FROM_STATUS_PAGE, (from_status, last, page_size))[1]]
+        if not ids:
+            return
+        for courier_id in ids:
+            yield courier_id, status, email
+        last = ids[-1]
+
+
+def iter_batches(updates, batch_size):
+    """Group updates into lists of at most batch_size with no courier_id repeated"""
+    batch, seen = [], set()
+    for update in updates:
+        if len(batch) >= batch_size or update[0] in seen:
+            yield batch
+            batch, seen = [], set()
+        batch.append(update)
+        seen.add(update[0])
+    if batch:
+        yield batch
+
+
+def _error_code(error):
+    code = getattr(error, 'errno', None)
+    if code is None and error.args and isinstance(error.args[0], int):
+        code = error.args[0]
+    return code
+
+
+def is_retryable(error):
+    """
+    Deadlocks and lock wait timeouts (MySQL), or a busy database (SQLite).
+    Not the SQLSTATE 45000 UpdateCourierStatus turns them into; see
+    call_procedure.
+    """
+    if _error_code(error) in RETRYABLE_ERRORS:
+        return True
+    # Only an sqlite:// or csv:// database has imported sqlite3
+    sqlite3 = sys.modules.get('sqlite3')
+    return sqlite3 is not None and isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+
+def _placeholders(count):
+    return ', '.join('?' * count)
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _trigger_counts(db, cursor, ids):
+    # The ids are bound twice per statement, so at most MAX_VARIABLES // 2 at a time
+    audit = comments = 0
+    for chunk in _chunks(ids, MAX_VARIABLES // 2):
+        cursor.execute(db.sql(TRIGGER_COUNTS.format(ids=_placeholders(len(chunk)))), chunk + chunk)
+        chunk_audit, chunk_comments = cursor.fetchone()
+        audit += chunk_audit
+        comments += chunk_comments
+    return audit, comments
+
+
+def apply_batch(db, batch):
+    """
+    Apply one batch in a single transaction; returns the batch stats
+    (couriers updated, missing ids, rows written to each table)
+    """
+    batch = sorted(batch)
+    ids = [courier_id for courier_id, _, _ in batch]
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        if db.kind == 'sqlite':
+            cursor.execute('BEGIN IMMEDIATE')
+        # Every statement binds at most MAX_VARIABLES parameters; the chunks
+        # follow courier_id order, so the locks are still taken in order
+        old = {}
+        for chunk in _chunks(ids, MAX_VARIABLES):
+            lock = 'SELECT courier_id, status FROM Couriers WHERE courier_id IN (%s) ORDER BY courier_id' % (
+                _placeholders(len(chunk)))
+            cursor.execute(db.sql(lock + (' FOR UPDATE' if db.kind == 'mysql' else '')), chunk)
+            old.update(cursor.fetchall())
+        found = [update for update in batch if update[0] in old]
+        audit_before, comments_before = _trigger_counts(db, cursor, ids)
+
+        by_status = {}
+        for courier_id, status, _ in found:
+            by_status.setdefault(status, []).append(courier_id)
+        for status, status_ids in by_status.items():
+            for chunk in _chunks(status_ids, MAX_VARIABLES - 1):
+                cursor.execute(db.sql('UPDATE Couriers SET status = ? WHERE courier_id IN (%s)' % (
+                    _placeholders(len(chunk)))), [status] + chunk)
+        for chunk in _chunks(found, MAX_VARIABLES // 4):
+            cursor.execute(db.sql('INSERT INTO Delivery_History (courier_id, old_status, new_status, '
+                                  'changed_by_admin_email) VALUES %s' % ', '.join(['(?, ?, ?, ?)'] * len(chunk))),
+                           [value for courier_id, status, email in chunk
+                            for value in (courier_id, old[courier_id], status, email)])
+
+        audit_after, comments_after = _trigger_counts(db, cursor, ids)
+        conn.commit()
+        cursor.close()
+    return {
+        'couriers': len(found),
+        'missing': [courier_id for courier_id in ids if courier_id not in old],
+        'history': len(found),
+        'audit': audit_after - audit_before,
+        'comments': comments_after - comments_before,
+    }
+
+
+def call_procedure(db, batch):
+    """
+    The per-request path for comparison: one UpdateCourierStatus transaction
+    per courier (CALLed on MySQL, emulated like api_standin.py on SQLite)
+
+    The procedure reports a deadlock or lock wait timeout as the same
+    SQLSTATE 45000 as a missing courier, so a failed CALL only counts as
+    missing when the courier is not there; otherwise that CALL alone is
+    retried with backoff (retrying the batch would repeat the couriers
+    already committed).
+    """
+    stats = {'couriers': 0, 'missing': [], 'history': 0, 'audit': 0, 'comments': 0}
+    ids = [courier_id for courier_id, _, _ in batch]
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        audit_before, comments_before = _trigger_counts(db, cursor, ids)
+        conn.commit()
+        for courier_id, status, email in batch:
+            if db.kind == 'mysql':
+                if not _call_update(conn, cursor, courier_id, status, email):
+                    stats['missing'].append(courier_id)
+                    continue
+            else:
+                cursor.execute('SELECT status FROM Couriers WHERE courier_id = ?', (courier_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    stats['missing'].append(courier_id)
+                    continue
+                cursor.execute('UPDATE Couriers SET status = ? WHERE courier_id = ?', (status, courier_id))
+                cursor.execute('INSERT INTO Delivery_History (courier_id, old_status, new_status, '
+                               'changed_by_admin_email) VALUES (?, ?, ?, ?)', (courier_id, row[0], status, email))
+            conn.commit()
+            stats['couriers'] += 1
+            stats['history'] += 1
+        audit_after, comments_after = _trigger_counts(db, cursor, ids)
+        conn.commit()
+        cursor.close()
+    stats['audit'] = audit_after - audit_before
+    stats['comments'] = comments_after - comments_before
+    return stats
+
+
+def _call_update(conn, cursor, courier_id, status, email, retries=RETRIES):
+    """CALL UpdateCourierStatus until it succeeds (True) or finds no such courier (False)"""
+    for attempt in itertools.count(1):
+        try:
+            cursor.execute('CALL UpdateCourierStatus(%s, %s, %s)', (courier_id, status, email))
+            while cursor.nextset():
+                pass
+            return True
+        except Exception as e:
+            conn.rollback()
+            if is_retryable(e) or _error_code(e) != SIGNAL_ERROR or attempt > retries:
+                raise
+            cursor.execute('SELECT 1 FROM Couriers WHERE courier_id = %s', (courier_id,))
+            if cursor.fetchone() is None:
+                return False
+            time.sleep(RETRY_DELAY * 2 ** (attempt - 1) * (1 + random.random()))
+
+
+def written(stats):
+    """Rows written for a batch: the Couriers updates, their history rows and the trigger rows"""
+    return stats['couriers'] + stats['history'] + stats['audit'] + stats['comments']
+
+
+async def _run_batch(loop, executor, work, db, batch, retries):
+    for attempt in itertools.count(1):
+        try:
+            stats = await loop.run_in_executor(executor, work, db, batch)
+            stats['attempts'] = attempt
+            return stats
+        except Exception as e:
+            if not is_retryable(e) or attempt > retries:
+                raise BatchError(e, attempt)
+            await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1) * (1 + random.random()))
+
+
+async def run(db, updates, batch_size=BATCH_SIZE, concurrency=POOL_SIZE, retries=RETRIES, procedure=False,
+              verbose=True):
+    """Apply updates batch by batch; returns the totals"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='status-update')
+    work = call_procedure if procedure else apply_batch
+    slots = asyncio.Semaphore(concurrency)
+    in_flight = {}
+    tasks = set()
+    totals = {'batches': 0, 'updates': 0, 'couriers': 0, 'missing': [], 'history': 0, 'audit': 0, 'comments': 0,
+              'retries': 0, 'failed': [], 'batch_seconds': []}
+    start = time.perf_counter()
+
+    async def submit(number, batch):
+        batch_start = time.perf_counter()
+        try:
+            stats = await _run_batch(loop, executor, work, db, batch, retries)
+        except BatchError as e:
+            totals['failed'].append((number, len(batch), str(e)))
+            totals['retries'] += e.attempts - 1
+            if verbose:
+                print(f"  batch {number:>5}: ❌ {e} (after {e.attempts} attempt(s))", file=sys.stderr)
+            return
+        finally:
+            slots.release()
+        elapsed = time.perf_counter() - batch_start
+        totals['batch_seconds'].append(elapsed)
+        totals['retries'] += stats['attempts'] - 1
+        totals['missing'].extend(stats['missing'])
+        for key in ('couriers', 'history', 'audit', 'comments'):
+            totals[key] += stats[key]
+        if verbose:
+            amplification = written(stats) / stats['couriers'] if stats['couriers'] else 0.0
+            print(f"  batch {number:>5}: {stats['couriers']:>6} updated, {len(stats['missing']):>4} missing, "
+                  f"+{stats['audit']} audit +{stats['comments']} comments ({amplification:.2f} rows/update) "
+                  f"in {elapsed * 1000:>7.1f} ms ({len(batch) / elapsed:>8.0f} updates/s"
+                  f"{', %d attempts' % stats['attempts'] if stats['attempts'] > 1 else ''})")
+
+    try:
+        for number, batch in enumerate(iter_batches(updates, batch_size), 1):
+            # Later updates of a courier wait for the batch that has it in flight
+            blockers = {in_flight[courier_id] for courier_id, _, _ in batch if courier_id in in_flight}
+            if blockers:
+                await asyncio.wait(blockers)
+            await slots.acquire()
+            task = asyncio.create_task(submit(number, batch))
+            tasks.add(task)
+            ids = [courier_id for courier_id, _, _ in batch]
+            for courier_id in ids:
+                in_flight[courier_id] = task
+
+            def done(task, ids=ids):
+                tasks.discard(task)
+                for courier_id in ids:
+                    if in_flight.get(courier_id) is task:
+                        del in_flight[courier_id]
+
+            task.add_done_callback(done)
+            totals['batches'] += 1
+            totals['updates'] += len(batch)
+        if tasks:
+            await asyncio.wait(set(tasks))
+    finally:
+        executor.shutdown()
+    totals['seconds'] = time.perf_counter() - start
+    return totals
+
+
+def print_report(totals):
+    seconds = totals['seconds']
+    rows = totals['couriers'] + totals['history'] + totals['audit'] + totals['comments']
+    latencies = sorted(totals['batch_seconds'])
+    print(f"\n📊 {totals['couriers']} of {totals['updates']} updates applied in {totals['batches']} batch(es), "
+          f"{seconds:.2f}s ({totals['couriers'] / seconds if seconds else 0:,.0f} updates/s)")
+    if latencies:
+        print(f"   batch latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+              f"max {latencies[-1] * 1000:.1f} ms; {totals['retries']} retried attempt(s)")
+    print(f"   rows written: {totals['couriers']} Couriers + {totals['history']} Delivery_History "
+          f"+ {totals['audit']} Courier_Audit + {totals['comments']} Comments (triggers) = {rows}")
+    if totals['couriers']:
+        print(f"   write amplification: {rows / totals['couriers']:.2f} rows per update, "
+              f"{(totals['audit'] + totals['comments']) / totals['couriers']:.2f} of them from triggers")
+    if totals['missing']:
+        print(f"⚠  {len(totals['missing'])} courier id(s) not found, e.g. {totals['missing'][:5]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk courier status updates in batched transactions')
+    parser.add_argument('input', nargs='?', help='Updates file (.csv with a header row, or .jsonl)')
+    parser.add_argument('--db', help='Database DSN (default: $COURIER_DB or the server MySQL settings)')
+    parser.add_argument('--from-status', choices=STATUSES,
+                        help='Instead of a file, update every courier currently in this status')
+    parser.add_argument('--status', choices=STATUSES, help='New status for records without one')
+    parser.add_argument('--admin', help='changed_by_admin_email for records without one')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Couriers per transaction (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int,
+                        help=f'Batches in flight (default: {POOL_SIZE} on MySQL, 1 on SQLite, which has one writer)')
+    parser.add_argument('--retries', type=int, default=RETRIES,
+                        help='Retries per batch on deadlock or lock wait timeout (default: %(default)s)')
+    parser.add_argument('--procedure', action='store_true',
+                        help='Run one UpdateCourierStatus transaction per courier instead (the per-request path)')
+    parser.add_argument('--rejects', help='Append rejected input records with reasons to this JSONL file')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print per-batch stats')
+    args = parser.parse_args(argv)
+
+    if bool(args.input) == bool(args.from_status):
+        parser.error('give either an input file or --from-status')
+    if args.from_status and not (args.status and args.admin):
+        parser.error('--from-status needs --status and --admin')
+
+    try:
+        # One connection more than the batches in flight, for reading --from-status pages
+        db = Database(args.db, pool_size=max(args.concurrency or POOL_SIZE, 1) + 1)
+    except DatabaseError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    concurrency = args.concurrency or (POOL_SIZE if db.kind == 'mysql' else 1)
+    rejected = [0]
+
+    def from_file():
+        rejects = open(args.rejects, 'a') if args.rejects else None
+        try:
+            for number, record in enumerate(read_records(args.input), 1):
+                update, reason = validate(record, args.status, args.admin)
+                if update is not None:
+                    yield update
+                    continue
+                rejected[0] += 1
+                if rejects is not None:
+                    rejects.write(json.dumps({'record': number, 'reason': reason, 'data': record}, default=str) + '\n')
+        finally:
+            if rejects is not None:
+                rejects.close()
+
+    if args.from_status:
+        updates = updates_from_status(db, args.from_status, args.status, args.admin)
+    else:
+        updates = from_file()
+    try:
+        totals = asyncio.run(run(db, updates, args.batch_size, concurrency, args.retries, args.procedure,
+                                 verbose=not args.quiet))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    print_report(totals)
+    if rejected[0]:
+        print(f"⚠  {rejected[0]} input record(s) rejected" + (f" (see {args.rejects})" if args.rejects else ''))
+    if totals['failed']:
+        failed = sum(size for _, size, _ in totals['failed'])
+        print(f"❌ {len(totals['failed'])} batch(es), {failed} update(s), failed: {totals['failed'][0][2]}",
+              file=sys.stderr)
+        return 1
+    print("✅ Done")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
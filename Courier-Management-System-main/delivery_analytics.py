@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Delivery-time analytics over Courier_Audit and Delivery_History
+
+    python delivery_analytics.py --db sqlite:///courier.db
+    python delivery_analytics.py --db mysql://root@localhost/courier_management --json analytics.json
+    python -m report_pipeline build --stages analytics --db csv://dataset
+
+Couriers are read in keyset pages (courier_id > last ORDER BY courier_id
+LIMIT n), and each page's Courier_Audit and Delivery_History rows are
+fetched by courier_id range, so every courier's transitions arrive
+together. Pages become NumPy columns; the time spent in each status is the
+gap between a courier's consecutive audit rows (its created_at for the
+first), and is folded into log-binned histograms. Memory is one page plus
+(admins x bins) counters, however many audit rows there are; percentiles
+come from the histograms and are accurate to about 2%.
+"""
+
+import argparse
+import functools
+import json
+import math
+import sys
+import time
+
+from box_tables import render_table
+from courier_db import STATUSES, Database, DatabaseError
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+
+PAGE_SIZE = 100000
+# Histogram bins: 1 second to 2 years, ~4.6% wide each
+MAX_SECONDS = 2 * 365 * 86400
+BINS = 400
+PERCENTILES = [50, 90, 99]
+
+PENDING, IN_TRANSIT, DELIVERED, CANCELLED = range(4)
+CODES = {status: code for code, status in enumerate(STATUSES)}
+TRANSITIONS = [
+    ('Pending', 'In Transit'),
+    ('In Transit', 'Delivered'),
+    ('Pending', 'Cancelled'),
+    ('In Transit', 'Cancelled'),
+]
+# The extra distribution: created_at -> Delivered
+END_TO_END = len(TRANSITIONS)
+
+
+@functools.lru_cache(maxsize=None)
+def edges():
+    """Histogram bin edges in seconds"""
+    return np.logspace(0, math.log10(MAX_SECONDS), BINS + 1)
+
+
+@functools.lru_cache(maxsize=None)
+def transition_index():
+    """(old code * 4 + new code) -> transition index, -1 for moves outside the lifecycle"""
+    index = np.full(len(STATUSES) ** 2, -1, dtype=np.int64)
+    for position, (old, new) in enumerate(TRANSITIONS):
+        index[CODES[old] * len(STATUSES) + CODES[new]] = position
+    return index
+
+
+COURIER_PAGE = """
+    SELECT courier_id, managed_by_admin_id, status, created_at FROM Couriers
+    WHERE courier_id > ? ORDER BY courier_id LIMIT ?"""
+AUDIT_RANGE = """
+    SELECT courier_id, old_status, new_status, changed_at FROM Courier_Audit
+    WHERE courier_id > ? AND courier_id <= ? AND action_type = 'STATUS_UPDATE'
+    ORDER BY courier_id, audit_id"""
+HISTORY_RANGE = """
+    SELECT changed_by_admin_email, changed_at FROM Delivery_History
+    WHERE courier_id > ? AND courier_id <= ?"""
+
+
+class Durations:
+    """Per-group duration distributions: log-binned counts plus exact count, sum, min and max"""
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.counts = np.zeros((groups, BINS + 2), dtype=np.int64)
+        self.n = np.zeros(groups, dtype=np.int64)
+        self.total = np.zeros(groups)
+        self.min = np.full(groups, np.inf)
+        self.max = np.full(groups, -np.inf)
+
+    def add(self, group, seconds):
+        if not len(group):
+            return
+        seconds = seconds.astype(np.float64)
+        bins = np.searchsorted(edges(), seconds, side='right')
+        width = self.counts.shape[1]
+        self.counts += np.bincount(group * width + bins, minlength=self.counts.size).reshape(self.counts.shape)
+        self.n += np.bincount(group, minlength=self.groups)
+        self.total += np.bincount(group, weights=seconds, minlength=self.groups)
+        np.minimum.at(self.min, group, seconds)
+        np.maximum.at(self.max, group, seconds)
+
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 0, self.total / self.n, np.nan)
+
+    def percentile(self, q):
+        """Per-group q-th percentile, interpolated log-linearly inside its bin (NaN for empty groups)"""
+        cumulative = np.cumsum(self.counts, axis=1)
+        rank = np.maximum(np.ceil(self.n * q / 100.0), 1)
+        # Empty groups would land past the last bin; they come out NaN below
+        bins = np.minimum((cumulative < rank[:, None]).sum(axis=1), self.counts.shape[1] - 1)
+        lower = np.concatenate([[0.0], edges()])[bins]
+        upper = np.concatenate([edges(), [np.inf]])[bins]
+        before = np.where(bins > 0, cumulative[np.arange(self.groups), np.maximum(bins - 1, 0)], 0)
+        inside = self.counts[np.arange(self.groups), bins]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.where(inside > 0, (rank - before) / inside, 0.5)
+            value = np.where(lower > 0, lower * (upper / lower) ** fraction, upper * fraction)
+        value = np.clip(value, self.min, self.max)
+        return np.where(self.n > 0, value, np.nan)
+
+
+def _seconds(values):
+    """Timestamps (strings or datetimes) -> int64 epoch seconds, vectorized"""
+    return np.array(values, dtype='datetime64[s]').astype(np.int64)
+
+
+def _codes(values):
+    """Status strings -> codes 0-3 (-1 for anything else)"""
+    uniques, inverse = np.unique(np.array(values, dtype='U16'), return_inverse=True)
+    return np.array([CODES.get(value, -1) for value in uniques], dtype=np.int64)[inverse]
+
+
+class DeliveryAnalytics:
+    """Accumulates time-in-status and per-admin figures one page of couriers at a time"""
+
+    def __init__(self, admins):
+        # admins: [(admin_id, name, email)]; index 0 collects couriers with no admin
+        self.admins = sorted(admins)
+        size = max([admin_id for admin_id, _, _ in admins], default=0) + 1
+        self.admin_by_email = {email: admin_id for admin_id, _, email in admins}
+        self.transitions = Durations(len(TRANSITIONS) + 1)
+        self.delivery = Durations(size)
+        self.final = np.zeros((size, len(STATUSES)), dtype=np.int64)
+        self.changes = np.zeros(size, dtype=np.int64)
+        self.first_change = np.full(size, np.iinfo(np.int64).max)
+        self.last_change = np.full(size, np.iinfo(np.int64).min)
+        self.couriers = 0
+        self.audit_rows = 0
+        self.skipped = 0
+
+    def add_page(self, couriers, audit, history):
+        """Fold in one page: Couriers rows plus the audit and history rows of the same courier_id range"""
+        ids, admin, status, created = zip(*couriers)
+        ids = np.array(ids, dtype=np.int64)
+        admin = np.array([a or 0 for a in admin], dtype=np.int64)
+        status = _codes(status)
+        created = _seconds(created)
+        self.couriers += len(ids)
+        known = status >= 0
+        np.add.at(self.final, (admin[known], status[known]), 1)
+
+        if audit:
+            a_ids, a_old, a_new, a_at = zip(*audit)
+            a_ids = np.array(a_ids, dtype=np.int64)
+            a_old, a_new, a_at = _codes(a_old), _codes(a_new), _seconds(a_at)
+            self.audit_rows += len(a_ids)
+            pos = np.searchsorted(ids, a_ids)
+            # Each status was entered at the courier's previous audit row, or at created_at
+            first = np.ones(len(a_ids), dtype=bool)
+            first[1:] = a_ids[1:] != a_ids[:-1]
+            entered = np.where(first, created[pos], np.concatenate([[0], a_at[:-1]]))
+            lifecycle = (a_old >= 0) & (a_new >= 0)
+            transition = np.where(lifecycle, transition_index()[np.maximum(a_old, 0) * len(STATUSES) +
+                                                             np.maximum(a_new, 0)], -1)
+            duration = a_at - entered
+            valid = (transition >= 0) & (duration >= 0)
+            self.skipped += len(a_ids) - int(valid.sum())
+            self.transitions.add(transition[valid], duration[valid])
+
+            delivered = (a_new == DELIVERED) & (a_at >= created[pos])
+            end_to_end = (a_at - created[pos])[delivered]
+            self.transitions.add(np.full(len(end_to_end), END_TO_END), end_to_end)
+            self.delivery.add(admin[pos][delivered], end_to_end)
+
+        if history:
+            emails, changed_at = zip(*history)
+            uniques, inverse = np.unique(np.array(emails, dtype=str), return_inverse=True)
+            by_email = np.array([self.admin_by_email.get(email, 0) for email in uniques], dtype=np.int64)
+            who = by_email[inverse]
+            at = _seconds(changed_at)
+            self.changes += np.bincount(who, minlength=len(self.changes))
+            np.minimum.at(self.first_change, who, at)
+            np.maximum.at(self.last_change, who, at)
+
+    def transition_rows(self):
+        """[(transition, count, mean h, p50 h, p90 h, p99 h, max h)]"""
+        labels = [f'{old} -> {new}' for old, new in TRANSITIONS] + ['Created -> Delivered']
+        stats = [self.transitions.mean()] + [self.transitions.percentile(q) for q in PERCENTILES]
+        return [(label, int(self.transitions.n[i])) +
+                tuple(_hours(column[i]) for column in stats) + (_hours(self.transitions.max[i]),)
+                for i, label in enumerate(labels)]
+
+    def admin_rows(self):
+        """[(id, name, managed, delivered, cancelled, cancel %, changes, changes/day, p50 h, p90 h)]"""
+        p50, p90 = self.delivery.percentile(50), self.delivery.percentile(90)
+        managed = self.final.sum(axis=1)
+        rows = []
+        for admin_id, name, _ in self.admins:
+            if not managed[admin_id] and not self.changes[admin_id]:
+                continue
+            cancelled = int(self.final[admin_id, CANCELLED])
+            changes = int(self.changes[admin_id])
+            days = max(int(self.last_change[admin_id] - self.first_change[admin_id]) / 86400, 1.0) if changes else 1.0
+            rows.append((admin_id, name, int(managed[admin_id]), int(self.final[admin_id, DELIVERED]), cancelled,
+                         round(100.0 * cancelled / managed[admin_id], 1) if managed[admin_id] else 0.0,
+                         changes, round(changes / days, 1),
+                         _hours(p50[admin_id]), _hours(p90[admin_id])))
+        return rows
+
+    def as_dict(self):
+        return {
+            'couriers': self.couriers,
+            'audit_rows': self.audit_rows,
+            'transitions': [dict(zip(TRANSITION_KEYS, row)) for row in self.transition_rows()],
+            'admins': [dict(zip(ADMIN_KEYS, row)) for row in self.admin_rows()],
+        }
+
+
+TRANSITION_HEADERS = ['Transition', 'Count', 'Mean h', 'p50 h', 'p90 h', 'p99 h', 'Max h']
+TRANSITION_KEYS = ['transition', 'count', 'mean_hours', 'p50_hours', 'p90_hours', 'p99_hours', 'max_hours']
+ADMIN_HEADERS = ['ID', 'Admin', 'Managed', 'Delivered', 'Cancelled', 'Cancel %', 'Changes', 'Per Day',
+                 'p50 h', 'p90 h']
+ADMIN_KEYS = ['admin_id', 'admin_name', 'managed', 'delivered', 'cancelled', 'cancel_pct', 'changes',
+              'changes_per_day', 'p50_delivery_hours', 'p90_delivery_hours']
+
+
+def _hours(seconds):
+    return None if seconds is None or not np.isfinite(seconds) else round(float(seconds) / 3600, 1)
+
+
+def iter_pages(db, page_size=PAGE_SIZE):
+    """Yield (couriers, audit, history) row lists per keyset page of couriers"""
+    last = 0
+    while True:
+        couriers = db.query(COURIER_PAGE, (last, page_size))[1]
+        if not couriers:
+            return
+        high = couriers[-1][0]
+        yield couriers, db.query(AUDIT_RANGE, (last, high))[1], db.query(HISTORY_RANGE, (last, high))[1]
+        last = high
+
+
+def analyze(db, page_size=PAGE_SIZE, verbose=False):
+    """Run the analytics over the whole database; returns the DeliveryAnalytics"""
+    admins = [tuple(row) for row in db.query('SELECT admin_id, name, email FROM Admins')[1]]
+    analytics = DeliveryAnalytics(admins)
+    start = time.perf_counter()
+    for number, (couriers, audit, history) in enumerate(iter_pages(db, page_size), 1):
+        analytics.add_page(couriers, audit, history)
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"  page {number:>5}: {analytics.couriers:>10} couriers, {analytics.audit_rows:>10} audit rows "
+                  f"({analytics.audit_rows / elapsed:,.0f} rows/s)", file=sys.stderr)
+    return analytics
+
+
+def render_tables(analytics):
+    """The two analytics box tables"""
+    return (render_table(TRANSITION_HEADERS, analytics.transition_rows()),
+            render_table(ADMIN_HEADERS, analytics.admin_rows()))
+
+
+# Where the analytics go in the report: after the Query 3 (Monthly Order Trends) notes
+ANCHOR = r'(- `GROUP BY` - Group by month\n\n---\n\n)'
+MARKED = r'(?:<!-- delivery-analytics -->\n.*?<!-- /delivery-analytics -->\n\n)?'
+
+
+def analytics_rules(db=None):
+    """Rule inserting (or refreshing) the delivery-time tables in section 10.7"""
+    own_db = db is None
+    db = db or Database()
+    try:
+        analytics = analyze(db)
+    finally:
+        if own_db:
+            db.close()
+    transitions, admins = render_tables(analytics)
+    block = (
+        '<!-- delivery-analytics -->\n'
+        '**Delivery Time Analytics** (delivery_analytics.py, %d couriers, %d audit rows)\n\n'
+        'Time spent in each status, from consecutive Courier_Audit rows:\n\n'
+        '```plaintext\n%s\n```\n\n'
+        'Admin throughput (Delivery_History changes per active day) and cancellation rates:\n\n'
+        '```plaintext\n%s\n```\n'
+        '<!-- /delivery-analytics -->\n\n'
+    ) % (analytics.couriers, analytics.audit_rows, transitions, admins)
+    return [(ANCHOR + MARKED, r'\1' + block.replace('\\', '\\\\'))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Delivery-time analytics over Courier_Audit and Delivery_History')
+    parser.add_argument('--db', help='Database DSN (default: $COURIER_DB or the server MySQL settings)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help='Couriers per keyset page (default: %(default)s)')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results as JSON')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print per-page progress')
+    args = parser.parse_args(argv)
+
+    try:
+        db = Database(args.db)
+    except DatabaseError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    try:
+        analytics = analyze(db, args.page_size, verbose=not args.quiet)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    transitions, admins = render_tables(analytics)
+    print("\n⏱  Time in status (hours):")
+    print(transitions)
+    print("\n👤 Admin throughput and cancellations:")
+    print(admins)
+    if analytics.skipped:
+        print(f"\n⚠  {analytics.skipped} audit row(s) outside the Pending -> In Transit -> Delivered/Cancelled "
+              f"lifecycle or out of order were skipped")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(analytics.as_dict(), f, indent=2)
+            f.write('\n')
+        print(f"\n📄 Wrote {args.json}")
+    print(f"\n✅ {analytics.couriers} couriers, {analytics.audit_rows} audit rows in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
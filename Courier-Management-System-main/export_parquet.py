@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Columnar (Parquet) export of the courier tables for analytics
+
+Instead of re-scraping GET /api/couriers or /api/reports/join, export the
+tables once and append what is new on later runs:
+
+    python export_parquet.py --db mysql://root@localhost/courier_management --out exports
+    python export_parquet.py --db sqlite:///courier.db --out exports --tables Couriers,Delivery_History
+    python export_parquet.py --db sqlite:///courier.db --out exports --full      # start over
+
+Each table is read in keyset pages on its AUTO_INCREMENT key (key > last
+ORDER BY key LIMIT n) and written as hive-partitioned Parquet:
+
+    exports/Couriers/status=Delivered/month=2024-05/part-0000000001-0.parquet
+
+Couriers are partitioned by status and created_at month, Delivery_History
+and Courier_Audit by new_status and changed_at month, the other tables by
+created_at month. Status, action and email columns are dictionary-encoded.
+The last exported key per table is kept in exports/_export_state.json, so
+the next run only reads rows added since. Couriers rows are exported as
+they were at the time; their later status changes are in Delivery_History
+and Courier_Audit (use --full to re-snapshot Couriers).
+
+Readers then scan only the columns and partitions they ask for:
+
+    from export_parquet import open_dataset
+    import pyarrow.dataset as ds
+    table = open_dataset('exports', 'Couriers').to_table(
+        columns=['courier_id', 'managed_by_admin_id'],
+        filter=(ds.field('status') == 'Delivered') & (ds.field('month') >= '2024-01'))
+
+Needs pyarrow (pip install pyarrow).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+from courier_db import Database, DatabaseError
+
+PAGE_SIZE = 100000
+STATE_FILE = '_export_state.json'
+# Hive partition value for a NULL status or month
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# table -> (key, partition status column or None, partition time column, [(column, type)])
+# Types: int, str, dict (dictionary-encoded string), time
+EXPORTS = {
+    'Users': ('user_id', None, 'created_at', [
+        ('user_id', 'int'), ('name', 'str'), ('email', 'dict'), ('phone', 'str'), ('address', 'str'),
+        ('created_at', 'time'),
+    ]),
+    'Admins': ('admin_id', None, 'created_at', [
+        ('admin_id', 'int'), ('name', 'str'), ('email', 'dict'), ('phone', 'str'), ('role', 'dict'),
+        ('created_at', 'time'),
+    ]),
+    'Couriers': ('courier_id', 'status', 'created_at', [
+        ('courier_id', 'int'), ('customer_id', 'int'), ('managed_by_admin_id', 'int'), ('bill_number', 'str'),
+        ('pickup_address', 'str'), ('delivery_address', 'str'), ('status', 'dict'), ('created_at', 'time'),
+        ('updated_at', 'time'),
+    ]),
+    'Delivery_History': ('history_id', 'new_status', 'changed_at', [
+        ('history_id', 'int'), ('courier_id', 'int'), ('old_status', 'dict'), ('new_status', 'dict'),
+        ('changed_at', 'time'), ('changed_by_admin_email', 'dict'),
+    ]),
+    'Courier_Audit': ('audit_id', 'new_status', 'changed_at', [
+        ('audit_id', 'int'), ('courier_id', 'int'), ('action_type', 'dict'), ('old_status', 'dict'),
+        ('new_status', 'dict'), ('changed_at', 'time'), ('admin_email', 'dict'),
+    ]),
+    'Comments': ('comment_id', None, 'created_at', [
+        ('comment_id', 'int'), ('courier_id', 'int'), ('user_id', 'int'), ('comment_text', 'str'),
+        ('created_at', 'time'),
+    ]),
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+    except ImportError:
+        raise ExportError("Parquet export needs pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.compute, pyarrow.dataset
+
+
+def _arrow_type(pa, kind):
+    return {
+        'int': pa.int64(),
+        'str': pa.string(),
+        'dict': pa.dictionary(pa.int32(), pa.string()),
+        'time': pa.timestamp('s'),
+    }[kind]
+
+
+def _column(pa, values, kind):
+    if kind == 'time' and any(isinstance(value, str) for value in values):
+        # SQLite hands timestamps back as 'YYYY-MM-DD HH:MM:SS' text
+        return pa.array(values, pa.string()).cast(pa.timestamp('s'))
+    if kind == 'dict':
+        return pa.array(values, pa.string()).dictionary_encode()
+    return pa.array(values, _arrow_type(pa, kind))
+
+
+def partitioning(table):
+    """The hive partitioning (status column and/or month directories) of an exported table"""
+    pa, _, ds = _pyarrow()
+    _, status, _, _ = EXPORTS[table]
+    fields = ([(status, pa.string())] if status else []) + [('month', pa.string())]
+    return ds.HivePartitioning(pa.schema(fields), null_fallback=NULL_PARTITION)
+
+
+def open_dataset(out, table):
+    """A pyarrow Dataset over one exported table; filters on status/month skip whole directories"""
+    _, _, ds = _pyarrow()
+    return ds.dataset(os.path.join(out, table), format='parquet', partitioning=partitioning(table))
+
+
+def page_table(table, rows):
+    """One page of rows -> an Arrow table plus its month partition column"""
+    pa, pc, _ = _pyarrow()
+    _, status, time_column, columns = EXPORTS[table]
+    arrays, names = [], []
+    for (name, kind), values in zip(columns, zip(*rows)):
+        # The partition status becomes a directory name rather than a column in the files
+        arrays.append(_column(pa, list(values), 'str' if name == status else kind))
+        names.append(name)
+    arrays.append(pc.strftime(arrays[names.index(time_column)], format='%Y-%m'))
+    names.append('month')
+    return pa.table(arrays, names=names)
+
+
+def load_state(out):
+    try:
+        with open(os.path.join(out, STATE_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(out, state):
+    path = os.path.join(out, STATE_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def export_table(db, out, table, last=0, page_size=PAGE_SIZE, verbose=True):
+    """
+    Append the rows of table with key > last; returns (rows written, new last key).
+    The state is saved after every page, so an interrupted export resumes
+    where it stopped (a page written twice overwrites its own files).
+    """
+    _, _, ds = _pyarrow()
+    key, _, _, columns = EXPORTS[table]
+    query = 'SELECT %s FROM %s WHERE %s > ? ORDER BY %s LIMIT ?' % (
+        ', '.join(name for name, _ in columns), table, key, key)
+    file_options = ds.ParquetFileFormat().make_write_options(compression='zstd')
+    written = 0
+    while True:
+        rows = db.query(query, (last, page_size))[1]
+        if not rows:
+            return written, last
+        start = time.perf_counter()
+        ds.write_dataset(page_table(table, rows), os.path.join(out, table), format='parquet',
+                         partitioning=partitioning(table), file_options=file_options,
+                         basename_template='part-%010d-{i}.parquet' % rows[0][0],
+                         existing_data_behavior='overwrite_or_ignore')
+        written += len(rows)
+        last = rows[-1][0]
+        state = load_state(out)
+        state[table] = last
+        save_state(out, state)
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"  {table:<17} {written:>10} rows (up to {key} {last}, "
+                  f"{len(rows) / elapsed:,.0f} rows/s written)")
+
+
+def export(db, out, tables=None, page_size=PAGE_SIZE, full=False, verbose=True):
+    """Export (or append to) the given tables; returns {table: rows written this run}"""
+    _pyarrow()
+    os.makedirs(out, exist_ok=True)
+    counts = {}
+    for table in tables or list(EXPORTS):
+        if full:
+            shutil.rmtree(os.path.join(out, table), ignore_errors=True)
+            state = load_state(out)
+            state.pop(table, None)
+            save_state(out, state)
+        last = load_state(out).get(table, 0)
+        counts[table], _ = export_table(db, out, table, last, page_size, verbose)
+    return counts
+
+
+def parse_tables(value):
+    tables = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in tables if name not in EXPORTS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown table(s) {', '.join(unknown)} (choose from {', '.join(EXPORTS)})")
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Partitioned Parquet export of the courier tables')
+    parser.add_argument('--db', help='Database DSN (default: $COURIER_DB or the server MySQL settings)')
+    parser.add_argument('--out', default='exports', help='Export directory (default: %(default)s)')
+    parser.add_argument('--tables', type=parse_tables, help='Comma-separated subset (default: all six tables)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help='Rows per keyset page (default: %(default)s)')
+    parser.add_argument('--full', action='store_true', help='Drop what was exported and start from the first row')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print per-page progress')
+    args = parser.parse_args(argv)
+
+    try:
+        db = Database(args.db)
+    except DatabaseError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    try:
+        counts = export(db, args.out, args.tables, args.page_size, args.full, verbose=not args.quiet)
+    except (ExportError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    state = load_state(args.out)
+    print()
+    for table, count in counts.items():
+        print(f"📦 {table:<17} +{count:<10} rows (last {EXPORTS[table][0]} {state.get(table, 0)})")
+    print(f"\n✅ Exported {sum(counts.values())} new rows to {args.out}/ in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Write one delivery report per customer or admin, with a summary index
+
+    python fanout_reports.py customers --all --db sqlite://
+    python fanout_reports.py customers --ids 1,2,5 --out reports
+    python fanout_reports.py admins --all -j 4 --db csv://dataset
+    python fanout_reports.py customers --ids-file vip.txt --rules house-style.yaml
+
+Each report covers the customer's (or admin's) couriers, their
+Delivery_History, Courier_Audit and Comments (including the ones written by
+after_courier_delivered). IDs are taken a page at a time (keyset pagination
+for --all) and each page's data comes from five IN-list queries, not one
+query per report. The main process fetches while a process pool fills the
+report template with RewriteEngine rules (plus any --rules stages), writes
+the files and hands back one summary row each for <out>/<kind>/index.md.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+from box_tables import render_table
+from courier_db import STATUSES, Database, DatabaseError
+from rewrite_engine import RewriteEngine, Rule
+
+PAGE_SIZE = 500
+OUT_DIR = 'reports'
+
+# kind -> entity table, its key, the Couriers column pointing at it, and the other party
+KINDS = {
+    'customers': {'table': 'Users', 'key': 'user_id', 'column': 'customer_id',
+                  'label': 'Customer', 'other': ('Admin', 'admin_name')},
+    'admins': {'table': 'Admins', 'key': 'admin_id', 'column': 'managed_by_admin_id',
+               'label': 'Admin', 'other': ('Customer', 'customer_name')},
+}
+
+TEMPLATE = """# {{label}} Delivery Report: {{name}}
+
+{{profile}}
+
+## Summary
+
+{{summary}}
+
+## Couriers
+
+```plaintext
+{{couriers}}
+```
+
+## Delivery History
+
+```plaintext
+{{history}}
+```
+
+## Audit Trail (after_courier_status_update)
+
+```plaintext
+{{audit}}
+```
+
+## Comments
+
+```plaintext
+{{comments}}
+```
+"""
+
+FIELDS = ['label', 'name', 'profile', 'summary', 'couriers', 'history', 'audit', 'comments']
+
+COURIERS = """
+    SELECT c.%(column)s, c.courier_id, c.bill_number, c.status, c.pickup_address,
+           c.delivery_address, c.created_at, u.name AS customer_name, a.name AS admin_name
+    FROM Couriers c
+    LEFT JOIN Users u ON c.customer_id = u.user_id
+    LEFT JOIN Admins a ON c.managed_by_admin_id = a.admin_id
+    WHERE c.%(column)s IN (%(ids)s)
+    ORDER BY c.%(column)s, c.courier_id"""
+
+# Child tables of Couriers: (query name, columns after the owner id)
+CHILDREN = {
+    'history': """
+        SELECT c.%(column)s, h.courier_id, h.old_status, h.new_status, h.changed_at, h.changed_by_admin_email
+        FROM Delivery_History h JOIN Couriers c ON h.courier_id = c.courier_id
+        WHERE c.%(column)s IN (%(ids)s)
+        ORDER BY c.%(column)s, h.history_id""",
+    'audit': """
+        SELECT c.%(column)s, t.courier_id, t.action_type, t.old_status, t.new_status, t.changed_at, t.admin_email
+        FROM Courier_Audit t JOIN Couriers c ON t.courier_id = c.courier_id
+        WHERE c.%(column)s IN (%(ids)s)
+        ORDER BY c.%(column)s, t.audit_id""",
+    'comments': """
+        SELECT c.%(column)s, m.courier_id, m.comment_text, m.created_at
+        FROM Comments m JOIN Couriers c ON m.courier_id = c.courier_id
+        WHERE c.%(column)s IN (%(ids)s)
+        ORDER BY c.%(column)s, m.comment_id""",
+}
+
+HEADERS = {
+    'history': ['Courier', 'Old Status', 'New Status', 'Changed At', 'Changed By'],
+    'audit': ['Courier', 'Action', 'Old Status', 'New Status', 'Changed At', 'Admin Email'],
+    'comments': ['Courier', 'Comment', 'Created At'],
+}
+
+
+def iter_id_pages(db, kind, ids=None, page_size=PAGE_SIZE):
+    """Yield lists of entity ids: pages of the given ids, or keyset pages over the whole table"""
+    if ids is not None:
+        for start in range(0, len(ids), page_size):
+            yield ids[start:start + page_size]
+        return
+    spec = KINDS[kind]
+    query = 'SELECT %(key)s FROM %(table)s WHERE %(key)s > ? ORDER BY %(key)s LIMIT %(limit)d' % dict(
+        spec, limit=page_size)
+    last = 0
+    while True:
+        page = [row[0] for row in db.query(query, (last,))[1]]
+        if not page:
+            return
+        yield page
+        last = page[-1]
+
+
+def _grouped(rows):
+    """Group rows on their first column (the owner id); the id is dropped from each row"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[0]].append(row[1:])
+    return groups
+
+
+def fetch_page(db, kind, ids):
+    """All report data for one page of ids in five queries; returns [(entity row, {section: rows})]"""
+    spec = KINDS[kind]
+    params = dict(spec, ids=', '.join('?' * len(ids)))
+    columns, entities = db.query('SELECT * FROM %(table)s WHERE %(key)s IN (%(ids)s) ORDER BY %(key)s' % params,
+                                 ids)
+    sections = {'couriers': _grouped(db.query(COURIERS % params, ids)[1])}
+    for name, query in CHILDREN.items():
+        sections[name] = _grouped(db.query(query % params, ids)[1])
+    page = []
+    for row in entities:
+        entity = dict(zip(columns, row))
+        owner = entity[spec['key']]
+        page.append((entity, {name: groups.get(owner, []) for name, groups in sections.items()}))
+    return page
+
+
+def _literal(text):
+    # Replacement strings are expanded as templates when they contain a backslash
+    return text.replace('\\', '\\\\')
+
+
+def _table(headers, rows):
+    return render_table(headers, rows) if rows else '(none)'
+
+
+def report_fields(kind, entity, data):
+    """The template values for one report"""
+    spec = KINDS[kind]
+    other_label, other_column = spec['other']
+    couriers = data['couriers']
+    statuses = Counter(row[2] for row in couriers)
+
+    profile = ['**%s ID:** %s' % (spec['label'], entity[spec['key']]),
+               '**Email:** %s' % entity.get('email', '')]
+    if entity.get('phone'):
+        profile.append('**Phone:** %s' % entity['phone'])
+    if entity.get('role'):
+        profile.append('**Role:** %s' % entity['role'])
+    if entity.get('address'):
+        profile.append('**Address:** %s' % entity['address'])
+
+    summary = ['| Status | Couriers |', '|--------|----------|']
+    summary += ['| %s | %d |' % (status, statuses[status]) for status in STATUSES]
+    summary.append('| **Total** | **%d** |' % len(couriers))
+
+    other = 6 if other_column == 'customer_name' else 7
+    return {
+        'label': spec['label'],
+        'name': entity['name'],
+        'profile': '  \n'.join(profile),
+        'summary': '\n'.join(summary),
+        'couriers': _table(['ID', 'Bill Number', 'Status', other_label, 'Pickup', 'Delivery', 'Created At'],
+                           [(row[0], row[1], row[2], row[other], row[3], row[4], row[5]) for row in couriers]),
+        'history': _table(HEADERS['history'], data['history']),
+        'audit': _table(HEADERS['audit'], data['audit']),
+        'comments': _table(HEADERS['comments'], data['comments']),
+    }, statuses
+
+
+def report_path(out_dir, kind, entity_id):
+    return os.path.join(out_dir, kind, '%s-%06d.md' % (kind[:-1], entity_id))
+
+
+# Per-process render state, set up once by init_worker
+_state = {}
+
+
+def init_worker(template, rule_files):
+    """Load the template and compile the --rules stages once per process"""
+    stages = []
+    if rule_files:
+        import rule_registry
+
+        for path in rule_files:
+            stages += [RewriteEngine(rules) for _, _, rules in rule_registry.load_stages(path)]
+    _state['template'] = template
+    _state['stages'] = stages
+    _state['missing'] = set()
+
+
+def render_report(kind, entity, data):
+    """Fill the template for one entity and run the --rules stages over it"""
+    fields, statuses = report_fields(kind, entity, data)
+    rules = [Rule(r'\{\{%s\}\}' % name, _literal(str(fields[name])), name=name, expect='any')
+             for name in FIELDS]
+    content, counts = RewriteEngine(rules).rewrite(_state['template'])
+    _state['missing'].update(name for name, count in counts.items() if not count)
+    for engine in _state['stages']:
+        content, _ = engine.rewrite(content)
+    return content, statuses
+
+
+def render_page(kind, page, out_dir):
+    """Render and write one page of reports; returns (summary rows, placeholders missing from the template)"""
+    summaries = []
+    for entity, data in page:
+        content, statuses = render_report(kind, entity, data)
+        path = report_path(out_dir, kind, entity[KINDS[kind]['key']])
+        with open(path, 'w') as f:
+            f.write(content)
+        summaries.append((entity[KINDS[kind]['key']], entity['name'], entity.get('email', ''),
+                          len(data['couriers']), statuses.get('Delivered', 0), statuses.get('Cancelled', 0),
+                          len(data['history']), len(data['comments']), os.path.basename(path)))
+    return summaries, sorted(_state['missing'])
+
+
+def write_index(out_dir, kind, summaries):
+    """Write <out>/<kind>/index.md: totals, then one linked row per report"""
+    label = KINDS[kind]['label']
+    totals = [sum(row[i] for row in summaries) for i in range(3, 8)]
+    lines = [
+        '# %s Delivery Reports' % label,
+        '',
+        '%d reports | %d couriers | %d delivered | %d cancelled | %d status changes | %d comments' % (
+            len(summaries), *totals),
+        '',
+        '| ID | %s | Email | Couriers | Delivered | Cancelled | History | Comments |' % label,
+        '|---:|------|-------|---------:|----------:|----------:|--------:|---------:|',
+    ]
+    for entity_id, name, email, couriers, delivered, cancelled, history, comments, filename in sorted(summaries):
+        lines.append('| %s | [%s](%s) | %s | %d | %d | %d | %d | %d |' % (
+            entity_id, name, filename, email, couriers, delivered, cancelled, history, comments))
+    path = os.path.join(out_dir, kind, 'index.md')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def fan_out(db, kind, ids=None, out_dir=OUT_DIR, jobs=1, page_size=PAGE_SIZE, template=TEMPLATE,
+            rule_files=None):
+    """Fetch pages in the main process and render them in a pool; returns (summaries, missing placeholders)"""
+    os.makedirs(os.path.join(out_dir, kind), exist_ok=True)
+    summaries, missing = [], set()
+    pages = (fetch_page(db, kind, page_ids) for page_ids in iter_id_pages(db, kind, ids, page_size))
+
+    if jobs <= 1:
+        init_worker(template, rule_files)
+        for page in pages:
+            rows, absent = render_page(kind, page, out_dir)
+            summaries += rows
+            missing.update(absent)
+        return summaries, missing
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(template, rule_files)) as pool:
+        # Keep a couple of pages per worker in flight so fetching overlaps rendering
+        pending = []
+        for page in itertools.chain(pages, [None]):
+            if page is not None:
+                pending.append(pool.submit(render_page, kind, page, out_dir))
+            while pending and (page is None or len(pending) >= jobs * 2):
+                rows, absent = pending.pop(0).result()
+                summaries += rows
+                missing.update(absent)
+    return summaries, missing
+
+
+def parse_ids(value):
+    return [int(part) for part in value.replace(',', ' ').split()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write one delivery report per customer or admin')
+    parser.add_argument('kind', choices=sorted(KINDS), help='Whose reports to write')
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument('--ids', type=parse_ids, help='Comma-separated ids')
+    selection.add_argument('--ids-file', help='File of ids (comma or whitespace separated)')
+    selection.add_argument('--all', action='store_true', help='Every customer or admin')
+    parser.add_argument('--db', help='Database DSN (default: $COURIER_DB or the server MySQL settings)')
+    parser.add_argument('--out', default=OUT_DIR, help='Output directory (default: %(default)s)')
+    parser.add_argument('--template', help='Markdown template with {{placeholders}} (default: built in)')
+    parser.add_argument('--rules', action='append', metavar='FILE',
+                        help='JSON/TOML/YAML rule file applied to every report (repeatable, see rule_registry.py)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes to render with (0 = one per CPU, default: 1)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help='Ids per batch of IN-list queries (default: %(default)s)')
+    args = parser.parse_args(argv)
+    jobs = args.jobs or os.cpu_count() or 1
+
+    try:
+        ids = args.ids
+        if args.ids_file:
+            with open(args.ids_file, 'r') as f:
+                ids = parse_ids(f.read())
+        template = TEMPLATE
+        if args.template:
+            with open(args.template, 'r') as f:
+                template = f.read()
+        if args.rules:
+            import rule_registry
+
+            for path in args.rules:
+                rule_registry.load_stages(path)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    try:
+        db = Database(args.db)
+    except DatabaseError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print(f"\n📨 Writing {args.kind} reports to {os.path.join(args.out, args.kind)}/ ({jobs} worker(s))...")
+    start = time.perf_counter()
+    try:
+        summaries, missing = fan_out(db, args.kind, ids, args.out, jobs, args.page_size, template, args.rules)
+    finally:
+        db.close()
+    index = write_index(args.out, args.kind, summaries)
+    elapsed = time.perf_counter() - start
+
+    if ids is not None and len(summaries) < len(set(ids)):
+        print(f"⚠  {len(set(ids)) - len(summaries)} id(s) not found in {KINDS[args.kind]['table']}")
+    if missing:
+        print(f"⚠  Template has no placeholder for: {', '.join(sorted(missing))}")
+    rate = len(summaries) / elapsed if elapsed else 0
+    print(f"✅ {len(summaries)} reports in {elapsed:.2f}s ({rate:.0f} reports/s)")
+    print(f"📇 Index: {index}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
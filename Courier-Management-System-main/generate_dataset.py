@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic courier dataset at any scale (up to tens of millions of couriers)
+
+Writes Users, Admins, Couriers, Delivery_History, Courier_Audit and Comments
+rows as CSV or SQL chunk files:
+
+    python generate_dataset.py --couriers 1000000 -j 4 --out dataset/
+    python generate_dataset.py --couriers 10000 --format sql --out dataset-sql/
+    python report_data.py join --db csv://dataset
+
+Every courier follows the ENUM lifecycle (Pending -> In Transit ->
+Delivered, or Cancelled from Pending/In Transit) with increasing
+timestamps, and gets the Delivery_History, Courier_Audit and Comments rows
+that UpdateCourierStatus and the two triggers would have written. Rows are
+produced in NumPy-vectorized chunks, so memory stays constant, and the
+couriers are split into shards rendered in parallel. Each shard draws from
+its own seed derived from --seed, so output depends only on --seed, the
+scale and --shards, never on -j.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+
+CHUNK_ROWS = 100000
+SQL_ROWS = 1000
+START = '2024-01-01T00:00:00'
+SPAN_DAYS = 365
+
+FIRST_NAMES = ['John', 'Jane', 'Robert', 'Emily', 'Michael', 'Sarah', 'David', 'Lisa', 'James', 'Maria',
+               'Daniel', 'Laura', 'Kevin', 'Anna', 'Thomas', 'Sofia', 'Brian', 'Olivia', 'Steven', 'Emma']
+LAST_NAMES = ['Doe', 'Smith', 'Johnson', 'Davis', 'Wilson', 'Brown', 'Martinez', 'Anderson', 'Taylor',
+              'Thomas', 'Moore', 'Jackson', 'White', 'Harris', 'Clark', 'Lewis', 'Walker', 'Hall']
+STREETS = ['Main St', 'Oak Ave', 'Pine Rd', 'Elm St', 'Maple Dr', 'Cedar Ln', 'Birch Ct', 'Spruce Way',
+           'Lake View Rd', 'Hill St', 'River Rd', 'Park Ave']
+CITIES = ['New York, NY', 'Los Angeles, CA', 'Chicago, IL', 'Houston, TX', 'Phoenix, AZ',
+          'Philadelphia, PA', 'San Antonio, TX', 'San Diego, CA', 'Dallas, TX', 'Seattle, WA']
+ROLES = ['Operations Manager', 'Logistics Manager', 'Customer Service Manager', 'Warehouse Manager']
+CUSTOMER_COMMENTS = ['Please leave the package at the front desk.', 'Call before delivery, please.',
+                     'Fragile contents - handle with care.', 'Any update on this shipment?']
+
+# Final status shares; cancelled couriers are split between cancelled-while-pending and in transit
+FINAL_STATUS = {'Pending': 0.10, 'In Transit': 0.15, 'Delivered': 0.65, 'Cancelled': 0.10}
+CANCELLED_IN_TRANSIT = 0.4
+# Mean hours spent in Pending and in In Transit before the next transition
+PENDING_HOURS = 8
+TRANSIT_HOURS = 40
+CUSTOMER_COMMENT_RATE = 0.05
+
+TABLES = {
+    'Users': ['user_id', 'name', 'email', 'phone', 'address', 'created_at'],
+    'Admins': ['admin_id', 'name', 'email', 'phone', 'role', 'created_at'],
+    'Couriers': ['courier_id', 'customer_id', 'managed_by_admin_id', 'bill_number', 'pickup_address',
+                 'delivery_address', 'status', 'created_at', 'updated_at'],
+    'Delivery_History': ['courier_id', 'old_status', 'new_status', 'changed_at', 'changed_by_admin_email'],
+    'Courier_Audit': ['courier_id', 'action_type', 'old_status', 'new_status', 'changed_at', 'admin_email'],
+    'Comments': ['courier_id', 'user_id', 'comment_text', 'created_at'],
+}
+# Columns written unquoted in SQL output
+NUMERIC = {'user_id', 'admin_id', 'courier_id', 'customer_id', 'managed_by_admin_id'}
+
+
+def timestamps(seconds):
+    """Epoch-second offsets from START -> 'YYYY-MM-DD HH:MM:SS' strings, vectorized"""
+    return np.char.replace((np.datetime64(START, 's') + seconds.astype('timedelta64[s]')).astype(str), 'T', ' ')
+
+
+def addresses(rng, n):
+    numbers = rng.integers(1, 9999, n).astype(str)
+    street = np.take(STREETS, rng.integers(0, len(STREETS), n))
+    city = np.take(CITIES, rng.integers(0, len(CITIES), n))
+    return np.char.add(np.char.add(np.char.add(numbers, ' '), np.char.add(street, ', ')), city)
+
+
+def phones(rng, n):
+    return np.char.add('555-', np.char.zfill(rng.integers(0, 10000, n).astype(str), 4))
+
+
+def people(rng, ids, domain):
+    """(name, email) columns; the id in the email keeps it unique"""
+    first = np.take(FIRST_NAMES, rng.integers(0, len(FIRST_NAMES), len(ids)))
+    last = np.take(LAST_NAMES, rng.integers(0, len(LAST_NAMES), len(ids)))
+    name = np.char.add(np.char.add(first, ' '), last)
+    local = np.char.lower(np.char.add(np.char.add(first, '.'), last))
+    email = np.char.add(np.char.add(np.char.add(local, '.'), ids.astype(str)), domain)
+    return name, email
+
+
+def admin_email(admin_ids):
+    return np.char.add(np.char.add('admin', admin_ids.astype(str)), '@courier.com')
+
+
+def users_chunk(rng, lo, hi):
+    ids = np.arange(lo, hi)
+    name, email = people(rng, ids, '@example.com')
+    # Customers sign up in the first quarter of the span, orders come after
+    created = rng.integers(0, SPAN_DAYS * 86400 // 4, len(ids))
+    return {'Users': [ids, name, email, phones(rng, len(ids)), addresses(rng, len(ids)), timestamps(created)]}
+
+
+def admins_table(rng, count):
+    ids = np.arange(1, count + 1)
+    name = np.char.add('Admin ', np.take(FIRST_NAMES, (ids - 1) % len(FIRST_NAMES)))
+    name = np.where(ids > len(FIRST_NAMES), np.char.add(np.char.add(name, ' '), ids.astype(str)), name)
+    return {'Admins': [ids, name, admin_email(ids), phones(rng, count), np.take(ROLES, (ids - 1) % len(ROLES)),
+                       timestamps(np.zeros(count, dtype=np.int64))]}
+
+
+def couriers_chunk(rng, lo, hi, users, admins):
+    """Couriers [lo, hi) with the history, audit and comment rows of their transitions"""
+    n = hi - lo
+    ids = np.arange(lo, hi)
+    # Skewed customers: a few order a lot, most order rarely
+    customer = np.minimum((rng.pareto(1.2, n) * users / 50).astype(np.int64), users - 1) + 1
+    admin = rng.integers(1, admins + 1, n)
+    created = rng.integers(SPAN_DAYS * 86400 // 4, SPAN_DAYS * 86400, n)
+
+    statuses = np.array(list(FINAL_STATUS))
+    final = rng.choice(len(statuses), n, p=list(FINAL_STATUS.values()))
+    cancelled = final == 3
+    # Number of transitions: Pending 0, In Transit 1, Delivered 2, Cancelled 1 (from Pending) or 2
+    steps = np.choose(final, [0, 1, 2, 1])
+    steps[cancelled & (rng.random(n) < CANCELLED_IN_TRANSIT)] = 2
+
+    t1 = created + rng.exponential(PENDING_HOURS * 3600, n).astype(np.int64) + 60
+    t2 = t1 + rng.exponential(TRANSIT_HOURS * 3600, n).astype(np.int64) + 60
+    updated = np.select([steps == 0, steps == 1], [created, t1], t2)
+
+    # Transition k of each courier: (old, new, time); first hop is always out of Pending
+    first_new = np.where(cancelled & (steps == 1), 'Cancelled', 'In Transit')
+    second_new = np.where(cancelled, 'Cancelled', 'Delivered')
+    has1, has2 = steps >= 1, steps >= 2
+    hist_ids = np.concatenate([ids[has1], ids[has2]])
+    hist_old = np.concatenate([np.full(has1.sum(), 'Pending'), np.full(has2.sum(), 'In Transit')])
+    hist_new = np.concatenate([first_new[has1], second_new[has2]])
+    hist_at = timestamps(np.concatenate([t1[has1], t2[has2]]))
+    order = np.argsort(hist_ids, kind='stable')
+    hist_ids, hist_old, hist_new, hist_at = hist_ids[order], hist_old[order], hist_new[order], hist_at[order]
+    hist_admin = admin_email(rng.integers(1, admins + 1, len(hist_ids)))
+
+    bill = np.char.add('BILL-', np.char.zfill(ids.astype(str), 8))
+    delivered = final == 2
+    thanks = np.char.add(np.char.add('Thank you for using our courier service! Your package (', bill[delivered]),
+                         ') has been successfully delivered. We hope you are satisfied with our service.')
+    asks = rng.random(n) < CUSTOMER_COMMENT_RATE
+    ask_at = created[asks] + rng.integers(60, 86400, asks.sum())
+    comment_ids = np.concatenate([ids[delivered], ids[asks]])
+    comment_user = np.concatenate([customer[delivered], customer[asks]])
+    asked = np.take(CUSTOMER_COMMENTS, rng.integers(0, len(CUSTOMER_COMMENTS), asks.sum()))
+    comment_text = np.concatenate([thanks, asked])
+    comment_at = timestamps(np.concatenate([t2[delivered], ask_at]))
+
+    return {
+        'Couriers': [ids, customer, admin, bill, addresses(rng, n), addresses(rng, n), statuses[final],
+                     timestamps(created), timestamps(updated)],
+        'Delivery_History': [hist_ids, hist_old, hist_new, hist_at, hist_admin],
+        'Courier_Audit': [hist_ids, np.full(len(hist_ids), 'STATUS_UPDATE'), hist_old, hist_new, hist_at,
+                          np.full(len(hist_ids), 'system@courier.com')],
+        'Comments': [comment_ids, comment_user, comment_text, comment_at],
+    }
+
+
+def _sql_literals(table, columns):
+    out = []
+    for name, column in zip(TABLES[table], columns):
+        text = column.astype(str)
+        if name not in NUMERIC:
+            text = np.char.add(np.char.add("'", np.char.replace(text, "'", "''")), "'")
+        out.append(text)
+    return out
+
+
+class ChunkWriter:
+    """Appends generated chunks to one <Table>.part-NNNN.<format> file per table"""
+
+    def __init__(self, directory, part, fmt):
+        self.directory = directory
+        self.part = part
+        self.fmt = fmt
+        self.files = {}
+        self.rows = {}
+
+    def _file(self, table):
+        if table not in self.files:
+            path = os.path.join(self.directory, f'{table}.part-{self.part:04d}.{self.fmt}')
+            f = open(path, 'w', newline='')
+            if self.fmt == 'csv':
+                csv.writer(f).writerow(TABLES[table])
+            self.files[table] = f
+            self.rows[table] = 0
+        return self.files[table]
+
+    def write(self, chunk):
+        for table, columns in chunk.items():
+            f = self._file(table)
+            count = len(columns[0])
+            if self.fmt == 'csv':
+                csv.writer(f).writerows(zip(*(column.tolist() for column in columns)))
+            else:
+                rows = list(map(', '.join, zip(*(c.tolist() for c in _sql_literals(table, columns)))))
+                head = 'INSERT INTO %s (%s) VALUES\n' % (table, ', '.join(TABLES[table]))
+                for start in range(0, count, SQL_ROWS):
+                    f.write(head + ',\n'.join('(%s)' % row for row in rows[start:start + SQL_ROWS]) + ';\n')
+            self.rows[table] += count
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def shard_range(total, shards, shard, start=1):
+    return start + total * shard // shards, start + total * (shard + 1) // shards
+
+
+def generate_shard(directory, shard, shards, couriers, users, admins, seed, fmt, chunk_rows=CHUNK_ROWS):
+    """Write one shard's users and couriers (plus their child rows); returns {table: rows}"""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard,)))
+    writer = ChunkWriter(directory, shard, fmt)
+    try:
+        if shard == 0:
+            writer.write(admins_table(rng, admins))
+        lo, hi = shard_range(users, shards, shard)
+        for start in range(lo, hi, chunk_rows):
+            writer.write(users_chunk(rng, start, min(start + chunk_rows, hi)))
+        lo, hi = shard_range(couriers, shards, shard)
+        for start in range(lo, hi, chunk_rows):
+            writer.write(couriers_chunk(rng, start, min(start + chunk_rows, hi), users, admins))
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic courier dataset')
+    parser.add_argument('--couriers', type=int, default=100000, help='Couriers to generate (default: 100000)')
+    parser.add_argument('--users', type=int, help='Customers (default: couriers / 10)')
+    parser.add_argument('--admins', type=int, help='Admins (default: couriers / 10000, at least 4)')
+    parser.add_argument('--out', default='dataset', help='Output directory (default: %(default)s)')
+    parser.add_argument('--format', choices=['csv', 'sql'], default='csv', help='Chunk file format (default: csv)')
+    parser.add_argument('--shards', type=int, help='Output shards (default: the number of jobs)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Worker processes, 0 = one per CPU (default: 1)')
+    parser.add_argument('--seed', type=int, default=42, help='Base random seed (default: %(default)s)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help='Rows generated per vectorized chunk (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    shards = args.shards or jobs
+    users = args.users or max(1, args.couriers // 10)
+    admins = args.admins or max(4, args.couriers // 10000)
+    if min(args.couriers, users, admins, shards, args.chunk_rows) < 1:
+        print("❌ --couriers, --users, --admins, --shards and --chunk-rows must be positive", file=sys.stderr)
+        return 2
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    options = (args.couriers, users, admins, args.seed, args.format, args.chunk_rows)
+    totals = {}
+    if jobs == 1:
+        results = [generate_shard(args.out, shard, shards, *options) for shard in range(shards)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(generate_shard, args.out, shard, shards, *options) for shard in range(shards)]
+            results = [future.result() for future in futures]
+    for rows in results:
+        for table, count in rows.items():
+            totals[table] = totals.get(table, 0) + count
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Generated {shards} shard(s) into {args.out}/ in {elapsed:.1f}s")
+    for table in TABLES:
+        print(f"   {table:<17} {totals.get(table, 0):>12,} rows")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,75 +1,197 @@
 #!/usr/bin/env python3
 """
 Generate placeholder screenshot images with text descriptions
+
+    python generate_placeholder_screenshots.py -j 4
+    python generate_placeholder_screenshots.py --format png-palette
+    python generate_placeholder_screenshots.py --compare-formats
+    python generate_placeholder_screenshots.py --force -j 2 --profile render.trace.json
+
+--format picks the output encoding (see OUTPUT_FORMATS). The placeholders
+only ever contain the background, the text color and the grey label, so
+png-palette maps every pixel to a fixed 16-color palette of blends between
+those colors. That is lossy: anti-aliased edge pixels (300+ distinct
+colors per image) snap to the nearest blend, up to 16 off per channel.
+webp is lossless WebP of the render itself, exact and about a third the
+size of png.
+--compare-formats encodes every screenshot in every format and prints the
+size and encode time of each, without writing any files. --profile breaks
+the time down into font loading, drawing, encoding and writing (see
+profiling.py).
 """
 
-from PIL import Image, ImageDraw, ImageFont
+import argparse
+import hashlib
+import io
+import json
 import os
+import time
+from functools import partial
 
-# Create directories
-os.makedirs('screenshots/crud_operations', exist_ok=True)
-os.makedirs('screenshots/frontend_features', exist_ok=True)
+import profiling
+import text_layout
+from lazy_imports import lazy_module
 
-def create_placeholder(filename, title, description, bg_color, text_color):
-    """Create a placeholder image with text"""
-    # Image dimensions
-    width, height = 1200, 700
-    
-    # Create image
-    img = Image.new('RGB', (width, height), bg_color)
+Image = lazy_module('PIL.Image')
+ImageChops = lazy_module('PIL.ImageChops')
+ImageColor = lazy_module('PIL.ImageColor')
+ImageDraw = lazy_module('PIL.ImageDraw')
+ImageFont = lazy_module('PIL.ImageFont')
+
+WIDTH, HEIGHT = 1200, 700
+FONT_PATH = '/System/Library/Fonts/Helvetica.ttc'
+FONT_SIZES = {'title': 48, 'desc': 24, 'label': 18}
+
+# Bump whenever create_placeholder's drawing changes so cached renders are redone
+GENERATOR_VERSION = 1
+CACHE_MANIFEST = 'screenshots/.render-cache.json'
+
+# --format name -> (file extension, description)
+OUTPUT_FORMATS = {
+    'png': ('.png', 'Pillow default PNG (zlib level 6)'),
+    'png-optimized': ('.png', 'RGB PNG at zlib level 9 with optimize'),
+    'png-palette': ('.png', '4-bit palette PNG of background/text/label blends (lossy edges)'),
+    'webp': ('.webp', 'lossless WebP (exact)'),
+}
+# Anti-aliasing steps between the background and the text / label colors
+TEXT_BLENDS = 10
+LABEL_BLENDS = 5
+
+# Fonts are loaded once per process (the main process or each pool worker)
+_fonts = None
+# The --profile profiler of this process (a worker's own one inside the pool)
+_profiler = profiling.NULL
+
+
+def load_fonts():
+    """Load the title, description and label fonts, falling back to the default font"""
+    global _fonts
+    if _fonts is None:
+        with _profiler.span('fonts', 'image'):
+            try:
+                _fonts = {name: ImageFont.truetype(FONT_PATH, size) for name, size in FONT_SIZES.items()}
+            except OSError:
+                default = ImageFont.load_default()
+                _fonts = {name: default for name in FONT_SIZES}
+    return _fonts
+
+
+def _init_worker(profile=False):
+    """Pool initializer: start a worker-side profiler when --profile is on, then load the fonts"""
+    global _profiler
+    if profile:
+        _profiler = profiling.Profiler().start()
+    load_fonts()
+
+
+LABEL = "[ Placeholder Screenshot - Replace with Actual Screenshot ]"
+LABEL_COLOR = '#888888'
+
+# Background + footer layers, keyed by (size, bg_color, text_color)
+_bases = {}
+
+
+def base_layer(size, bg_color, text_color):
+    """The static part of a placeholder (background and footer label), rendered once per key"""
+    key = (size, bg_color, text_color)
+    base = _bases.get(key)
+    if base is None:
+        width, height = size
+        label_font = load_fonts()['label']
+        base = Image.new('RGB', size, bg_color)
+        draw = ImageDraw.Draw(base)
+        label_x = (width - text_layout.metrics(label_font).text_width(LABEL)) // 2
+        draw.text((label_x, height - 60), LABEL, fill=LABEL_COLOR, font=label_font)
+        _bases[key] = base
+    return base
+
+
+def render_placeholder(title, description, bg_color, text_color, size=(WIDTH, HEIGHT)):
+    """Return a placeholder as a PIL image: a copy of the cached base with the title and description drawn on"""
+    width, _ = size
+    fonts = load_fonts()
+    title_font, desc_font = fonts['title'], fonts['desc']
+
+    img = base_layer(size, bg_color, text_color).copy()
     draw = ImageDraw.Draw(img)
-    
-    # Try to use a nice font, fallback to default
-    try:
-        title_font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', 48)
-        desc_font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', 24)
-        label_font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', 18)
-    except:
-        title_font = ImageFont.load_default()
-        desc_font = ImageFont.load_default()
-        label_font = ImageFont.load_default()
-    
+
     # Draw title
-    title_bbox = draw.textbbox((0, 0), title, font=title_font)
-    title_width = title_bbox[2] - title_bbox[0]
-    title_x = (width - title_width) // 2
+    title_x = (width - text_layout.metrics(title_font).text_width(title)) // 2
     draw.text((title_x, 100), title, fill=text_color, font=title_font)
-    
+
     # Draw description (word wrap)
-    words = description.split()
-    lines = []
-    current_line = []
-    
-    for word in words:
-        current_line.append(word)
-        line_text = ' '.join(current_line)
-        bbox = draw.textbbox((0, 0), line_text, font=desc_font)
-        if bbox[2] - bbox[0] > width - 200:
-            current_line.pop()
-            lines.append(' '.join(current_line))
-            current_line = [word]
-    
-    if current_line:
-        lines.append(' '.join(current_line))
-    
+    desc_layout = text_layout.metrics(desc_font)
     y = 250
-    for line in lines:
-        bbox = draw.textbbox((0, 0), line, font=desc_font)
-        line_width = bbox[2] - bbox[0]
-        x = (width - line_width) // 2
+    for line in desc_layout.wrap(description, width - 200):
+        x = (width - desc_layout.text_width(line)) // 2
         draw.text((x, y), line, fill=text_color, font=desc_font)
         y += 40
-    
-    # Draw "Placeholder Screenshot" label at bottom
-    label = "[ Placeholder Screenshot - Replace with Actual Screenshot ]"
-    label_bbox = draw.textbbox((0, 0), label, font=label_font)
-    label_width = label_bbox[2] - label_bbox[0]
-    label_x = (width - label_width) // 2
-    draw.text((label_x, height - 60), label, fill='#888888', font=label_font)
-    
-    # Save image
-    img.save(filename)
-    print(f"✓ Created {filename}")
+    return img
+
+
+# Palette images, keyed by (bg_color, text_color)
+_palettes = {}
+
+
+def blend_palette(bg_color, text_color):
+    """A 'P' image whose palette is the background plus blends toward the text and label colors"""
+    key = (bg_color, text_color)
+    palette = _palettes.get(key)
+    if palette is None:
+        bg = ImageColor.getrgb(bg_color)
+        colors = [bg]
+        for target, steps in ((ImageColor.getrgb(text_color), TEXT_BLENDS),
+                              (ImageColor.getrgb(LABEL_COLOR), LABEL_BLENDS)):
+            for step in range(1, steps + 1):
+                colors.append(tuple(round(b + (t - b) * step / steps) for b, t in zip(bg, target)))
+        flat = [channel for color in colors for channel in color]
+        palette = Image.new('P', (1, 1))
+        palette.putpalette(flat + flat[-3:] * (256 - len(colors)))
+        _palettes[key] = palette
+    return palette
+
+
+def encode(img, fmt, bg_color, text_color):
+    """Encode a rendered placeholder in one of OUTPUT_FORMATS and return the bytes"""
+    buffer = io.BytesIO()
+    if fmt == 'png':
+        img.save(buffer, format='PNG')
+    elif fmt == 'png-optimized':
+        img.save(buffer, format='PNG', compress_level=9, optimize=True)
+    elif fmt == 'png-palette':
+        # No dithering: every pixel snaps to its nearest blend, so edges stay as crisp as the RGB render
+        quantized = img.quantize(palette=blend_palette(bg_color, text_color), dither=Image.Dither.NONE)
+        quantized.save(buffer, format='PNG', bits=4, optimize=True)
+    elif fmt == 'webp':
+        img.save(buffer, format='WEBP', lossless=True, quality=100, method=4)
+    else:
+        raise ValueError(f'unknown output format {fmt!r}')
+    return buffer.getvalue()
+
+
+def output_path(filename, fmt='png'):
+    """The file a screenshot is written to in fmt (its extension follows the format)"""
+    return os.path.splitext(filename)[0] + OUTPUT_FORMATS[fmt][0]
+
+
+def placeholder_bytes(title, description, bg_color, text_color, size=(WIDTH, HEIGHT), format='png'):
+    """Render a placeholder and return the encoded image bytes, without touching the disk"""
+    img = render_placeholder(title, description, bg_color, text_color, size)
+    return encode(img, format, bg_color, text_color)
+
+
+def create_placeholder(filename, title, description, bg_color, text_color, fmt='png'):
+    """Create a placeholder image with text and return the render time in seconds"""
+    start = time.perf_counter()
+    with _profiler.span('render', 'image'):
+        img = render_placeholder(title, description, bg_color, text_color)
+    with _profiler.span('encode', 'image', format=fmt):
+        data = encode(img, fmt, bg_color, text_color)
+    with _profiler.span('write', 'io'):
+        with open(output_path(filename, fmt), 'wb') as f:
+            f.write(data)
+    return time.perf_counter() - start
+
 
 # CRUD Operations Screenshots
 screenshots_crud = [
@@ -187,15 +309,209 @@ screenshots_frontend = [
      "#F3E5F5", "#6A1B9A"),  # Light purple background, dark purple text
 ]
 
-# Generate all screenshots
-print("\n🎨 Generating CRUD Operations Screenshots...")
-for screenshot in screenshots_crud:
-    create_placeholder(*screenshot)
+SCREENSHOTS = screenshots_crud + screenshots_frontend
+
+
+def _render(screenshot, fmt='png'):
+    seconds = create_placeholder(*screenshot, fmt=fmt)
+    # Profile events travel back with the result (a no-op list when not profiling)
+    return output_path(screenshot[0], fmt), seconds, _profiler.drain()
+
+
+def _map(func, screenshots, jobs):
+    """Yield func(screenshot) for each screenshot, across a process pool when jobs > 1"""
+    if jobs <= 1:
+        yield from map(func, screenshots)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(screenshots) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(_profiler.enabled,)) as pool:
+        yield from pool.map(func, screenshots, chunksize=chunksize)
+
+
+def generate(screenshots, jobs=1, fmt='png'):
+    """Render screenshots, across a process pool when jobs > 1; returns [(filename, seconds)]"""
+    results = []
+    for filename, seconds, events in _map(partial(_render, fmt=fmt), screenshots, jobs):
+        _profiler.merge(events)
+        results.append((filename, seconds))
+        print(f"✓ Created {filename}")
+    return results
+
+
+def _encode_all(screenshot):
+    """Render one screenshot and encode it in every format: {fmt: (bytes, seconds, max channel error)}"""
+    _, title, description, bg_color, text_color = screenshot
+    img = render_placeholder(title, description, bg_color, text_color)
+    results = {}
+    for fmt in OUTPUT_FORMATS:
+        start = time.perf_counter()
+        data = encode(img, fmt, bg_color, text_color)
+        seconds = time.perf_counter() - start
+        decoded = Image.open(io.BytesIO(data)).convert('RGB')
+        error = max(high for _, high in ImageChops.difference(img, decoded).getextrema())
+        results[fmt] = (len(data), seconds, error)
+    return results
+
+
+def compare_formats(screenshots, jobs=1):
+    """Encode every screenshot in every output format; returns {fmt: [total bytes, seconds, max error]}"""
+    totals = {fmt: [0, 0.0, 0] for fmt in OUTPUT_FORMATS}
+    for results in _map(_encode_all, screenshots, jobs):
+        for fmt, (size, seconds, error) in results.items():
+            total = totals[fmt]
+            total[0] += size
+            total[1] += seconds
+            total[2] = max(total[2], error)
+    return totals
+
+
+def print_format_report(totals, count):
+    """Print total size, size ratio against png, encode time and worst pixel error per format"""
+    baseline = totals['png'][0] or 1
+    print(f"\n📦 Output formats ({count} images):")
+    print(f"  {'format':<14} {'total':>10} {'per image':>10} {'vs png':>7} {'encode':>9} {'max err':>8}")
+    for fmt, (size, seconds, error) in totals.items():
+        print(f"  {fmt:<14} {size / 1024:>8.1f} K {size / max(count, 1) / 1024:>8.1f} K "
+              f"{baseline / max(size, 1):>6.2f}x {seconds:>8.2f}s {error:>8}")
+    print("\n  max err: largest per-channel difference from the RGB render (0-255)")
+
+
+def print_timings(results, wall):
+    """Print per-image render times and a batch summary"""
+    print("\n⏱  Render times:")
+    for filename, seconds in results:
+        print(f"  {seconds * 1000:8.1f} ms  {filename}")
+    total = sum(seconds for _, seconds in results)
+    slowest = max(results, key=lambda r: r[1]) if results else ('-', 0.0)
+    print(f"\n  {len(results)} images | render {total:.2f}s | wall {wall:.2f}s | "
+          f"mean {total / max(len(results), 1) * 1000:.1f} ms | slowest {slowest[0]}")
+
+
+def render_key(screenshot, fmt='png'):
+    """Hash every input that affects the rendered pixels (and encoding) of a screenshot"""
+    filename, title, description, bg_color, text_color = screenshot
+    font = FONT_PATH if os.path.exists(FONT_PATH) else 'default'
+    inputs = {
+        'title': title,
+        'description': description,
+        'colors': [bg_color, text_color],
+        'size': [WIDTH, HEIGHT],
+        'font': [font, FONT_SIZES],
+        'version': GENERATOR_VERSION,
+    }
+    if fmt == 'png-palette':
+        inputs['format'] = [fmt, TEXT_BLENDS, LABEL_BLENDS]
+    elif fmt != 'png':
+        # Keys of default-format renders are unchanged, so existing caches stay valid
+        inputs['format'] = [fmt, 'rgb']
+    payload = json.dumps(inputs, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(path=CACHE_MANIFEST):
+    """Return {filename: render key} from the cache manifest, or {} if there is none"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('renders', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(renders, path=CACHE_MANIFEST):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'generator_version': GENERATOR_VERSION, 'renders': renders}, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def plan_renders(screenshots, renders, force=False, fmt='png'):
+    """Split screenshots into (to_render, unchanged) using the cached render keys"""
+    to_render, unchanged = [], []
+    for screenshot in screenshots:
+        filename = output_path(screenshot[0], fmt)
+        if not force and renders.get(filename) == render_key(screenshot, fmt) and os.path.exists(filename):
+            unchanged.append(screenshot)
+        else:
+            to_render.append(screenshot)
+    return to_render, unchanged
+
+
+def stale_renders(screenshots, renders):
+    """
+    Cached renders, in any format, whose screenshot definition no longer
+    exists (a .webp of a defined screenshot is not stale after a png run)
+    """
+    defined = {os.path.splitext(screenshot[0])[0] for screenshot in screenshots}
+    return sorted(filename for filename in renders if os.path.splitext(filename)[0] not in defined)
+
+
+def main(argv=None):
+    global _profiler
+    parser = argparse.ArgumentParser(description='Generate placeholder screenshot images')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes to render with (0 = one per CPU, default: 1)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-render every screenshot, ignoring the render cache')
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete cached renders whose screenshot definition was removed')
+    parser.add_argument('--format', dest='fmt', choices=list(OUTPUT_FORMATS), default='png',
+                        help='Output encoding (default: %(default)s; webp files get a .webp extension)')
+    parser.add_argument('--compare-formats', action='store_true',
+                        help='Encode every screenshot in every format and report sizes, writing nothing')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    jobs = args.jobs or os.cpu_count() or 1
+    _profiler = profiling.from_args(args)
+
+    if args.compare_formats:
+        start = time.perf_counter()
+        totals = compare_formats(SCREENSHOTS, jobs)
+        print_format_report(totals, len(SCREENSHOTS))
+        print(f"\n✅ Compared {len(OUTPUT_FORMATS)} formats in {time.perf_counter() - start:.2f}s ({jobs} worker(s))")
+        _profiler.finish()
+        return
+
+    # Create directories
+    os.makedirs('screenshots/crud_operations', exist_ok=True)
+    os.makedirs('screenshots/frontend_features', exist_ok=True)
+
+    renders = load_manifest()
+    to_render, unchanged = plan_renders(SCREENSHOTS, renders, args.force, args.fmt)
+
+    # One pool for both sets so workers stay busy across the whole batch
+    print(f"\n🎨 Generating CRUD Operations and Frontend Features Screenshots ({jobs} worker(s))...")
+    start = time.perf_counter()
+    results = generate(to_render, jobs, args.fmt)
+    wall = time.perf_counter() - start
+
+    for screenshot in to_render:
+        renders[output_path(screenshot[0], args.fmt)] = render_key(screenshot, args.fmt)
+
+    stale = stale_renders(SCREENSHOTS, renders)
+    if stale:
+        print(f"\n🗑  {len(stale)} cached render(s) no longer defined:")
+        for filename in stale:
+            print(f"  {filename}")
+            if args.prune:
+                if os.path.exists(filename):
+                    os.remove(filename)
+                del renders[filename]
+        if not args.prune:
+            print("  (run with --prune to delete them)")
+
+    with _profiler.span('manifest', 'io'):
+        save_manifest(renders)
+
+    if results:
+        print_timings(results, wall)
+    print(f"\n✅ {len(results)} rendered, {len(unchanged)} unchanged (cached) of {len(SCREENSHOTS)} placeholder screenshots")
+    print("\n📁 Location: screenshots/crud_operations/ and screenshots/frontend_features/")
+    print("\n🔧 Next step: Run ./add_screenshots.sh to update your report")
+    _profiler.finish()
 
-print("\n🎨 Generating Frontend Features Screenshots...")
-for screenshot in screenshots_frontend:
-    create_placeholder(*screenshot)
 
-print("\n✅ All 22 placeholder screenshots generated!")
-print("\n📁 Location: screenshots/crud_operations/ and screenshots/frontend_features/")
-print("\n🔧 Next step: Run ./add_screenshots.sh to update your report")
+if __name__ == '__main__':
+    main()
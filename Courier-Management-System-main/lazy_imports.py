@@ -0,0 +1,38 @@
+"""
+Deferred imports for the command-line tools
+
+NumPy, PIL and asyncio take longer to import than --help takes to print,
+and most invocations only need them on some paths. Modules bind them with
+lazy_module() instead:
+
+    np = lazy_module('numpy')
+    Image = lazy_module('PIL.Image')
+
+The name is bound at import time (so functions use np.* as usual) and the
+module is loaded on the first attribute access. A missing package still
+raises ImportError at import time, not halfway through a command.
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_module(name):
+    """name, loaded on first attribute access (or already loaded, if something imported it)"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _, child = name.rpartition('.')
+    if parent:
+        # As the import system does, so PIL.Image works after import PIL
+        setattr(sys.modules[parent], child, module)
+    return module
+
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Asyncio load generator for the courier REST API
+
+Replays a weighted mix of routes at a target request rate and reports
+p50/p95/p99 latency, throughput and error rate per route as JSON:
+
+    add            POST /api/couriers/add               (CALL AddCourierOrder)
+    update-status  PUT  /api/couriers/update-status/:id (CALL UpdateCourierStatus + triggers)
+    track          GET  /api/couriers/track
+    join           GET  /api/reports/join
+
+    python load_test.py --url http://localhost:5000 --rps 100 --duration 30
+    python load_test.py --local --rps 200 --mix track=6,join=2,add=1,update-status=1
+    python load_test.py --local --db sqlite:///load.db -o results.json
+
+--local starts api_standin.py in-process (SQLite fixture by default), so no
+Node server or MySQL is needed. Requests are sent open-loop on a fixed
+schedule and latency is measured from each request's scheduled time, so a
+saturated server shows up as growing latency rather than a lower send rate.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+from courier_db import DatabaseError
+from lazy_imports import lazy_module
+
+asyncio = lazy_module('asyncio')
+
+ROUTES = ['add', 'update-status', 'track', 'join']
+DEFAULT_MIX = 'track=4,join=2,add=1,update-status=1'
+STATUS_CYCLE = ['In Transit', 'Delivered', 'Pending']
+
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection speaking JSON"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n")
+        try:
+            self.writer.write(head.encode('latin-1') + payload)
+            await self.writer.drain()
+            return await self._read_response()
+        except BaseException:
+            # Includes the CancelledError of a wait_for() timeout: the response may
+            # be half read, so the next request must not reuse this socket
+            self.close()
+            raise
+
+    async def _read_response(self):
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ', 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            raw = b''.join(chunks)
+        else:
+            raw = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, raw
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Client:
+    """A bounded pool of keep-alive connections to one server"""
+
+    def __init__(self, url, connections):
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 80
+        self._idle = asyncio.LifoQueue()
+        for _ in range(connections):
+            self._idle.put_nowait(HttpConnection(self.host, self.port))
+
+    async def request(self, method, path, body=None):
+        # A connection whose exchange failed or was cancelled comes back closed
+        # and reconnects on its next request
+        conn = await self._idle.get()
+        try:
+            return await conn.request(method, path, body)
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def get_json(self, path):
+        status, raw = await self.request('GET', path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        return json.loads(raw)
+
+    async def close(self):
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            writer = conn.writer
+            conn.close()
+            if writer is not None:
+                await writer.wait_closed()
+
+
+class Workload:
+    """Builds requests for each route from the ids and bill numbers in the database"""
+
+    def __init__(self, users, admins, couriers, seed=0):
+        self.random = random.Random(seed)
+        self.customer_ids = [u['user_id'] for u in users]
+        self.admin_ids = [a['admin_id'] for a in admins]
+        self.admin_emails = [a['email'] for a in admins]
+        self.courier_ids = [c['courier_id'] for c in couriers]
+        self.tracked = [(c['bill_number'], c['customer_name']) for c in couriers if c.get('customer_name')]
+        self.run_id = '%x' % int(time.time())
+        self.serial = itertools.count(1)
+
+    def request(self, route):
+        """(method, path, body) for one request on route"""
+        pick = self.random.choice
+        if route == 'add':
+            n = next(self.serial)
+            return 'POST', '/api/couriers/add', {
+                'customer_id': pick(self.customer_ids), 'admin_id': pick(self.admin_ids),
+                'bill_number': f'LOAD-{self.run_id}-{n}',
+                'pickup_address': f'{n} Load Test Ave', 'delivery_address': f'{n} Benchmark Blvd',
+            }
+        if route == 'update-status':
+            return 'PUT', '/api/couriers/update-status/%d' % pick(self.courier_ids), {
+                'new_status': pick(STATUS_CYCLE), 'changed_by_admin_email': pick(self.admin_emails),
+            }
+        if route == 'track':
+            bill_number, name = pick(self.tracked)
+            return 'GET', '/api/couriers/track?' + urlencode({'billNumber': bill_number, 'name': name}), None
+        return 'GET', '/api/reports/join', None
+
+    def learn(self, route, status, raw):
+        # New couriers become update/track targets, like a real client's follow-up requests
+        if route == 'add' and status == 201:
+            data = json.loads(raw).get('data') or {}
+            if data.get('courier_id'):
+                self.courier_ids.append(data['courier_id'])
+                if data.get('customer_name'):
+                    self.tracked.append((data['bill_number'], data['customer_name']))
+
+
+def parse_mix(value):
+    """'track=4,join=2' -> {'track': 4.0, 'join': 2.0}"""
+    mix = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        route, _, weight = part.partition('=')
+        route = route.strip()
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route {route!r} (choose from {', '.join(ROUTES)})")
+        try:
+            mix[route] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight for {route}: {weight!r}")
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError('the mix needs at least one route with a positive weight')
+    return mix
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples, elapsed):
+    """{route: stats} from [(route, status or None, latency seconds)]"""
+    by_route = {}
+    for route, status, latency in samples:
+        by_route.setdefault(route, []).append((status, latency))
+    by_route['all'] = [(status, latency) for _, status, latency in samples]
+
+    report = {}
+    for route, results in by_route.items():
+        latencies = sorted(latency * 1000 for _, latency in results)
+        errors = sum(1 for status, _ in results if status is None or status >= 400)
+        codes = {}
+        for status, _ in results:
+            key = str(status) if status is not None else 'connection-error'
+            codes[key] = codes.get(key, 0) + 1
+        report[route] = {
+            'requests': len(results),
+            'errors': errors,
+            'error_rate': errors / len(results) if results else 0.0,
+            'throughput_rps': len(results) / elapsed if elapsed else 0.0,
+            'latency_ms': {
+                'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99), 'max': latencies[-1] if latencies else None,
+                'mean': sum(latencies) / len(latencies) if latencies else None,
+            },
+            'status_codes': codes,
+        }
+    return report
+
+
+async def run_load(url, mix, rps, duration, connections, seed=0, timeout=30.0):
+    """Send rps * duration requests on an open-loop schedule and return the JSON report"""
+    client = Client(url, connections)
+    try:
+        workload = Workload((await client.get_json('/api/couriers/data/users'))['data'],
+                            (await client.get_json('/api/couriers/data/admins'))['data'],
+                            (await client.get_json('/api/couriers'))['data'], seed)
+        routes, weights = list(mix), list(mix.values())
+        chooser = random.Random(seed + 1)
+        samples = []
+
+        async def fire(route, scheduled):
+            method, path, body = workload.request(route)
+            try:
+                status, raw = await asyncio.wait_for(client.request(method, path, body), timeout)
+                workload.learn(route, status, raw)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                status = None
+            samples.append((route, status, time.perf_counter() - scheduled))
+
+        total = int(rps * duration)
+        tasks = []
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(chooser.choices(routes, weights)[0], scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.close()
+
+    return {
+        'url': url, 'target_rps': rps, 'duration_s': duration, 'connections': connections,
+        'mix': mix, 'elapsed_s': elapsed, 'routes': summarize(samples, elapsed),
+    }
+
+
+async def run_local(db_dsn, **options):
+    """Run the load against an in-process api_standin server"""
+    from api_standin import start_server
+    from courier_db import Database
+
+    db = Database(db_dsn)
+    server, executor = await start_server(db, '127.0.0.1', 0)
+    try:
+        host, port = server.sockets[0].getsockname()[:2]
+        report = await run_load(f'http://{host}:{port}', **options)
+        report['server'] = f'api_standin ({db_dsn})'
+        return report
+    finally:
+        server.close()
+        await server.wait_closed()
+        executor.shutdown()
+        db.close()
+
+
+def print_report(report):
+    print(f"\n📊 {report['url']}: {report['target_rps']:g} rps target for {report['duration_s']:g}s, "
+          f"{report['connections']} connections", file=sys.stderr)
+    print(f"   {'route':<14} {'reqs':>6} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)",
+          file=sys.stderr)
+    for route, stats in report['routes'].items():
+        lat = stats['latency_ms']
+        fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8}"
+        print(f"   {route:<14} {stats['requests']:>6} {stats['throughput_rps']:>8.1f} "
+              f"{stats['error_rate'] * 100:>5.1f}% {fmt(lat['p50'])} {fmt(lat['p95'])} {fmt(lat['p99'])}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the courier REST API')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://localhost:5000',
+                        help='API base URL (default: %(default)s, the Node server)')
+    target.add_argument('--local', action='store_true',
+                        help='Start the api_standin.py server in-process instead')
+    parser.add_argument('--db', default='sqlite://',
+                        help='Database for --local (default: %(default)s, see courier_db.py)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help='Route weights (default: %s)' % DEFAULT_MIX)
+    parser.add_argument('--rps', type=float, default=50, help='Target requests per second (default: 50)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load (default: 10)')
+    parser.add_argument('--connections', type=int, default=10,
+                        help='Concurrent keep-alive connections (default: 10, the server pool size)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the request mix')
+    parser.add_argument('-o', '--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    options = dict(mix=args.mix, rps=args.rps, duration=args.duration,
+                   connections=args.connections, seed=args.seed)
+    try:
+        if args.local:
+            report = asyncio.run(run_local(args.db, **options))
+        else:
+            report = asyncio.run(run_load(args.url, **options))
+    except (OSError, RuntimeError, DatabaseError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Opt-in timing, memory and cProfile/Chrome-trace output for the report tools
+
+    python replace_with_text.py --profile
+    python -m report_pipeline build --profile build.trace.json
+    python generate_placeholder_screenshots.py -j 4 --profile render.pstats
+
+--profile prints wall time, CPU time and tracemalloc peak per span (stage,
+read, write, font load, render, encode...) and the isolated regex time of
+every rule. With a FILE it also writes a Chrome trace (.json, open in
+chrome://tracing or Perfetto; pool workers get their own rows) or a cProfile
+dump of the main process (any other name, read with python -m pstats).
+
+Without --profile the tools get NULL, whose span() hands back one shared
+no-op context manager, so the instrumented code pays a method call per
+stage and nothing per match.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+
+# Rules listed per stage in the summary, slowest first
+TOP_RULES = 5
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    """One timed region; tracks the tracemalloc peak reached while it was open"""
+
+    __slots__ = ('profiler', 'name', 'cat', 'args', 'start', 'cpu', 'memory', 'peak')
+
+    def __init__(self, profiler, name, cat, args):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        stack = self.profiler._stack
+        self.memory = self.peak = 0
+        if self.profiler._tracemalloc is not None:
+            tracemalloc = self.profiler._tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.memory = self.peak = current
+        stack.append(self)
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        stack = self.profiler._stack
+        stack.pop()
+        if self.profiler._tracemalloc is not None:
+            self.peak = max(self.peak, self.profiler._tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        self.profiler.events.append({
+            'name': self.name, 'cat': self.cat, 'start': self.start, 'wall': wall, 'cpu': cpu,
+            'peak': self.peak - self.memory, 'pid': os.getpid(), 'args': self.args,
+        })
+        return False
+
+
+class Profiler:
+    """Collects spans as plain dicts so pool workers can send theirs back to the main process"""
+
+    def __init__(self, enabled=True, output=None):
+        self.enabled = enabled
+        self.output = output
+        self.events = []
+        self._stack = []
+        self._tracemalloc = None
+        self._cprofile = None
+
+    def start(self, trace_memory=True):
+        if not self.enabled:
+            return self
+        if trace_memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._tracemalloc = tracemalloc
+        if self.output and not self.output.endswith('.json'):
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        return self
+
+    def span(self, name, cat='stage', **args):
+        """Context manager timing one region (a shared no-op when profiling is off)"""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, cat, args)
+
+    def time_rules(self, stage, engine, content):
+        """
+        Time each rule's own regex over the stage input. The engine scans for
+        all rules at once, so this separate pass is what attributes regex cost
+        (backtracking) to individual rules; it only runs when profiling.
+        """
+        if not self.enabled:
+            return
+        for rule in engine.rules:
+            start = time.perf_counter()
+            matches = sum(1 for _ in rule.regex.finditer(content))
+            wall = time.perf_counter() - start
+            self.events.append({
+                'name': rule.name, 'cat': 'rule', 'start': start, 'wall': wall, 'cpu': wall, 'peak': 0,
+                'pid': os.getpid(), 'args': {'stage': stage, 'matches': matches},
+            })
+
+    def drain(self):
+        """Hand over (and forget) the events recorded so far"""
+        events, self.events = self.events, []
+        return events
+
+    def merge(self, events):
+        if self.enabled:
+            self.events.extend(events)
+
+    def summary(self):
+        """[(cat, name, calls, wall, cpu, peak)] per span name, in first-seen order"""
+        totals = {}
+        for event in self.events:
+            if event['cat'] == 'rule':
+                continue
+            key = (event['cat'], event['name'])
+            total = totals.setdefault(key, [0, 0.0, 0.0, 0])
+            total[0] += 1
+            total[1] += event['wall']
+            total[2] += event['cpu']
+            total[3] = max(total[3], event['peak'])
+        return [key + tuple(total) for key, total in totals.items()]
+
+    def print_report(self):
+        print("\n⏱  Profile (wall/CPU summed over calls; peak = largest tracemalloc growth in one call):")
+        print(f"  {'span':<28} {'calls':>6} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10}")
+        for cat, name, calls, wall, cpu, peak in self.summary():
+            label = name if cat == 'stage' else f'{cat}:{name}'
+            label = label if len(label) <= 28 else label[:25] + '...'
+            print(f"  {label:<28} {calls:>6} {wall * 1000:>10.1f} {cpu * 1000:>10.1f} {peak / 1024:>10.1f}")
+
+        rules = {}
+        for event in self.events:
+            if event['cat'] == 'rule':
+                rules.setdefault(event['args']['stage'], []).append(event)
+        for stage, events in rules.items():
+            total = sum(event['wall'] for event in events)
+            print(f"\n🐢 {stage}: {len(events)} rule(s), {total * 1000:.1f} ms scanned one at a time; slowest:")
+            for event in sorted(events, key=lambda e: -e['wall'])[:TOP_RULES]:
+                name = event['name'] if len(event['name']) <= 60 else event['name'][:57] + '...'
+                print(f"  {event['wall'] * 1000:8.2f} ms {event['args']['matches']:>4} match(es)  {name}")
+
+    def write_chrome_trace(self, path):
+        """Write the spans as Chrome trace 'complete' events (microseconds)"""
+        origin = min((event['start'] for event in self.events), default=0)
+        trace = []
+        for event in self.events:
+            args = dict(event['args'], cpu_ms=round(event['cpu'] * 1000, 3), peak_kib=round(event['peak'] / 1024, 1))
+            trace.append({
+                'name': event['name'], 'cat': event['cat'], 'ph': 'X', 'pid': event['pid'], 'tid': event['pid'],
+                'ts': round((event['start'] - origin) * 1e6, 1), 'dur': round(event['wall'] * 1e6, 1),
+                'args': args,
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+    def finish(self):
+        """Stop tracing, print the summary and write the --profile FILE, if any"""
+        if not self.enabled:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._tracemalloc is not None:
+            self._tracemalloc.stop()
+            self._tracemalloc = None
+        self.print_report()
+        if self.output:
+            if self._cprofile is not None:
+                self._cprofile.dump_stats(self.output)
+                print(f"\n📄 cProfile stats: {self.output} (python -m pstats {self.output})")
+            else:
+                self.write_chrome_trace(self.output)
+                print(f"\n📄 Chrome trace: {self.output} (chrome://tracing or https://ui.perfetto.dev)")
+
+
+NULL = Profiler(enabled=False)
+
+
+def add_argument(parser):
+    parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                        help='Print per-stage wall/CPU time, memory peaks and per-rule regex time; '
+                             'FILE.json also writes a Chrome trace, any other FILE a cProfile dump')
+
+
+def from_args(args):
+    """A started Profiler when --profile was given, else NULL"""
+    if args.profile is None:
+        return NULL
+    return Profiler(output=args.profile or None).start()
+
+
+def from_argv(argv, description):
+    """Parse just --profile, for scripts that take no other options"""
+    parser = argparse.ArgumentParser(description=description.strip().splitlines()[0])
+    add_argument(parser)
+    return from_args(parser.parse_args(argv))
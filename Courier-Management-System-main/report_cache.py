@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Section fingerprints and per-stage cache for incremental report rebuilds
+
+The report is split on its markdown headings (outside fenced blocks). For
+every stage the cache maps the hash of a section's input text to the
+stage's output for it and the fingerprints of the rules that matched. A
+section is re-run through a stage only when its input changed, one of the
+rules that matched it was edited or removed, or a rule added since the last
+build matches it. Rules must therefore not match across headings.
+"""
+
+import hashlib
+import json
+import os
+
+import profiling
+from rewrite_engine import HEADING, RewriteEngine
+
+CACHE_FILE = '.report-build-cache.json'
+CACHE_VERSION = 1
+
+
+def split_sections(content):
+    """Split markdown into heading-delimited sections; ''.join() restores content"""
+    sections = []
+    start = pos = 0
+    in_fence = False
+    for line in content.splitlines(keepends=True):
+        if line.startswith('```'):
+            in_fence = not in_fence
+        elif not in_fence and pos > start and HEADING.match(line):
+            sections.append(content[start:pos])
+            start = pos
+        pos += len(line)
+    if start < len(content) or not sections:
+        sections.append(content[start:])
+    return sections
+
+
+def section_title(section):
+    first = section.split('\n', 1)[0]
+    return first.strip() if HEADING.match(first) else '(preamble)'
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {'version': CACHE_VERSION, 'stages': {}}
+    if cache.get('version') != CACHE_VERSION:
+        return {'version': CACHE_VERSION, 'stages': {}}
+    return cache
+
+
+def save_cache(path, cache):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def run_incremental(content, stages, cache, profiler=profiling.NULL, before_stage=None):
+    """
+    Run stages section by section, reusing cached stage outputs.
+
+    Returns (content, {stage name: {rule name: count}}, set of dirty section
+    indices). The cache is updated in place to hold only entries used now.
+    """
+    sections = split_sections(content)
+    dirty = set()
+    all_counts = {}
+
+    for stage in stages:
+        if before_stage is not None:
+            before_stage(stage, ''.join(sections))
+        if profiler.enabled:
+            profiler.time_rules(stage.name, stage.engine, ''.join(sections))
+        with profiler.span(stage.name):
+            engine = stage.engine
+            current = {rule.fingerprint for rule in engine.rules}
+            names = {rule.fingerprint: rule.name for rule in engine.rules}
+
+            previous = cache['stages'].get(stage.name, {'rules': [], 'sections': {}})
+            added = [rule for rule in engine.rules if rule.fingerprint not in set(previous['rules'])]
+            probe = RewriteEngine(added) if added else None
+
+            counts = {rule.name: 0 for rule in engine.rules}
+            entries = {}
+            for i, text in enumerate(sections):
+                key = text_hash(text)
+                entry = entries.get(key) or previous['sections'].get(key)
+                if (entry is None
+                        or not set(entry['matched']) <= current
+                        or (probe is not None and probe.search(text))):
+                    out, section_counts = engine.rewrite(text)
+                    matched = {}
+                    for rule in engine.rules:
+                        if section_counts[rule.name]:
+                            matched[rule.fingerprint] = section_counts[rule.name]
+                    entry = {'out': None if out == text else out, 'matched': matched}
+                    dirty.add(i)
+
+                entries[key] = entry
+                for fingerprint, count in entry['matched'].items():
+                    counts[names[fingerprint]] += count
+                if entry['out'] is not None:
+                    sections[i] = entry['out']
+
+        cache['stages'][stage.name] = {'rules': sorted(current), 'sections': entries}
+        all_counts[stage.name] = counts
+
+    return ''.join(sections), all_counts, dirty
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Resident worker that keeps the report tooling warm between commands
+
+    python report_daemon.py start                      # background, logs to .report-daemon.log
+    python report_daemon.py start --db sqlite:///courier.db
+    python report_daemon.py run report_pipeline build
+    python report_daemon.py run report_pipeline build --stages live --db sqlite:///courier.db
+    python report_daemon.py run generate_placeholder_screenshots --force
+    python report_daemon.py status
+    python report_daemon.py stop
+
+A cold command imports NumPy and PIL, loads the fonts, compiles the stage
+rules and connects to (or seeds) the database before doing any work. The
+daemon does all of that once, then runs each command's main() in-process
+with the caller's arguments, working directory and environment,
+streaming stdout, stderr and the exit code back over a Unix socket
+(.report-daemon.sock next to this file, or $REPORT_DAEMON_SOCKET). The
+client side imports nothing heavier than socket and json. Without a
+running daemon, run executes the command in-process instead.
+
+Commands run one at a time. Database pools stay open per DSN (so a
+sqlite:// stand-in keeps what earlier commands wrote), and stages built
+from the database are recompiled for every command. Editing a stage's rule
+module reloads it before the next command, as watch does; editing any
+other tool module re-imports the tooling. The socket is created owner-only,
+since whoever can connect runs commands as the daemon's user.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOCKET = os.environ.get('REPORT_DAEMON_SOCKET') or os.path.join(HERE, '.report-daemon.sock')
+LOG = os.path.join(HERE, '.report-daemon.log')
+STARTUP_TIMEOUT = 60
+
+# Tools the daemon runs (module name, as for python -m)
+COMMANDS = [
+    'report_pipeline',
+    'report_render',
+    'generate_placeholder_screenshots',
+    'report_data',
+    'delivery_analytics',
+    'fanout_reports',
+    'export_parquet',
+    'snapshot_store',
+    'rule_registry',
+]
+# Subcommands that never return and would hold the daemon; run them directly
+BLOCKING = {('report_pipeline', 'watch')}
+
+
+class Stop(BaseException):
+    """Raised by SIGTERM; not caught by the commands the daemon runs"""
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(path, message):
+    """Send message to the daemon on path and yield its replies (OSError if none is running)"""
+    with _connect(path) as sock:
+        sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        with sock.makefile('r', encoding='utf-8') as replies:
+            for line in replies:
+                yield json.loads(line)
+
+
+def run_remote(path, argv):
+    """Run argv on the daemon, relaying its output; returns the exit code, or None without a daemon"""
+    message = {'argv': argv, 'cwd': os.getcwd(), 'env': dict(os.environ)}
+    replies = request(path, message)
+    try:
+        reply = next(replies)
+    except OSError:
+        return None
+    while True:
+        if 'out' in reply:
+            sys.stdout.write(reply['out'])
+            sys.stdout.flush()
+        elif 'err' in reply:
+            sys.stderr.write(reply['err'])
+            sys.stderr.flush()
+        elif 'exit' in reply:
+            return reply['exit']
+        reply = next(replies, None)
+        if reply is None:
+            print("❌ The daemon closed the connection before the command finished", file=sys.stderr)
+            return 1
+
+
+def _check_command(argv):
+    if not argv or argv[0] not in COMMANDS:
+        return f"Unknown command {argv[0] if argv else ''!r} (choose from {', '.join(COMMANDS)})"
+    if tuple(argv[:2]) in BLOCKING:
+        return f"'{' '.join(argv[:2])}' runs until interrupted; run it directly (python3 -m {' '.join(argv[:2])})"
+    return None
+
+
+def run_command(argv):
+    """Run a tool's main() with argv[1:] in this process; returns its exit code"""
+    name, args = argv[0], argv[1:]
+    saved_argv = sys.argv
+    # argparse names the program after sys.argv[0]
+    sys.argv = [name + '.py'] + args
+    try:
+        code = importlib.import_module(name).main(args)
+    except SystemExit as e:
+        code = e.code
+    finally:
+        sys.argv = saved_argv
+    if code is None:
+        return 0
+    if not isinstance(code, int):
+        print(code, file=sys.stderr)
+        return 1
+    return code
+
+
+class OutputStream(io.TextIOBase):
+    """A text stream that forwards whole lines to the client as {channel: text} messages"""
+
+    def __init__(self, wfile, channel):
+        self.wfile = wfile
+        self.channel = channel
+        self.pending = ''
+
+    def writable(self):
+        return True
+
+    @property
+    def encoding(self):
+        return 'utf-8'
+
+    def write(self, text):
+        self.pending += text
+        if '\n' in self.pending:
+            cut = self.pending.rindex('\n') + 1
+            self._send(self.pending[:cut])
+            self.pending = self.pending[cut:]
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            self._send(self.pending)
+            self.pending = ''
+
+    def _send(self, text):
+        self.wfile.write(json.dumps({self.channel: text}).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+@contextlib.contextmanager
+def environment(cwd, env):
+    """Run with the client's working directory and environment, restoring the daemon's after"""
+    saved_cwd, saved_env = os.getcwd(), dict(os.environ)
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class Daemon:
+    """The warm state (modules, fonts, compiled stages, database pools) and the commands run against it"""
+
+    def __init__(self, dsn=None):
+        self.dsn = dsn
+        self.started = time.time()
+        self.served = 0
+        self.warm_seconds = 0.0
+        # Module name -> mtime of its source when imported
+        self.stamps = {}
+
+    def project_modules(self):
+        """The tooling modules imported so far; by name, so lazily bound modules are not loaded"""
+        names = (entry[:-3] for entry in os.listdir(HERE) if entry.endswith('.py'))
+        return [name for name in names if name in sys.modules and name != '__main__']
+
+    def _stamp(self):
+        for name in self.project_modules():
+            self.stamps.setdefault(name, _mtime(os.path.join(HERE, name + '.py')))
+
+    def warm_up(self):
+        """Load everything a first command would: modules, fonts, rules, NumPy and the database pool"""
+        start = time.perf_counter()
+        for name in COMMANDS:
+            importlib.import_module(name)
+        # One placeholder drawn in memory loads PIL, the fonts and the encoder
+        screenshots = sys.modules['generate_placeholder_screenshots']
+        screenshots.placeholder_bytes(*screenshots.SCREENSHOTS[0][1:])
+        sys.modules['delivery_analytics'].edges()
+
+        pipeline = sys.modules['report_pipeline']
+        pipeline.compile_stages([stage for stage in pipeline.STAGES if not self._dynamic(stage)])
+
+        import courier_db
+
+        courier_db.keep_pools()
+        if self.dsn:
+            courier_db.Database(self.dsn).close()
+        self._stamp()
+        self.warm_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _dynamic(stage):
+        """Whether the stage's rules are built from the database at run time"""
+        if stage.source is None or stage.rule_file:
+            return False
+        return callable(getattr(sys.modules.get(stage.source), stage.table, None))
+
+    def refresh(self):
+        """Pick up edited tooling before a command; returns the names of the edited modules"""
+        edited = [name for name in self.project_modules() if name in self.stamps and
+                  _mtime(os.path.join(HERE, name + '.py')) != self.stamps[name]]
+        if not edited:
+            return edited
+        pipeline = sys.modules.get('report_pipeline')
+        stages = [stage for stage in pipeline.STAGES if stage.source] if pipeline else []
+        if all(any(stage.source == name for stage in stages) for name in edited):
+            # Rule tables only: reload them in place and recompile their stages
+            for name in edited:
+                importlib.reload(sys.modules[name])
+                self.stamps[name] = _mtime(os.path.join(HERE, name + '.py'))
+            for stage in stages:
+                if stage.source in edited:
+                    stage._engine = None
+            return edited
+        # Other code may be imported by name elsewhere (from x import y), so start over
+        courier_db = sys.modules.get('courier_db')
+        if courier_db is not None:
+            courier_db.close_kept_pools()
+        for name in self.project_modules():
+            del sys.modules[name]
+        self.stamps = {}
+        self.warm_up()
+        return edited
+
+    def execute(self, message, wfile):
+        """Run one client's command with its output streamed to wfile"""
+        argv = message.get('argv') or []
+        error = _check_command(argv)
+        if error:
+            wfile.write(json.dumps({'err': f"❌ {error}\n"}).encode('utf-8') + b'\n')
+            wfile.write(json.dumps({'exit': 2}).encode('utf-8') + b'\n')
+            return
+        stdout, stderr = OutputStream(wfile, 'out'), OutputStream(wfile, 'err')
+        code = 1
+        try:
+            with environment(message.get('cwd') or HERE, message.get('env') or {}), \
+                    contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    edited = self.refresh()
+                    if edited:
+                        print(f"🔁 Reloaded {', '.join(sorted(edited))}", file=sys.stderr)
+                    code = run_command(argv)
+                except Exception:
+                    import traceback
+
+                    traceback.print_exc()
+                finally:
+                    stdout.flush()
+                    stderr.flush()
+        finally:
+            self.served += 1
+            # Modules the command imported for the first time
+            self._stamp()
+            pipeline = sys.modules.get('report_pipeline')
+            for stage in pipeline.STAGES if pipeline else []:
+                if self._dynamic(stage):
+                    # Rebuilt from the database on the next command
+                    stage._engine = None
+        wfile.write(json.dumps({'exit': code}).encode('utf-8') + b'\n')
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started, 1),
+            'served': self.served,
+            'warm_up': round(self.warm_seconds, 3),
+            'modules': len(sys.modules),
+            'pools': sorted(dsn for dsn, _ in getattr(sys.modules.get('courier_db'), '_kept', None) or {}),
+        }
+
+    def serve(self, path):
+        """Accept commands on path until stopped"""
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            listener.bind(path)
+        finally:
+            os.umask(umask)
+        listener.listen(16)
+        print(f"✅ Warm in {self.warm_seconds:.2f}s, listening on {path} (pid {os.getpid()})", flush=True)
+        try:
+            while True:
+                conn, _ = listener.accept()
+                try:
+                    with conn, conn.makefile('rb') as rfile, conn.makefile('wb') as wfile:
+                        line = rfile.readline()
+                        if not line:
+                            # running() checking that the daemon is up
+                            continue
+                        message = json.loads(line)
+                        if message.get('stop'):
+                            wfile.write(json.dumps({'exit': 0}).encode('utf-8') + b'\n')
+                            break
+                        if message.get('status'):
+                            wfile.write(json.dumps({'status': self.status()}).encode('utf-8') + b'\n')
+                            continue
+                        start = time.perf_counter()
+                        self.execute(message, wfile)
+                        print(f"⏱  {' '.join(message.get('argv') or [])} "
+                              f"{(time.perf_counter() - start) * 1000:.0f} ms", flush=True)
+                except (OSError, ValueError) as e:
+                    # The client went away or sent garbage; the daemon carries on
+                    print(f"⚠  {type(e).__name__}: {e}", flush=True)
+        finally:
+            listener.close()
+            os.unlink(path)
+            courier_db = sys.modules.get('courier_db')
+            if courier_db is not None:
+                courier_db.close_kept_pools()
+            print("👋 Stopped", flush=True)
+
+
+def running(path):
+    """Whether a daemon answers on path; removes the socket file of one that died"""
+    try:
+        _connect(path).close()
+        return True
+    except FileNotFoundError:
+        return False
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return False
+
+
+def _stop(signum, frame):
+    raise Stop()
+
+
+def serve(path, dsn=None):
+    if running(path):
+        print(f"❌ A daemon is already listening on {path}", file=sys.stderr)
+        return 1
+    signal.signal(signal.SIGTERM, _stop)
+    daemon = Daemon(dsn)
+    daemon.warm_up()
+    try:
+        daemon.serve(path)
+    except (Stop, KeyboardInterrupt):
+        pass
+    return 0
+
+
+def start(path, dsn=None):
+    """Start serve in the background and wait until it is warm"""
+    import subprocess
+
+    if running(path):
+        print(f"✅ Already running on {path}")
+        return 0
+    argv = [sys.executable, os.path.abspath(__file__), '--socket', path, 'serve']
+    if dsn:
+        argv += ['--db', dsn]
+    with open(LOG, 'a') as log:
+        process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                   cwd=HERE, start_new_session=True)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while not running(path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            print(f"❌ The daemon did not start; see {os.path.relpath(LOG)}", file=sys.stderr)
+            return 1
+        time.sleep(0.05)
+    print(f"✅ Daemon {process.pid} listening on {path}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resident worker for the report tooling')
+    parser.add_argument('--socket', default=SOCKET, help='Unix socket path (default: %(default)s)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('start', 'Start the daemon in the background'),
+                            ('serve', 'Run the daemon in the foreground')):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument('--db', default=os.environ.get('COURIER_DB'),
+                             help='Open (and keep open) this database while warming up (default: $COURIER_DB)')
+    sub.add_parser('stop', help='Stop the daemon')
+    sub.add_parser('status', help='Show what the daemon has served')
+    run_parser = sub.add_parser('run', help='Run a tool on the daemon (in-process if none is running)')
+    run_parser.add_argument('tool', choices=COMMANDS)
+    run_parser.add_argument('args', nargs=argparse.REMAINDER, help='Arguments for the tool')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        return serve(args.socket, args.db)
+    if args.command == 'start':
+        return start(args.socket, args.db)
+
+    if args.command == 'run':
+        argv = [args.tool] + args.args
+        error = _check_command(argv)
+        if error:
+            print(f"❌ {error}", file=sys.stderr)
+            return 2
+        code = run_remote(args.socket, argv)
+        return run_command(argv) if code is None else code
+
+    try:
+        reply = next(request(args.socket, {args.command: True}))
+    except (OSError, StopIteration):
+        print(f"❌ No daemon is listening on {args.socket}", file=sys.stderr)
+        return 1
+    if args.command == 'status':
+        status = reply['status']
+        print(f"📊 Daemon {status['pid']}: up {status['uptime']:.0f}s, {status['served']} command(s) served, "
+              f"warm-up {status['warm_up']:.2f}s, {status['modules']} modules loaded")
+        for dsn in status['pools']:
+            print(f"  pool {dsn}")
+    else:
+        print("✅ Daemon stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
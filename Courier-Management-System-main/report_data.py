@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Live report tables sourced from the database
+
+Runs the JOIN, NESTED and AGGREGATE queries served by server/routes/reports.js
+and renders their rows as the report's box tables, either as the 'live'
+report_pipeline stage or streamed to stdout:
+
+    python report_data.py join --db sqlite://
+    python -m report_pipeline build --stages live --db mysql://root@localhost/courier_management
+"""
+
+import argparse
+import re
+import sys
+
+from box_tables import TableWidthError, iter_table, render_table
+from courier_db import Database, DatabaseError
+
+# Same SQL as server/routes/reports.js
+QUERIES = {
+    'join': """
+        SELECT
+          T1.courier_id,
+          T1.bill_number,
+          T1.status,
+          T1.pickup_address,
+          T1.delivery_address,
+          T1.created_at,
+          T2.name AS customer_name,
+          T2.email AS customer_email,
+          T3.name AS admin_name,
+          T3.email AS admin_email
+        FROM Couriers T1
+        JOIN Users T2 ON T1.customer_id = T2.user_id
+        LEFT JOIN Admins T3 ON T1.managed_by_admin_id = T3.admin_id
+        ORDER BY T1.created_at DESC""",
+
+    'nested': """
+        SELECT
+          user_id,
+          name,
+          email,
+          phone
+        FROM Users
+        WHERE user_id IN (
+          SELECT customer_id
+          FROM Couriers
+          WHERE status = 'Delivered'
+        )
+        ORDER BY name""",
+
+    'aggregate': """
+        SELECT
+          status,
+          COUNT(*) as count,
+          COUNT(DISTINCT customer_id) as unique_customers,
+          MIN(created_at) as earliest_order,
+          MAX(created_at) as latest_order
+        FROM Couriers
+        GROUP BY status
+        ORDER BY count DESC""",
+
+    'admin-performance': """
+        SELECT
+          a.admin_id,
+          a.name AS admin_name,
+          a.email AS admin_email,
+          COUNT(c.courier_id) AS total_couriers_managed,
+          SUM(CASE WHEN c.status = 'Delivered' THEN 1 ELSE 0 END) AS delivered_count,
+          SUM(CASE WHEN c.status = 'In Transit' THEN 1 ELSE 0 END) AS in_transit_count,
+          SUM(CASE WHEN c.status = 'Pending' THEN 1 ELSE 0 END) AS pending_count
+        FROM Admins a
+        LEFT JOIN Couriers c ON a.admin_id = c.managed_by_admin_id
+        GROUP BY a.admin_id, a.name, a.email
+        ORDER BY total_couriers_managed DESC""",
+
+    'customer-activity': """
+        SELECT
+          u.user_id,
+          u.name AS customer_name,
+          u.email,
+          COUNT(c.courier_id) AS total_orders,
+          GROUP_CONCAT(DISTINCT c.status) AS order_statuses
+        FROM Users u
+        LEFT JOIN Couriers c ON u.user_id = c.customer_id
+        GROUP BY u.user_id, u.name, u.email
+        HAVING total_orders > 0
+        ORDER BY total_orders DESC""",
+}
+
+# Report tables: (query, [(header, column), ...])
+TABLES = {
+    'couriers': ('join', [
+        ('ID', 'courier_id'), ('Bill Number', 'bill_number'), ('Status', 'status'),
+        ('Customer Name', 'customer_name'), ('Customer Email', 'customer_email'),
+        ('Admin Name', 'admin_name'),
+    ]),
+    'join': ('join', [
+        ('ID', 'courier_id'), ('Bill', 'bill_number'), ('Status', 'status'),
+        ('Customer Name', 'customer_name'), ('Customer Email', 'customer_email'),
+        ('Admin Name', 'admin_name'), ('Admin Email', 'admin_email'),
+    ]),
+    'nested': ('nested', [
+        ('User ID', 'user_id'), ('Name', 'name'), ('Email', 'email'), ('Phone', 'phone'),
+    ]),
+    'aggregate': ('aggregate', [
+        ('Status', 'status'), ('Total Orders', 'count'), ('Unique Customers', 'unique_customers'),
+        ('Earliest Order', 'earliest_order'), ('Latest Order', 'latest_order'),
+    ]),
+    'admin-performance': ('admin-performance', [
+        ('ID', 'admin_id'), ('Admin Name', 'admin_name'), ('Admin Email', 'admin_email'),
+        ('Managed', 'total_couriers_managed'), ('Delivered', 'delivered_count'),
+        ('In Transit', 'in_transit_count'), ('Pending', 'pending_count'),
+    ]),
+    'customer-activity': ('customer-activity', [
+        ('User ID', 'user_id'), ('Customer Name', 'customer_name'), ('Email', 'email'),
+        ('Orders', 'total_orders'), ('Statuses', 'order_statuses'),
+    ]),
+}
+
+# Box-table block in the report body (╔ line through ╚ line)
+BOX = r'╔[^\n]*\n(?:[║╠╚][^\n]*\n)*'
+
+
+def iter_table_rows(db, table):
+    """Yield the headers, then each row of a report table, streamed from the database"""
+    query, columns = TABLES[table]
+    rows = db.iter_rows(QUERIES[query])
+    names = next(rows)
+    index = [names.index(column) for _, column in columns]
+    yield [header for header, _ in columns]
+    for row in rows:
+        yield [row[i] for i in index]
+
+
+def fetch_table(db, table):
+    rows = iter_table_rows(db, table)
+    headers = next(rows)
+    return headers, list(rows)
+
+
+def _template(text):
+    # Replacement strings are expanded as templates (they use \1)
+    return text.replace('\\', '\\\\')
+
+
+def live_rules(db=None):
+    """Rules replacing the hard-coded result tables with freshly queried ones"""
+    own_db = db is None
+    db = db or Database()
+    try:
+        couriers = render_table(*fetch_table(db, 'couriers'))
+        join_headers, join_rows = fetch_table(db, 'join')
+        nested_headers, nested_rows = fetch_table(db, 'nested')
+        aggregate = render_table(*fetch_table(db, 'aggregate'))
+    finally:
+        if own_db:
+            db.close()
+
+    delivered_ids = ', '.join(str(row[0]) for row in nested_rows)
+    # Matched by its header row inside the fence, not the heading above it,
+    # so the rule also applies when the report is rewritten chunk by chunk
+    couriers_header = '║%s║\n' % '║'.join(r' *%s *' % re.escape(header) for header, _ in TABLES['couriers'][1])
+    return [
+        # Screenshot 3: View All Couriers
+        (r'(```plaintext\n)(?=╔[^\n]*\n' + couriers_header + ')' + BOX,
+         r'\1' + _template(couriers) + '\n'),
+        # Screenshot 17: JOIN Query Results
+        (r'(-- JOIN Query: Combine Couriers \+ Users \+ Admins\n(?:[^\n]*\n)*?)RESULTS \(\d+ rows?\):\n' + BOX,
+         r'\1RESULTS (%d rows):\n' % len(join_rows) + _template(render_table(join_headers, join_rows)) + '\n'),
+        # Screenshot 18: NESTED Query Results
+        (r'(-- NESTED Query: Find customers who have at least one delivered order\n(?:[^\n]*\n)*?)'
+         r'RESULTS \(\d+ rows?\):\n' + BOX + r'\nExplanation: These \d+ customers have successfully delivered orders\n'
+         r'Inner query returned: customer_id IN \([^\n]*\)',
+         r'\1RESULTS (%d rows):\n' % len(nested_rows) + _template(render_table(nested_headers, nested_rows)) +
+         '\n\nExplanation: These %d customers have successfully delivered orders\n' % len(nested_rows) +
+         'Inner query returned: customer_id IN (%s)' % delivered_ids),
+        # Screenshot 19: AGGREGATE Query Results
+        (r'(-- AGGREGATE Query: Statistics grouped by status\n(?:[^\n]*\n)*?)RESULTS:\n' + BOX,
+         r'\1RESULTS:\n' + _template(aggregate) + '\n'),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream a report table from the database')
+    parser.add_argument('table', choices=sorted(TABLES), help='Report table to render')
+    parser.add_argument('--db', help='Database DSN (default: $COURIER_DB or the server MySQL settings)')
+    parser.add_argument('--sample', type=int, default=1000,
+                        help='Rows used to size the columns before streaming; 0 sizes them from every row '
+                             '(default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    try:
+        db = Database(args.db)
+    except DatabaseError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    rows = iter_table_rows(db, args.table)
+    try:
+        headers = next(rows)
+        for line in iter_table(headers, rows, sample=args.sample or None):
+            print(line)
+    except TableWidthError as e:
+        print(f"❌ {e}; re-run with a larger --sample (or --sample 0)", file=sys.stderr)
+        return 1
+    finally:
+        # Finish the cursor before its connection goes
+        rows.close()
+        db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
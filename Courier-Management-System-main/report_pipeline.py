@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Build PROJECT_REPORT.md by chaining the rewrite stages in memory
+
+Usage:
+    python -m report_pipeline build
+    python -m report_pipeline build --stages data1,data2
+    python -m report_pipeline build --dry-run --diff
+    python -m report_pipeline build --stages live --db sqlite://
+    python -m report_pipeline build --stages analytics --db sqlite:///courier.db
+    python -m report_pipeline build --stream --report big.md --output big.out.md
+    python -m report_pipeline build --no-cache --profile build.trace.json
+    python -m report_pipeline build --no-snapshot
+    python -m report_pipeline build --html PROJECT_REPORT.html --images inline
+    python -m report_pipeline render --pdf PROJECT_REPORT.pdf
+    python -m report_pipeline watch --html PROJECT_REPORT.html
+    python -m report_pipeline stages
+    python report_daemon.py run report_pipeline build     # on the resident worker
+"""
+
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import os
+import re
+import sys
+import time
+
+import profiling
+import report_cache
+import report_render
+import rule_registry
+from rewrite_engine import RewriteEngine, iter_chunks, print_counts, rewrite_stream, unexpected_counts
+
+REPORT = 'PROJECT_REPORT.md'
+# os.umask() can only be read by setting it, so read it once, at import,
+# rather than racing other threads each time a new file is written
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+# Screenshot headings and image references inserted by add_screenshots.sh
+SCREENSHOTS = [
+    ('Screenshot 1: Add New Courier Order', 'Add New Courier Form', 'crud_operations/01_create_form.png'),
+    ('Screenshot 2: CREATE Success Response', 'Create Success', 'crud_operations/02_create_success.png'),
+    ('Screenshot 3: View All Couriers', 'View All Couriers', 'crud_operations/03_read_all_couriers.png'),
+    ('Screenshot 4: Get Status Using Function', 'Get Status Function', 'crud_operations/04_get_status_function.png'),
+    ('Screenshot 5: View Single Courier Details', 'Single Courier Details', 'crud_operations/05_read_single_courier.png'),
+    ('Screenshot 6: Update Courier Status Form', 'Update Status Form', 'crud_operations/06_update_form.png'),
+    ('Screenshot 7: UPDATE Success with Trigger Execution', 'Update Success with Trigger', 'crud_operations/07_update_success_trigger.png'),
+    ('Screenshot 8: Audit Trail Verification', 'Audit Trail', 'crud_operations/08_audit_trail.png'),
+    ('Screenshot 9: Delete Courier Confirmation', 'Delete Confirmation', 'crud_operations/09_delete_confirmation.png'),
+    ('Screenshot 10: DELETE Success Response', 'Delete Success', 'crud_operations/10_delete_success.png'),
+    ('Screenshot 11: Cascade Delete Verification', 'Cascade Delete Verification', 'crud_operations/11_cascade_verification.png'),
+    ('Screenshot 12: Application Homepage', 'Application Homepage', 'frontend_features/12_homepage.png'),
+    ('Screenshot 13: Add Courier Form (Procedure 1)', 'Add Courier Form', 'frontend_features/13_add_courier_form.png'),
+    ('Screenshot 14: Update Status Form (Procedure 2)', 'Update Status Form', 'frontend_features/14_update_status_form.png'),
+    ('Screenshot 15: Get Status Using Function', 'Get Status Function', 'frontend_features/15_get_status_function.png'),
+    ('Screenshot 16: Trigger Validation Display', 'Trigger Validation', 'frontend_features/16_trigger_validation.png'),
+    ('Screenshot 17: JOIN Query Results', 'JOIN Query Results', 'frontend_features/17_join_query_results.png'),
+    ('Screenshot 18: NESTED Query Results', 'NESTED Query Results', 'frontend_features/18_nested_query_results.png'),
+    ('Screenshot 19: AGGREGATE Query Results', 'AGGREGATE Query Results', 'frontend_features/19_aggregate_query_results.png'),
+    ('Screenshot 20: Modal Dialog', 'Modal Dialog', 'frontend_features/20_modal_dialog.png'),
+    ('Screenshot 21: Success/Error Notifications', 'Notifications', 'frontend_features/21_notifications.png'),
+    ('Screenshot 22: Responsive Mobile View', 'Mobile View', 'frontend_features/22_mobile_view.png'),
+]
+
+# First "[SPACE FOR SCREENSHOT]" marker after each heading, without crossing
+# into the next heading
+screenshot_refs = [
+    (r'(### %s[^\n]*\n(?:(?!#)[^\n]*\n)*?)\*\*\[SPACE FOR SCREENSHOT\]\*\*' % re.escape(heading),
+     r'\1![%s](screenshots/%s)' % (alt, path))
+    for heading, alt, path in SCREENSHOTS
+]
+
+
+class Stage:
+    """A named replacement table applied to the report as one rewrite pass"""
+
+    def __init__(self, name, source, table, flags=0, description=''):
+        # source is the module holding the table, a rule file (table is then the
+        # name of the stage in it), or None when table is the rules
+        self.name = name
+        self.source = source
+        self.table = table
+        self.flags = flags
+        self.description = description
+        self._engine = None
+        self._stamp = None
+
+    @property
+    def rule_file(self):
+        return self.source is not None and self.source.endswith(rule_registry.RULE_FILE_TYPES)
+
+    @property
+    def path(self):
+        """The file the rules come from, or None"""
+        if self.rule_file:
+            return self.source
+        if self.source is None:
+            return None
+        spec = importlib.util.find_spec(self.source)
+        return os.path.abspath(spec.origin) if spec and spec.origin else None
+
+    @property
+    def rules(self):
+        if self.source is None:
+            return self.table
+        if self.rule_file:
+            return rule_registry.load_stage(self.source, self.table)
+        module = importlib.import_module(self.source)
+        table = getattr(module, self.table)
+        # Tables built at run time (e.g. from the database) are provided as functions
+        return table() if callable(table) else table
+
+    @property
+    def engine(self):
+        # A long-lived process (watch, the daemon) picks up an edited rule file
+        stamp = _file_stamp(self.source) if self.rule_file else None
+        if self._engine is None or stamp != self._stamp:
+            self._engine = RewriteEngine(self.rules, self.flags)
+            self._stamp = stamp
+        return self._engine
+
+    def run(self, content):
+        return self.engine.rewrite(content)
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# Pipeline order; --stages selects a subset but never reorders
+STAGES = [
+    Stage('screenshots', None, screenshot_refs, 0,
+          'Insert screenshot image references (add_screenshots.sh)'),
+    Stage('text', rule_registry.BUILTIN_RULES, 'text', 0,
+          'Image references -> styled text placeholders'),
+    Stage('data1', rule_registry.BUILTIN_RULES, 'data1', 0,
+          'CRUD placeholders -> real data (Screenshots 1-11)'),
+    Stage('data2', rule_registry.BUILTIN_RULES, 'data2', 0,
+          'Frontend placeholders -> real data (Screenshots 12-22)'),
+    Stage('fixes', rule_registry.BUILTIN_RULES, 'fixes', 0,
+          'Fix the last Procedure 1/2 placeholders'),
+    Stage('live', 'report_data', 'live_rules', 0,
+          'Refresh the JOIN/NESTED/AGGREGATE result tables from the database (--db)'),
+    Stage('analytics', 'delivery_analytics', 'analytics_rules', re.DOTALL,
+          'Delivery-time percentiles and admin throughput tables (--db)'),
+]
+
+DEFAULT_STAGES = ['text', 'data1', 'data2', 'fixes']
+
+
+def select_stages(names=None, rule_files=None):
+    """
+    Return the pipeline stages named in names, in pipeline order, followed by
+    the stages of any rule files (a file stage replaces a built-in one of the
+    same name in place).
+    """
+    names = names or DEFAULT_STAGES
+    known = {stage.name for stage in STAGES}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)} "
+                         f"(available: {', '.join(sorted(known))})")
+    stages = [stage for stage in STAGES if stage.name in names]
+    if rule_files:
+        for path in rule_files:
+            for name, description, rules in rule_registry.load_stages(path):
+                stage = Stage(name, None, rules, 0, description)
+                names = [s.name for s in stages]
+                if stage.name in names:
+                    stages[names.index(stage.name)] = stage
+                else:
+                    stages.append(stage)
+    return stages
+
+
+def compile_stages(stages, profiler=profiling.NULL):
+    """Load and compile every stage's rules up front, so stage timings exclude imports and queries"""
+    for stage in stages:
+        with profiler.span('compile:' + stage.name, 'compile'):
+            stage.engine
+
+
+def run_stages(content, stages, verbose=True, profiler=profiling.NULL, before_stage=None):
+    """Run stages over content in memory; returns (content, {stage name: counts})"""
+    all_counts = {}
+    for stage in stages:
+        if before_stage is not None:
+            before_stage(stage, content)
+        start = time.perf_counter()
+        with profiler.span(stage.name):
+            output, counts = stage.run(content)
+        elapsed = (time.perf_counter() - start) * 1000
+        profiler.time_rules(stage.name, stage.engine, content)
+        content = output
+        all_counts[stage.name] = counts
+        if verbose:
+            print(f"\n▶ {stage.name}: {sum(counts.values())} replacement(s) in {elapsed:.1f} ms")
+            print_counts(counts)
+    return content, all_counts
+
+
+def print_unexpected(stages, all_counts):
+    """Summarize rules that matched zero or several times against their expectation"""
+    found = [(stage, rule, count) for stage in stages
+             for rule, count in unexpected_counts(stage.engine.rules, all_counts[stage.name])]
+    if not found:
+        return
+    missed = sum(1 for _, _, count in found if count == 0)
+    print(f"\n⚠  {missed} rule(s) matched nothing, {len(found) - missed} matched more than expected:")
+    for stage, rule, count in found:
+        label = rule.name if len(rule.name) <= 60 else rule.name[:57] + '...'
+        print(f"  {'✗' if count == 0 else '!'} {count:>3}  {stage.name}: {label}")
+
+
+@contextlib.contextmanager
+def atomic_writer(path):
+    """Open a temp file next to path and rename it over path only on success"""
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            yield f
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            # mkstemp creates 0600; give a new file the usual umask-based mode
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_atomic(path, content):
+    """Write content to path via a temp file + rename so readers never see a partial file"""
+    with atomic_writer(path) as f:
+        f.write(content)
+
+
+def build_streaming(report=REPORT, output=None, stage_names=None, verbose=True, rule_files=None,
+                    profiler=profiling.NULL, snapshot=True):
+    """
+    Rewrite the report chunk by chunk, writing each chunk as soon as every
+    stage has run over it; memory is bounded by the largest chunk. Only the
+    input is snapshotted (intermediate versions never exist in full).
+    """
+    stages = select_stages(stage_names, rule_files)
+    output = output or report
+    compile_stages(stages, profiler)
+    if snapshot:
+        with profiler.span('snapshot', 'io'):
+            save_snapshots(output, [('before ' + ', '.join(s.name for s in stages), report)], from_files=True)
+    engines = [stage.engine for stage in stages]
+    counts = [{} for _ in stages]
+
+    start = time.perf_counter()
+    with open(report, 'r') as src, atomic_writer(output) as dst:
+        chunks = rewrite_stream(iter_chunks(src), engines, counts, profiler, [stage.name for stage in stages])
+        for chunk in chunks:
+            with profiler.span('write', 'io'):
+                dst.write(chunk)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if verbose:
+        for stage, stage_counts in zip(stages, counts):
+            print(f"\n▶ {stage.name}: {sum(stage_counts.values())} replacement(s)")
+            print_counts(stage_counts)
+    print_unexpected(stages, {stage.name: stage_counts for stage, stage_counts in zip(stages, counts)})
+    print(f"\n✅ Streamed {output} in {elapsed:.1f} ms ({len(stages)} stage(s): "
+          f"{', '.join(s.name for s in stages)})")
+
+
+def save_snapshots(output, versions, from_files=False):
+    """Save (label, text or path) versions to the snapshot store next to output, skipping repeats"""
+    import snapshot_store
+
+    store = snapshot_store.store_for(output)
+    name = os.path.basename(output)
+    saved = []
+    for label, version in versions:
+        if from_files:
+            entry = store.save_file(version, label, name)
+        else:
+            entry = store.save_text(name, version, label)
+        if entry is not None:
+            saved.append(entry)
+    if saved:
+        print(f"\n📸 {len(saved)} snapshot(s) of {name} ({sum(e['stored'] for e in saved)} bytes stored; "
+              f"python3 snapshot_store.py list)")
+    return saved
+
+
+def build(report=REPORT, output=None, stage_names=None, verbose=True,
+          use_cache=True, dry_run=False, show_diff=False, rule_files=None, profiler=profiling.NULL,
+          snapshot=True, stages=None, warn_unexpected=True, text=None, before_stage=None):
+    """
+    Load the report once (or start from text instead), run the selected
+    stages (or the given Stage objects) and write the result once. Unless
+    snapshot is off, the version before each stage is saved to the snapshot
+    store when the output is written. before_stage(stage, text) sees the
+    input of every stage.
+    """
+    stages = stages or select_stages(stage_names, rule_files)
+    output = output or report
+    compile_stages(stages, profiler)
+
+    if text is None:
+        with profiler.span('read', 'io'):
+            with open(report, 'r') as f:
+                original = f.read()
+    else:
+        original = text
+    # The output file is replaced by something other than what was read from it
+    replaced = output != report or text is not None
+
+    versions = []
+
+    def keep(stage, text):
+        if before_stage is not None:
+            before_stage(stage, text)
+        if snapshot and not dry_run:
+            versions.append(('before ' + stage.name, text))
+
+    if use_cache:
+        cache_path = os.path.join(os.path.dirname(os.path.abspath(output)), report_cache.CACHE_FILE)
+        with profiler.span('load cache', 'io'):
+            cache = report_cache.load_cache(cache_path)
+        start = time.perf_counter()
+        content, counts, dirty = report_cache.run_incremental(original, stages, cache, profiler,
+                                                              before_stage=keep)
+        elapsed = (time.perf_counter() - start) * 1000
+        sections = report_cache.split_sections(original)
+        print(f"\n♻  {len(dirty)} of {len(sections)} section(s) re-run in {elapsed:.1f} ms")
+        if verbose:
+            for stage in stages:
+                print(f"\n▶ {stage.name}: {sum(counts[stage.name].values())} replacement(s)")
+                print_counts(counts[stage.name])
+        if dry_run:
+            for i in sorted(dirty):
+                print(f"  • {report_cache.section_title(sections[i])}")
+    else:
+        content, counts = run_stages(original, stages, verbose, profiler, before_stage=keep)
+    if warn_unexpected:
+        print_unexpected(stages, counts)
+
+    if show_diff:
+        print_diff(output, content)
+
+    if dry_run:
+        print("\n🔍 Dry run: nothing written")
+        return content
+
+    if use_cache:
+        with profiler.span('save cache', 'io'):
+            report_cache.save_cache(cache_path, cache)
+
+    if content == (read_if_exists(output) if replaced else original):
+        print(f"\n✅ {output} already up to date")
+        return content
+
+    if versions:
+        with profiler.span('snapshot', 'io'):
+            # The file being replaced goes first when it is not the input
+            if replaced and os.path.exists(output):
+                versions.insert(0, ('before build', read_if_exists(output)))
+            save_snapshots(output, versions)
+    with profiler.span('write', 'io'):
+        write_atomic(output, content)
+    print(f"\n✅ Wrote {output} ({len(stages)} stage(s): {', '.join(s.name for s in stages)})")
+    return content
+
+
+def read_if_exists(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def print_diff(path, content):
+    """Print a unified diff between the file at path and the new content"""
+    import difflib
+
+    current = read_if_exists(path) or ''
+    diff = difflib.unified_diff(current.splitlines(keepends=True), content.splitlines(keepends=True),
+                                fromfile=path, tofile=path + ' (rebuilt)')
+    sys.stdout.writelines(diff)
+
+
+def parse_stage_list(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='report_pipeline', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help='Run the rewrite stages and write the report')
+    build_parser.add_argument('--report', default=REPORT, help='Report to rewrite (default: %(default)s)')
+    build_parser.add_argument('--output', help='Write here instead of overwriting --report')
+    build_parser.add_argument('--stages', type=parse_stage_list,
+                              help='Comma-separated subset of stages (default: %s)' % ','.join(DEFAULT_STAGES))
+    build_parser.add_argument('--rules', action='append', metavar='FILE',
+                              help='JSON/TOML/YAML rule file whose stages run after the built-in ones '
+                                   '(repeatable, see rule_registry.py)')
+    build_parser.add_argument('--db', help='Database DSN for the live and analytics stages '
+                                           '(sets $COURIER_DB, see courier_db.py)')
+    build_parser.add_argument('-q', '--quiet', action='store_true', help='Do not print per-rule match counts')
+    build_parser.add_argument('--no-cache', action='store_true',
+                              help='Rewrite the whole report instead of only changed sections')
+    build_parser.add_argument('--dry-run', action='store_true',
+                              help='List the sections that would be rebuilt without writing anything')
+    build_parser.add_argument('--diff', action='store_true', help='Print a unified diff of the rebuilt report')
+    build_parser.add_argument('--stream', action='store_true',
+                              help='Rewrite chunk by chunk with bounded memory (no cache, dry run or diff)')
+    build_parser.add_argument('--no-snapshot', action='store_true',
+                              help='Do not save the pre-stage versions to the snapshot store (snapshot_store.py)')
+    build_parser.add_argument('--html', metavar='FILE',
+                              help='Also render the built report to HTML (section-cached, see report_render.py)')
+    build_parser.add_argument('--images', choices=report_render.IMAGE_MODES, default='link',
+                              help='With --html: link images or inline them as data: URIs (default: %(default)s)')
+    profiling.add_argument(build_parser)
+
+    render_parser = commands.add_parser('render', help='Render the report to HTML/PDF without rebuilding it')
+    render_parser.add_argument('--report', default=REPORT, help='Report to render (default: %(default)s)')
+    render_parser.add_argument('-o', '--output', help='HTML file (default: the report name with .html)')
+    render_parser.add_argument('--images', choices=report_render.IMAGE_MODES, default='link',
+                               help='Link images or inline them as data: URIs (default: %(default)s)')
+    render_parser.add_argument('--pdf', metavar='FILE', help='Also write a PDF (needs WeasyPrint)')
+    render_parser.add_argument('--no-cache', action='store_true', help='Render every section again')
+    profiling.add_argument(render_parser)
+
+    watch_parser = commands.add_parser('watch', help='Rebuild the affected stages and images whenever a source changes')
+    watch_parser.add_argument('--report', default=REPORT, help='Report to rewrite (default: %(default)s)')
+    watch_parser.add_argument('--output', help='Write here instead of overwriting --report')
+    watch_parser.add_argument('--stages', type=parse_stage_list,
+                              help='Stages to watch and run (default: %s)' % ','.join(DEFAULT_STAGES))
+    watch_parser.add_argument('--rules', action='append', metavar='FILE',
+                              help='JSON/TOML/YAML rule file to watch and run after the built-in stages (repeatable)')
+    watch_parser.add_argument('--db', help='Database DSN for the live and analytics stages')
+    watch_parser.add_argument('--html', metavar='FILE', help='Also re-render this HTML page after each cycle')
+    watch_parser.add_argument('--images', choices=report_render.IMAGE_MODES, default='link',
+                              help='With --html: link images or inline them as data: URIs (default: %(default)s)')
+    watch_parser.add_argument('--no-screenshots', action='store_true',
+                              help='Do not watch generate_placeholder_screenshots.py')
+    watch_parser.add_argument('--no-snapshot', action='store_true',
+                              help='Do not save the pre-stage versions to the snapshot store')
+    watch_parser.add_argument('--poll', action='store_true', help='Poll file times instead of using inotify')
+    watch_parser.add_argument('--interval', type=float, default=1.0,
+                              help='Polling interval in seconds (default: %(default)s)')
+    watch_parser.add_argument('--debounce', type=float, default=0.2,
+                              help='Quiet time in seconds that ends a burst of changes (default: %(default)s)')
+
+    commands.add_parser('stages', help='List the available stages')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build' and args.stream and (args.dry_run or args.diff):
+        # The streamed output is written as it is produced; there is nothing to hold back or diff
+        build_parser.error('--stream cannot be combined with --dry-run or --diff')
+
+    if args.command == 'stages':
+        for stage in STAGES:
+            default = '*' if stage.name in DEFAULT_STAGES else ' '
+            print(f"{default} {stage.name:<12} {stage.description}")
+        return 0
+
+    if getattr(args, 'db', None):
+        os.environ['COURIER_DB'] = args.db
+
+    profiler = profiling.from_args(args) if args.command != 'watch' else profiling.NULL
+    try:
+        if args.command == 'watch':
+            import report_watch
+
+            report_watch.watch(args.report, args.output, args.stages, args.rules, args.html, args.images,
+                               not args.no_screenshots, not args.no_snapshot, args.poll, args.interval,
+                               args.debounce)
+        elif args.command == 'render':
+            report_render.render_file(args.report, args.output, args.images, args.pdf, not args.no_cache,
+                                      profiler=profiler)
+        elif args.stream:
+            build_streaming(args.report, args.output, args.stages, verbose=not args.quiet,
+                            rule_files=args.rules, profiler=profiler, snapshot=not args.no_snapshot)
+            if args.html:
+                report_render.render_file(args.output or args.report, args.html, args.images, profiler=profiler)
+        else:
+            content = build(args.report, args.output, args.stages, verbose=not args.quiet,
+                            use_cache=not args.no_cache, dry_run=args.dry_run, show_diff=args.diff,
+                            rule_files=args.rules, profiler=profiler, snapshot=not args.no_snapshot)
+            if args.html and not args.dry_run:
+                report_render.render_file(args.output or args.report, args.html, args.images, content=content,
+                                          profiler=profiler)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    profiler.finish()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
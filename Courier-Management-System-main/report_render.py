@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Render PROJECT_REPORT.md to HTML (and PDF) with a per-section cache
+
+    python report_render.py                              # PROJECT_REPORT.html
+    python report_render.py --images inline -o report.html
+    python report_render.py --pdf PROJECT_REPORT.pdf
+    python -m report_pipeline build --html PROJECT_REPORT.html
+
+The report is split into the same heading-delimited sections as the build
+cache (report_cache.py). Each section's HTML is cached under the hash of
+its markdown, its heading ids and, with --images inline, the size and mtime
+of the images it embeds, so after an edit only the sections that changed
+are converted again. The converter covers the markdown the report uses:
+headings, paragraphs, nested lists, pipe tables, fenced code (box tables
+included), block quotes, rules, HTML comments, links, images, code spans,
+bold and italics.
+
+Images are linked (paths relative to the report) by default; --images
+inline embeds them as data: URIs so the HTML stands alone. PDF output goes
+through WeasyPrint (pip install weasyprint) and is not cached.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+
+import profiling
+from report_cache import split_sections
+from rewrite_engine import HEADING
+
+REPORT = 'PROJECT_REPORT.md'
+CACHE_FILE = '.report-render-cache.json'
+# Bump when the generated HTML changes, to drop every cached section
+RENDER_VERSION = 2
+IMAGE_MODES = ['link', 'inline']
+
+STYLE = """
+body { max-width: 60rem; margin: 2rem auto; padding: 0 1rem; font: 16px/1.5 -apple-system, 'Segoe UI',
+       Helvetica, Arial, sans-serif; color: #24292f; }
+h1, h2 { border-bottom: 1px solid #d0d7de; padding-bottom: .3em; }
+pre { background: #f6f8fa; padding: 1rem; overflow-x: auto; line-height: 1.25; }
+pre, code { font-family: 'DejaVu Sans Mono', Menlo, Consolas, monospace; font-size: 85%; }
+table { border-collapse: collapse; margin: 1rem 0; }
+th, td { border: 1px solid #d0d7de; padding: .35rem .75rem; }
+blockquote { margin: 0; padding: 0 1rem; color: #57606a; border-left: .25em solid #d0d7de; }
+img { max-width: 100%; }
+@media print { body { max-width: none; } pre { white-space: pre-wrap; } h2 { break-before: page; } }
+"""
+
+FENCE = re.compile(r'^(```|~~~)\s*([\w+-]*)')
+RULE = re.compile(r'^ {0,3}([-*_])(\s*\1){2,}\s*$')
+LIST_ITEM = re.compile(r'^(\s*)([-*+]|\d+[.)])\s+(.*)')
+TABLE_DIVIDER = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+IMAGE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)(?:\s+"([^"]*)")?\)')
+LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+CODE_SPAN = re.compile(r'(`+)(.+?)\1')
+BOLD = re.compile(r'\*\*(.+?)\*\*|__(.+?)__')
+ITALIC = re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])')
+
+
+def slugify(title, seen):
+    """GitHub-style heading anchor, made unique with a -N suffix"""
+    slug = re.sub(r'[^\w\- ]', '', title.strip().lower()).replace(' ', '-')
+    count = seen.get(slug, 0)
+    seen[slug] = count + 1
+    return slug if count == 0 else f'{slug}-{count}'
+
+
+def heading_ids(sections):
+    """The anchor ids of every heading, per section (assigned over the whole document)"""
+    seen = {}
+    ids = []
+    for section in sections:
+        section_ids = []
+        in_fence = False
+        for line in section.splitlines():
+            if FENCE.match(line):
+                in_fence = not in_fence
+            elif not in_fence and HEADING.match(line):
+                section_ids.append(slugify(_plain(line.lstrip('#')), seen))
+        ids.append(section_ids)
+    return ids
+
+
+def _plain(text):
+    """Heading text without markup, for anchors"""
+    text = IMAGE.sub(r'\1', text)
+    text = LINK.sub(r'\1', text)
+    return re.sub(r'[`*]', '', text)
+
+
+class Images:
+    """Turns an image reference into an <img> src: the path as written, or a data: URI"""
+
+    def __init__(self, mode='link', base_dir='.'):
+        if mode not in IMAGE_MODES:
+            raise ValueError(f"Unknown image mode {mode!r} (use {' or '.join(IMAGE_MODES)})")
+        self.mode = mode
+        self.base_dir = base_dir
+
+    def _path(self, src):
+        if re.match(r'^[a-z]+:', src):
+            return None
+        return os.path.join(self.base_dir, src)
+
+    def stamp(self, section):
+        """What the cached HTML of a section depends on besides its text"""
+        if self.mode == 'link':
+            return []
+        stamps = []
+        for match in IMAGE.finditer(section):
+            path = self._path(match.group(2))
+            try:
+                st = os.stat(path) if path else None
+            except OSError:
+                st = None
+            stamps.append([match.group(2), st.st_mtime_ns, st.st_size] if st else [match.group(2)])
+        return stamps
+
+    def src(self, src):
+        path = self._path(src)
+        if self.mode == 'link' or path is None:
+            return src
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return src
+        import base64
+        import mimetypes
+
+        mime = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        return f'data:{mime};base64,{base64.b64encode(data).decode("ascii")}'
+
+
+def render_inline(text, images):
+    """Escape text and convert code spans, images, links, bold and italics"""
+    parts = []
+    pos = 0
+    for match in CODE_SPAN.finditer(text):
+        parts.append(_inline_markup(text[pos:match.start()], images))
+        parts.append('<code>%s</code>' % html.escape(match.group(2).strip(), quote=False))
+        pos = match.end()
+    parts.append(_inline_markup(text[pos:], images))
+    return ''.join(parts)
+
+
+def _attribute(escaped):
+    """Text that html.escape(quote=False) already escaped, made safe inside a quoted attribute"""
+    return html.escape(html.unescape(escaped), quote=True)
+
+
+def _inline_markup(text, images):
+    text = html.escape(text, quote=False)
+
+    def image(match):
+        alt, src, title = match.group(1), html.unescape(match.group(2)), match.group(3)
+        title = f' title="{_attribute(title)}"' if title else ''
+        return f'<img src="{html.escape(images.src(src), quote=True)}" alt="{_attribute(alt)}"{title}>'
+
+    text = IMAGE.sub(image, text)
+    text = LINK.sub(lambda m: f'<a href="{_attribute(m.group(2))}">{m.group(1)}</a>', text)
+    text = BOLD.sub(lambda m: f'<strong>{m.group(1) or m.group(2)}</strong>', text)
+    return ITALIC.sub(r'<em>\1</em>', text)
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+
+def _render_table(lines, images):
+    header, rows = _split_row(lines[0]), [_split_row(line) for line in lines[2:]]
+    out = ['<table>', '<thead><tr>%s</tr></thead>' % ''.join(
+        f'<th>{render_inline(cell, images)}</th>' for cell in header), '<tbody>']
+    for row in rows:
+        out.append('<tr>%s</tr>' % ''.join(f'<td>{render_inline(cell, images)}</td>' for cell in row))
+    out.append('</tbody></table>')
+    return '\n'.join(out)
+
+
+def _render_list(lines, images):
+    """Nested <ul>/<ol> from list lines; deeper indentation opens a sub-list"""
+    out = []
+    stack = []  # (indent, tag)
+    for line in lines:
+        match = LIST_ITEM.match(line)
+        if not match:
+            # Continuation of the previous item
+            out[-1] = out[-1][:-len('</li>')] + ' ' + render_inline(line.strip(), images) + '</li>'
+            continue
+        indent, marker, text = len(match.group(1).expandtabs(4)), match.group(2), match.group(3)
+        tag = 'ol' if marker[0].isdigit() else 'ul'
+        while stack and indent < stack[-1][0]:
+            out.append(f'</{stack.pop()[1]}></li>')
+        if stack and indent > stack[-1][0]:
+            out[-1] = out[-1][:-len('</li>')]
+            stack.append((indent, tag))
+            out.append(f'<{tag}>')
+        elif not stack or stack[-1][1] != tag:
+            if stack:
+                out.append(f'</{stack.pop()[1]}>')
+            stack.append((indent, tag))
+            out.append(f'<{tag}>')
+        out.append(f'<li>{render_inline(text, images)}</li>')
+    while stack:
+        out.append(f'</{stack.pop()[1]}>' + ('</li>' if stack else ''))
+    return '\n'.join(out)
+
+
+def render_markdown(text, images, ids=()):
+    """Convert one section (or any markdown) to an HTML fragment; ids are its heading anchors in order"""
+    ids = iter(ids)
+    lines = text.splitlines()
+    out = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        fence = FENCE.match(line)
+        if fence:
+            end = i + 1
+            while end < len(lines) and not lines[end].startswith(fence.group(1)):
+                end += 1
+            language = f' class="language-{fence.group(2)}"' if fence.group(2) else ''
+            code = html.escape('\n'.join(lines[i + 1:end]), quote=False)
+            out.append(f'<pre><code{language}>{code}</code></pre>')
+            i = end + 1
+        elif not stripped:
+            i += 1
+        elif HEADING.match(line):
+            level = len(line) - len(line.lstrip('#'))
+            anchor = next(ids, None)
+            anchor = f' id="{anchor}"' if anchor else ''
+            out.append(f'<h{level}{anchor}>{render_inline(line[level:].strip(), images)}</h{level}>')
+            i += 1
+        elif RULE.match(line):
+            out.append('<hr>')
+            i += 1
+        elif stripped.startswith('|') and i + 1 < len(lines) and TABLE_DIVIDER.match(lines[i + 1]):
+            end = i + 2
+            while end < len(lines) and lines[end].strip().startswith('|'):
+                end += 1
+            out.append(_render_table(lines[i:end], images))
+            i = end
+        elif stripped.startswith('>'):
+            end = i
+            while end < len(lines) and lines[end].strip().startswith('>'):
+                end += 1
+            quoted = '\n'.join(re.sub(r'^\s*> ?', '', l) for l in lines[i:end])
+            out.append(f'<blockquote>\n{render_markdown(quoted, images)}\n</blockquote>')
+            i = end
+        elif stripped.startswith('<'):
+            # Raw HTML and comments pass through, up to the next blank line
+            end = i
+            while end < len(lines) and lines[end].strip():
+                end += 1
+            out.append('\n'.join(lines[i:end]))
+            i = end
+        elif LIST_ITEM.match(line):
+            end = i + 1
+            while end < len(lines) and lines[end].strip() and not FENCE.match(lines[end]) and (
+                    LIST_ITEM.match(lines[end]) or lines[end][:1].isspace()):
+                end += 1
+            out.append(_render_list(lines[i:end], images))
+            i = end
+        else:
+            end = i + 1
+            while end < len(lines) and lines[end].strip() and not (
+                    HEADING.match(lines[end]) or FENCE.match(lines[end]) or RULE.match(lines[end])
+                    or LIST_ITEM.match(lines[end]) or lines[end].lstrip().startswith(('|', '>'))):
+                end += 1
+            paragraph = '<br>\n'.join(render_inline(l.strip(), images) for l in lines[i:end])
+            out.append(f'<p>{paragraph}</p>')
+            i = end
+    return '\n'.join(out)
+
+
+def section_key(section, ids, images):
+    key = json.dumps([RENDER_VERSION, images.mode, ids, images.stamp(section)])
+    return hashlib.sha1((key + '\0' + section).encode('utf-8')).hexdigest()
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(path, cache):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def render_document(content, images, cache=None, profiler=profiling.NULL):
+    """
+    The full HTML page for the report text. With a cache dict, unchanged
+    sections are reused and the dict is left holding only the sections of
+    this version. Returns (html, number of sections rendered).
+    """
+    sections = split_sections(content)
+    ids = heading_ids(sections)
+    used = {}
+    bodies = []
+    rendered = 0
+    for section, section_ids in zip(sections, ids):
+        key = section_key(section, section_ids, images)
+        body = cache.get(key) if cache is not None else None
+        if body is None:
+            with profiler.span('render section', 'render'):
+                body = render_markdown(section, images, section_ids)
+            rendered += 1
+        used[key] = body
+        bodies.append(body)
+    if cache is not None:
+        cache.clear()
+        cache.update(used)
+
+    title = next((re.sub(r'<[^>]+>', '', body.split('\n', 1)[0]) for body in bodies
+                  if body.startswith('<h1')), 'Report')
+    page = ('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f'<title>{title}</title>\n<style>{STYLE}</style>\n</head>\n<body>\n'
+            + '\n'.join(bodies) + '\n</body>\n</html>\n')
+    return page, rendered
+
+
+def write_pdf(page, path, base_dir):
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise ValueError("PDF output needs WeasyPrint (pip install weasyprint)")
+    HTML(string=page, base_url=base_dir).write_pdf(path)
+
+
+def render_file(report=REPORT, output=None, images='link', pdf=None, use_cache=True, content=None,
+                profiler=profiling.NULL):
+    """Render report (or its already-built content) to output; returns the output path"""
+    from report_pipeline import write_atomic
+
+    output = output or os.path.splitext(report)[0] + '.html'
+    base_dir = os.path.dirname(os.path.abspath(report))
+    start = time.perf_counter()
+    if content is None:
+        with profiler.span('read', 'io'):
+            with open(report, 'r') as f:
+                content = f.read()
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(output)), CACHE_FILE)
+    cache = load_cache(cache_path) if use_cache else None
+    page, rendered = render_document(content, Images(images, base_dir), cache, profiler)
+    with profiler.span('write', 'io'):
+        write_atomic(output, page)
+        if cache is not None:
+            save_cache(cache_path, cache)
+    print(f"🌐 {output}: {rendered} of {len(split_sections(content))} section(s) rendered "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if pdf:
+        start = time.perf_counter()
+        with profiler.span('pdf', 'render'):
+            write_pdf(page, pdf, base_dir)
+        print(f"📄 {pdf} in {time.perf_counter() - start:.2f}s")
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the report to HTML (and PDF) with a per-section cache')
+    parser.add_argument('--report', default=REPORT, help='Markdown to render (default: %(default)s)')
+    parser.add_argument('-o', '--output', help='HTML file (default: the report name with .html)')
+    parser.add_argument('--images', choices=IMAGE_MODES, default='link',
+                        help='Link images by path or inline them as data: URIs (default: %(default)s)')
+    parser.add_argument('--pdf', metavar='FILE', help='Also write a PDF (needs WeasyPrint)')
+    parser.add_argument('--no-cache', action='store_true', help='Render every section again')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    profiler = profiling.from_args(args)
+    try:
+        render_file(args.report, args.output, args.images, args.pdf, not args.no_cache, profiler=profiler)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    profiler.finish()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Watch the rule sources, the report and the screenshot definitions, and
+rebuild only what an edit affects
+
+    python -m report_pipeline watch
+    python -m report_pipeline watch --stages text,data1,data2,fixes,live --html PROJECT_REPORT.html
+    python -m report_pipeline watch --poll --interval 2       # network drives, no inotify
+
+Editing report_rules.json, a stage's module (report_data.py, ...) or a
+--rules file reloads it and re-runs that stage and the stages after it,
+through the section cache, from the text the stage last ran over: with
+--output the report itself; rewritten in place, the latest "before
+<stage>" snapshot until the watcher has built once (the version it
+replaces is snapshotted first). Editing the report re-runs the watched
+stages over the changed sections; editing
+generate_placeholder_screenshots.py re-renders the screenshots whose
+definition changed. With --html the page is re-rendered after each
+cycle. Bursts of events (editors save in several steps, git checkouts
+touch many files) are debounced into one cycle, and every cycle prints
+what it rebuilt and how long it took.
+
+On Linux the watcher blocks on inotify (directories are watched, so
+rename-on-save editors are seen) and uses no CPU while idle; elsewhere, or
+with --poll, it stats the watched files every --interval seconds.
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import importlib
+import importlib.util
+import os
+import select
+import struct
+import sys
+import time
+
+import profiling
+
+DEBOUNCE = 0.2
+# A steady stream of events still gets a cycle this often
+MAX_DEBOUNCE = 2.0
+POLL_INTERVAL = 1.0
+SCREENSHOT_MODULE = 'generate_placeholder_screenshots'
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Blocks on an inotify descriptor watching the directories of the given files"""
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories = {}
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            wd = libc.inotify_add_watch(self.fd, directory.encode(), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'cannot watch {directory}')
+            self.directories[wd] = directory
+
+    def wait(self, timeout=None):
+        """The watched files changed within timeout seconds (None = block until one changes)"""
+        changed = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not changed:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not select.select([self.fd], [], [], remaining)[0]:
+                return changed
+            data = os.read(self.fd, 64 * 1024)
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, pos)
+                name = data[pos + EVENT.size:pos + EVENT.size + length].rstrip(b'\0').decode(errors='replace')
+                pos += EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; treat everything as changed
+                    changed.update(self.paths)
+                elif wd in self.directories:
+                    path = os.path.join(self.directories[wd], name)
+                    if path in self.paths:
+                        changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Stats the watched files every interval seconds"""
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.interval = interval
+        self.stamps = {path: self._stamp(path) for path in self.paths}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.paths:
+                stamp = self._stamp(path)
+                if stamp != self.stamps[path]:
+                    self.stamps[path] = stamp
+                    changed.add(path)
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return changed
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+def make_watcher(paths, poll=False, interval=POLL_INTERVAL):
+    """inotify where available, else (or with poll) a PollingWatcher"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except OSError as e:
+            print(f"⚠  inotify unavailable ({e}); polling every {interval:g}s")
+    return PollingWatcher(paths, interval)
+
+
+def wait_for_changes(watcher, debounce=DEBOUNCE):
+    """Block until something changes, then gather events until debounce seconds pass quietly"""
+    changed = watcher.wait()
+    start = time.monotonic()
+    while time.monotonic() - start < MAX_DEBOUNCE:
+        more = watcher.wait(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def module_path(name):
+    spec = importlib.util.find_spec(name)
+    return os.path.abspath(spec.origin) if spec and spec.origin else None
+
+
+def _text_hash(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class ReportWatch:
+    """Maps changed files to the stages, images and page that depend on them"""
+
+    def __init__(self, report, output=None, stage_names=None, rule_files=None, html=None, images='link',
+                 screenshots=True, snapshot=True):
+        import report_pipeline
+
+        self.pipeline = report_pipeline
+        self.report = report
+        self.output = output or report
+        self.stage_names = stage_names
+        self.rule_files = [os.path.abspath(path) for path in rule_files or []]
+        self.html = html
+        self.images = images
+        self.snapshot = snapshot
+        # The report as this watcher last wrote it, so its own writes do not start a cycle
+        self.written = _text_hash(self.output)
+        # Stage name -> the text it last ran over in a build from the
+        # pipeline's input, where an edit to its rules starts again
+        self.inputs = {}
+
+        stages = report_pipeline.select_stages(stage_names)
+        self.stage_sources = {}
+        for stage in stages:
+            if stage.path:
+                self.stage_sources.setdefault(stage.path, []).append(stage)
+        self.screenshot_source = module_path(SCREENSHOT_MODULE) if screenshots else None
+
+    def paths(self):
+        paths = [self.report] + list(self.stage_sources) + self.rule_files
+        return paths + ([self.screenshot_source] if self.screenshot_source else [])
+
+    def _reload(self, stages):
+        for stage in stages:
+            module = None if stage.rule_file else sys.modules.get(stage.source)
+            if module is not None:
+                importlib.reload(module)
+            stage._engine = None
+
+    def _stages(self, changed):
+        """
+        (the watched stages, index of the first to re-run or None when the
+        report needs nothing, whether the report itself changed) for a set of
+        changed files
+        """
+        report_changed = (os.path.abspath(self.report) in changed and
+                          (self.report != self.output or _text_hash(self.report) != self.written))
+        names = set()
+        for path in changed:
+            if path in self.stage_sources:
+                self._reload(self.stage_sources[path])
+                names.update(stage.name for stage in self.stage_sources[path])
+        stages = self.pipeline.select_stages(self.stage_names, self.rule_files)
+        if report_changed:
+            return stages, 0, True
+        for path in changed:
+            if path in self.rule_files:
+                import rule_registry
+
+                names.update(name for name, _, _ in rule_registry.load_stages(path))
+        edited = [i for i, stage in enumerate(stages) if stage.name in names]
+        return stages, edited[0] if edited else None, False
+
+    def _remember(self, stage, text):
+        self.inputs[stage.name] = text
+
+    def _start(self, stages, first):
+        """
+        (index, text) to rebuild from after the rules of stages[first]
+        changed: the latest input known for that stage or an earlier one.
+        text is None when the report itself is that input.
+        """
+        for i in range(first, -1, -1):
+            if stages[i].name in self.inputs:
+                return i, self.inputs[stages[i].name]
+        if self.report != self.output:
+            return 0, None
+        # Rewritten in place, the report no longer holds what the stages matched
+        import snapshot_store
+
+        store = snapshot_store.store_for(self.output)
+        labels = {'before ' + stage.name: i for i, stage in enumerate(stages[:first + 1])}
+        for entry in reversed(store.snapshots(os.path.basename(self.output))):
+            if entry['label'] in labels:
+                print(f"  from snapshot #{entry['id']} ({entry['label']})")
+                return labels[entry['label']], store.read(entry)
+        raise FileNotFoundError(f"no snapshot of {self.output} before {stages[first].name} to rebuild from; "
+                                f"{self.output} is rewritten in place")
+
+    def _screenshots(self):
+        """Re-render the screenshots whose definitions changed; returns how many were rendered"""
+        module = sys.modules.get(SCREENSHOT_MODULE)
+        module = importlib.reload(module) if module else importlib.import_module(SCREENSHOT_MODULE)
+        renders = module.load_manifest()
+        to_render, _ = module.plan_renders(module.SCREENSHOTS, renders)
+        if not to_render:
+            return 0
+        for directory in {os.path.dirname(screenshot[0]) for screenshot in to_render}:
+            os.makedirs(directory, exist_ok=True)
+        module.generate(to_render)
+        for screenshot in to_render:
+            renders[module.output_path(screenshot[0])] = module.render_key(screenshot)
+        module.save_manifest(renders)
+        return len(to_render)
+
+    def cycle(self, changed, profiler=profiling.NULL):
+        """Rebuild what changed affects; returns {step: seconds}"""
+        timings = {}
+        wrote = False
+        stages, first, report_changed = self._stages(changed)
+        if first is not None:
+            start = time.perf_counter()
+            before = self.written
+            index, text = (0, None) if report_changed else self._start(stages, first)
+            # An in-place report is past its stages; what they ran over there is no place to restart from
+            pristine = text is not None or self.report != self.output
+            # Rules that match nothing deserve a warning after editing them, not after
+            # editing a report they already rewrote
+            content = self.pipeline.build(self.report, self.output, verbose=False, profiler=profiler,
+                                          snapshot=self.snapshot, stages=stages[index:],
+                                          warn_unexpected=not report_changed, text=text,
+                                          before_stage=self._remember if pristine else None)
+            self.written = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            wrote = self.written != before
+            timings['build ' + ','.join(stage.name for stage in stages[first:])] = time.perf_counter() - start
+
+        images = 0
+        if self.screenshot_source in changed:
+            start = time.perf_counter()
+            images = self._screenshots()
+            timings[f'{images} image(s)'] = time.perf_counter() - start
+
+        if self.html and (wrote or images or os.path.abspath(self.report) in changed):
+            import report_render
+
+            start = time.perf_counter()
+            report_render.render_file(self.output, self.html, self.images, profiler=profiler)
+            timings['html'] = time.perf_counter() - start
+        return timings
+
+
+def watch(report, output=None, stage_names=None, rule_files=None, html=None, images='link', screenshots=True,
+          snapshot=True, poll=False, interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    """Run rebuild cycles until interrupted"""
+    target = ReportWatch(report, output, stage_names, rule_files, html, images, screenshots, snapshot)
+    paths = target.paths()
+    watcher = make_watcher(paths, poll, interval)
+    kind = 'inotify' if isinstance(watcher, InotifyWatcher) else f'polling every {interval:g}s'
+    print(f"👀 Watching {len(paths)} file(s) ({kind}, {debounce * 1000:.0f} ms debounce); Ctrl-C to stop")
+    for path in sorted(paths):
+        print(f"  {os.path.relpath(path)}")
+    try:
+        while True:
+            changed = wait_for_changes(watcher, debounce)
+            start = time.perf_counter()
+            print(f"\n🔁 {time.strftime('%H:%M:%S')} {', '.join(sorted(os.path.relpath(p) for p in changed))}")
+            try:
+                timings = target.cycle(changed)
+            except Exception as e:
+                # A half-saved module or a bad rule should not end the watch
+                print(f"❌ {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            steps = ', '.join(f'{step} {seconds * 1000:.0f} ms' for step, seconds in timings.items())
+            print(f"⏱  cycle {(time.perf_counter() - start) * 1000:.0f} ms ({steps or 'nothing to rebuild'})")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
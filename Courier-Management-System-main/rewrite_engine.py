@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Single-pass multi-pattern rewrite engine shared by the report scripts
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import profiling
+
+
+class Rule:
+    """One pattern -> replacement entry from a replacement table"""
+
+    def __init__(self, pattern, replacement, flags=0, name=None, expect='once'):
+        self.pattern = pattern
+        self.replacement = replacement
+        self.flags = flags
+        self.name = name or pattern
+        # How often the rule should match in one run: 'once', 'at-least-once' or 'any'
+        self.expect = expect
+        self.regex = re.compile(pattern, flags)
+        # Everything that changes the output or the match-count check
+        self.fingerprint = hashlib.sha1(
+            json.dumps([pattern, replacement, int(flags), self.name, expect]).encode('utf-8')).hexdigest()
+        self._template = _split_template(replacement, self.regex)
+
+    def expand(self, text, pos):
+        """Return the replacement for the match of this rule starting at pos"""
+        if '\\' not in self.replacement:
+            return self.replacement
+        # Backreferences are numbered relative to the rule's own pattern
+        return self.fill(self.regex.match(text, pos))
+
+    def fill(self, match):
+        """The replacement for a match of this rule's own regex"""
+        if self._template is None:
+            return match.expand(self.replacement)
+        # Match.expand() parses the template again on every call
+        return ''.join(part if isinstance(part, str) else match.group(part) or '' for part in self._template)
+
+
+class RewriteEngine:
+    """
+    Applies a replacement table in one left-to-right scan of the document.
+
+    When every rule starts with literal text sharing a common prefix (the
+    report's tables are all ``![...](...)`` references or diff placeholder
+    blocks), the scan is a str.find() for that prefix, and a
+    dict lookup on the characters after it (the placeholder title) picks
+    the rules worth trying at each hit. Other tables are compiled into one
+    alternation: each rule is wrapped in its own capturing group, and the
+    outermost group is always the last one to close, so
+    ``match.lastindex`` identifies the rule that fired.
+
+    Either way the leftmost match wins, and at one position the earliest
+    rule in the table.
+    """
+
+    def __init__(self, rules, flags=0):
+        if isinstance(rules, dict):
+            rules = rules.items()
+        self.rules = [entry if isinstance(entry, Rule) else Rule(*entry, flags=flags) for entry in rules]
+        self.regex = None
+        self.prefix = ''
+        self._dispatch = None
+        self._by_group = {}
+
+        prefixes = [literal_prefix(rule.pattern, rule.flags) for rule in self.rules]
+        common = os.path.commonprefix(prefixes) if self.rules and all(prefixes) else ''
+        if common:
+            self.prefix = common
+            # Key on as many characters after the shared prefix as every rule has
+            self._key_length = min(len(prefix) for prefix in prefixes) - len(common)
+            self._dispatch = {}
+            for rule, prefix in zip(self.rules, prefixes):
+                key = prefix[len(common):len(common) + self._key_length]
+                self._dispatch.setdefault(key, []).append((prefix, rule))
+            return
+
+        parts = []
+        group = 1
+        for rule in self.rules:
+            self._by_group[group] = rule
+            parts.append('(%s)' % _scoped(rule.pattern, rule.flags))
+            group += 1 + rule.regex.groups
+        self.regex = re.compile('|'.join(parts)) if parts else None
+
+    def _scan(self, content):
+        """Yield (rule, start, end, replacement) for each non-overlapping match, left to right"""
+        if self._dispatch is not None:
+            skip = len(self.prefix)
+            pos = content.find(self.prefix)
+            while pos != -1:
+                key = content[pos + skip:pos + skip + self._key_length]
+                for prefix, rule in self._dispatch.get(key, ()):
+                    match = rule.regex.match(content, pos) if content.startswith(prefix, pos) else None
+                    if match:
+                        yield rule, pos, match.end(), rule.fill(match)
+                        pos = content.find(self.prefix, match.end())
+                        break
+                else:
+                    pos = content.find(self.prefix, pos + 1)
+        elif self.regex is not None:
+            for match in self.regex.finditer(content):
+                rule = self._by_group[match.lastindex]
+                yield rule, match.start(), match.end(), rule.expand(content, match.start())
+
+    def search(self, content):
+        """Whether any rule matches somewhere in content"""
+        return next(self._scan(content), None) is not None
+
+    def rewrite(self, content):
+        """Rewrite content, returning (new_content, {rule name: match count})"""
+        counts = {rule.name: 0 for rule in self.rules}
+        chunks = []
+        last = 0
+        for rule, start, end, replacement in self._scan(content):
+            counts[rule.name] += 1
+            chunks.append(content[last:start])
+            chunks.append(replacement)
+            last = end
+        chunks.append(content[last:])
+        return ''.join(chunks), counts
+
+
+# Characters with a meaning in a pattern; a literal prefix stops at the first one
+_SPECIAL = set('.^$*+?{}[]|()')
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v', 'a': '\a'}
+
+
+def literal_prefix(pattern, flags=0):
+    """The literal text every match of pattern starts with ('' when there is none or it is unclear)"""
+    if flags & (re.IGNORECASE | re.VERBOSE) or _group(pattern, 0)[1]:
+        return ''
+    prefix = []
+    closing = set()
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('(?:', i) or (char == '(' and not pattern.startswith('?', i + 1)):
+            # The prefix carries on into a group that is always matched once
+            # with a single branch, like the screenshot stage's leading (### ...)
+            start = i + (3 if pattern.startswith('(?:', i) else 1)
+            end, alternation = _group(pattern, start)
+            if alternation or pattern[end + 1:end + 2] in ('*', '?', '{', '+'):
+                break
+            closing.add(end)
+            i = start
+            continue
+        if char == ')' and i in closing:
+            i += 1
+            continue
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if escaped in _ESCAPES:
+                char = _ESCAPES[escaped]
+            elif not escaped or escaped.isalnum():
+                # Classes (\d), backreferences, \x41 ...: stop here
+                break
+            else:
+                char = escaped
+            step = 2
+        elif char in _SPECIAL:
+            break
+        else:
+            step = 1
+        quantifier = pattern[i + step:i + step + 1]
+        if quantifier in ('*', '?', '{'):
+            break
+        prefix.append(char)
+        if quantifier == '+':
+            break
+        i += step
+    return ''.join(prefix)
+
+
+def _split_template(replacement, regex):
+    """
+    replacement as literal strings and group numbers, or None when it uses
+    an escape this does not handle (Match.expand() then does the work)
+    """
+    parts = []
+    literal = []
+    i = 0
+    while i < len(replacement):
+        char = replacement[i]
+        if char != '\\':
+            literal.append(char)
+            i += 1
+            continue
+        escaped = replacement[i + 1:i + 2]
+        reference = re.match(r'\\(?:(\d\d?)|g<(\w+)>)', replacement[i:])
+        if escaped in _ESCAPES or escaped == '\\':
+            literal.append(_ESCAPES.get(escaped, escaped))
+            i += 2
+            continue
+        if reference is None or reference.group(1) and (
+                reference.group(1).startswith('0') or replacement[i + reference.end():][:1].isdigit()):
+            # Octal escapes (\0, \123) are left to Match.expand()
+            return None
+        group = reference.group(1) or reference.group(2)
+        group = int(group) if group.isdigit() else regex.groupindex.get(group)
+        if group is None or group > regex.groups:
+            return None
+        parts.append(''.join(literal))
+        parts.append(group)
+        literal = []
+        i += reference.end()
+    parts.append(''.join(literal))
+    return [part for part in parts if part != '']
+
+
+def _group(pattern, start):
+    """(index of the ')' closing the group whose body starts at start, whether that body has a top-level '|')"""
+    depth = 0
+    alternation = False
+    in_class = False
+    i = start
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+            # A ']' right after '[' or '[^' is a literal
+            if pattern[i + 1:i + 2] == '^':
+                i += 1
+            if pattern[i + 1:i + 2] == ']':
+                i += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            if depth == 0:
+                return i, alternation
+            depth -= 1
+        elif char == '|' and depth == 0:
+            alternation = True
+        i += 1
+    return i, alternation
+
+
+def _scoped(pattern, flags):
+    """Wrap a pattern so its flags apply only inside its own alternative"""
+    letters = ''.join(letter for flag, letter in _INLINE_FLAGS if flags & flag)
+    if not letters:
+        return pattern
+    return '(?%s:%s)' % (letters, pattern)
+
+
+_INLINE_FLAGS = [
+    (re.IGNORECASE, 'i'),
+    (re.MULTILINE, 'm'),
+    (re.DOTALL, 's'),
+    (re.VERBOSE, 'x'),
+]
+
+
+# Markdown heading line (only meaningful outside fenced blocks)
+HEADING = re.compile(r'#{1,6} ')
+
+
+def iter_chunks(lines):
+    """
+    Group an iterable of lines into heading-delimited prose runs and whole
+    fenced blocks, so a file can be rewritten without holding all of it.
+    Rules applied per chunk cannot match across chunk boundaries.
+    """
+    buf = []
+    in_fence = False
+    for line in lines:
+        if line.startswith('```'):
+            if in_fence:
+                buf.append(line)
+                yield ''.join(buf)
+                buf = []
+            else:
+                if buf:
+                    yield ''.join(buf)
+                buf = [line]
+            in_fence = not in_fence
+            continue
+        if not in_fence and buf and HEADING.match(line):
+            yield ''.join(buf)
+            buf = []
+        buf.append(line)
+    if buf:
+        yield ''.join(buf)
+
+
+def rewrite_stream(chunks, engines, counts, profiler=profiling.NULL, names=None):
+    """Yield each chunk rewritten by every engine in turn, adding to counts[i]"""
+    names = names or ['rewrite'] * len(engines)
+    for chunk in chunks:
+        for engine, stage_counts, name in zip(engines, counts, names):
+            with profiler.span(name):
+                chunk, chunk_counts = engine.rewrite(chunk)
+            for name, count in chunk_counts.items():
+                stage_counts[name] = stage_counts.get(name, 0) + count
+        yield chunk
+
+
+def rewrite_report(path, rules, flags=0, profiler=profiling.NULL):
+    """Rewrite a whole file in memory (rules may span headings) and write it back; returns (content, counts)"""
+    # report_pipeline imports this module
+    from report_pipeline import write_atomic
+
+    with profiler.span('read'):
+        with open(path, 'r') as f:
+            original = f.read()
+    with profiler.span('compile'):
+        engine = RewriteEngine(rules, flags)
+    with profiler.span('rewrite'):
+        content, counts = engine.rewrite(original)
+    profiler.time_rules('rewrite', engine, original)
+    with profiler.span('write'):
+        write_atomic(path, content)
+    return content, counts
+
+
+EXPECT = {
+    'once': lambda count: count == 1,
+    'at-least-once': lambda count: count >= 1,
+    'any': lambda count: True,
+}
+
+
+def unexpected_counts(rules, counts):
+    """[(rule, count)] for rules whose match count breaks their expectation"""
+    return [(rule, counts.get(rule.name, 0)) for rule in rules
+            if not EXPECT[rule.expect](counts.get(rule.name, 0))]
+
+
+def print_counts(counts):
+    """Print per-rule match counts, flagging rules that did not match"""
+    print("\n🔎 Rule matches:")
+    for name, count in counts.items():
+        label = name if len(name) <= 70 else name[:67] + '...'
+        marker = '✓' if count == 1 else ('✗' if count == 0 else '!')
+        print(f"  {marker} {count:>3}  {label}")
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Replacement rules loaded from a declarative JSON/TOML/YAML file
+
+A rule file holds named stages, each a list of pattern -> replacement rules:
+
+    {"stages": [{"name": "headings", "description": "...", "flags": ["DOTALL"],
+                 "rules": [{"name": "...", "pattern": "...", "replacement": "...",
+                            "expect": "once"}]}]}
+
+Every rule is validated up front (pattern compiles, backreferences exist,
+flags and expectations are known). The validated table is cached on disk
+under .rule-cache/, keyed by the file's hash, so later runs skip parsing
+and validation. The report's built-in stages live in report_rules.json;
+run extra stages with `python3 -m report_pipeline build --rules rules.json`.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+from rewrite_engine import EXPECT, Rule
+
+CACHE_DIR = '.rule-cache'
+REGISTRY_VERSION = 1
+# The report's own stages (text, data1, data2, fixes)
+BUILTIN_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_rules.json')
+RULE_FILE_TYPES = ('.json', '.toml', '.yaml', '.yml')
+
+FLAGS = {
+    'IGNORECASE': re.IGNORECASE,
+    'MULTILINE': re.MULTILINE,
+    'DOTALL': re.DOTALL,
+    'VERBOSE': re.VERBOSE,
+}
+
+# \1 .. \99 and \g<name> / \g<1> in replacement templates
+BACKREF = re.compile(r'\\(?:(\d{1,2})|g<([^>]*)>)')
+
+
+class RuleFileError(ValueError):
+    pass
+
+
+def read_rule_file(path):
+    """Parse a rule file by extension (.json, .toml, .yaml/.yml)"""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if ext == '.json':
+        return json.loads(raw.decode('utf-8'))
+    if ext == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            raise RuleFileError(f"{path}: TOML rule files need Python 3.11+")
+        return tomllib.loads(raw.decode('utf-8'))
+    if ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuleFileError(f"{path}: YAML rule files need PyYAML (pip install pyyaml)")
+        try:
+            return yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise RuleFileError(f"{path}: {e}")
+    raise RuleFileError(f"{path}: unsupported rule file type {ext or '(none)'} (use .json, .toml or .yaml)")
+
+
+def _flags(value, where, errors):
+    names = [value] if isinstance(value, str) else value or []
+    flags = 0
+    for name in names:
+        if name not in FLAGS:
+            errors.append(f"{where}: unknown flag {name!r} (known: {', '.join(FLAGS)})")
+        else:
+            flags |= FLAGS[name]
+    return flags
+
+
+def _check_template(regex, replacement, where, errors):
+    for number, name in BACKREF.findall(replacement):
+        ref = number or name
+        if ref.isdigit():
+            if int(ref) > regex.groups:
+                errors.append(f"{where}: replacement refers to group {ref} "
+                              f"but the pattern has {regex.groups}")
+        elif ref not in regex.groupindex:
+            errors.append(f"{where}: replacement refers to unknown group {ref!r}")
+
+
+def validate(data, path):
+    """Check a parsed rule file and return it normalized (flags as ints, defaults filled in)"""
+    errors = []
+    stages = data.get('stages') if isinstance(data, dict) else None
+    if not isinstance(stages, list) or not stages:
+        raise RuleFileError(f"{path}: expected a non-empty 'stages' list")
+
+    normalized = []
+    seen_stages = set()
+    for i, stage in enumerate(stages):
+        where = f"{path}: stages[{i}]"
+        if not isinstance(stage, dict) or not isinstance(stage.get('name'), str):
+            errors.append(f"{where}: each stage needs a 'name'")
+            continue
+        where = f"{path}: stage {stage['name']!r}"
+        if stage['name'] in seen_stages:
+            errors.append(f"{where}: duplicate stage name")
+        seen_stages.add(stage['name'])
+        stage_flags = _flags(stage.get('flags'), where, errors)
+
+        rules = []
+        seen_rules = set()
+        for j, rule in enumerate(stage.get('rules') or []):
+            rule_where = f"{where} rules[{j}]"
+            if not isinstance(rule, dict) or not all(isinstance(rule.get(key), str)
+                                                     for key in ('pattern', 'replacement')):
+                errors.append(f"{rule_where}: each rule needs string 'pattern' and 'replacement'")
+                continue
+            name = rule.get('name') or rule['pattern']
+            if name in seen_rules:
+                errors.append(f"{rule_where}: duplicate rule name {name!r}")
+            seen_rules.add(name)
+            flags = stage_flags | _flags(rule.get('flags'), rule_where, errors)
+            expect = rule.get('expect', stage.get('expect', 'once'))
+            if expect not in EXPECT:
+                errors.append(f"{rule_where}: unknown expect {expect!r} (known: {', '.join(EXPECT)})")
+            try:
+                regex = re.compile(rule['pattern'], flags)
+            except re.error as e:
+                errors.append(f"{rule_where}: bad pattern: {e}")
+                continue
+            _check_template(regex, rule['replacement'], rule_where, errors)
+            rules.append({'name': name, 'pattern': rule['pattern'], 'replacement': rule['replacement'],
+                          'flags': flags, 'expect': expect})
+
+        if not rules and not errors:
+            errors.append(f"{where}: no rules")
+        normalized.append({'name': stage['name'], 'description': stage.get('description', ''),
+                           'rules': rules})
+
+    if errors:
+        raise RuleFileError('Invalid rule file:\n  ' + '\n  '.join(errors))
+    return normalized
+
+
+def file_hash(path):
+    h = hashlib.sha256(b'rule-registry-%d\0' % REGISTRY_VERSION)
+    with open(path, 'rb') as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+def load_table(path, cache_dir=None):
+    """Return the validated stage list for a rule file, from the on-disk cache when fresh"""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    cache_path = os.path.join(cache_dir, file_hash(path) + '.json')
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    stages = validate(read_rule_file(path), path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(stages, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # a read-only checkout just re-validates next time
+    return stages
+
+
+def load_stages(path, cache_dir=None):
+    """Return [(stage name, description, [Rule])] for a rule file, patterns compiled once here"""
+    stages = []
+    for stage in load_table(path, cache_dir):
+        rules = [Rule(r['pattern'], r['replacement'], r['flags'], r['name'], r['expect'])
+                 for r in stage['rules']]
+        stages.append((stage['name'], stage['description'] or f"Rules from {path}", rules))
+    return stages
+
+
+def load_stage(path, name, cache_dir=None):
+    """The compiled rules of one stage of a rule file"""
+    for stage_name, _, rules in load_stages(path, cache_dir):
+        if stage_name == name:
+            return rules
+    raise RuleFileError(f"{path}: no stage named {name!r}")
+
+
+def export_stages(stages):
+    """Dump pipeline stages in rule file form (for moving a Python table to a file)"""
+    flag_names = lambda flags: [name for name, flag in FLAGS.items() if flags & flag]
+    out = []
+    for stage in stages:
+        rules = stage.engine.rules
+        # Flags every rule shares are written once, on the stage
+        shared = rules[0].flags if rules and all(rule.flags == rules[0].flags for rule in rules) else 0
+        entries = []
+        for rule in rules:
+            entry = {}
+            if rule.name != rule.pattern:
+                entry['name'] = rule.name
+            entry.update(pattern=rule.pattern, replacement=rule.replacement)
+            if rule.flags & ~shared:
+                entry['flags'] = flag_names(rule.flags & ~shared)
+            if rule.expect != 'once':
+                entry['expect'] = rule.expect
+            entries.append(entry)
+        stage_entry = {'name': stage.name, 'description': stage.description}
+        if shared:
+            stage_entry['flags'] = flag_names(shared)
+        stage_entry['rules'] = entries
+        out.append(stage_entry)
+    return {'stages': out}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate or export declarative replacement rules')
+    commands = parser.add_subparsers(dest='command', required=True)
+    check_parser = commands.add_parser('check', help='Validate rule files and list their stages')
+    check_parser.add_argument('files', nargs='+')
+    export_parser = commands.add_parser('export', help='Write built-in stages as a JSON rule file')
+    export_parser.add_argument('--stages', required=True, help='Comma-separated stage names')
+    export_parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'check':
+            for path in args.files:
+                for stage in load_table(path):
+                    print(f"✓ {path}: {stage['name']} ({len(stage['rules'])} rules)")
+            return 0
+
+        from report_pipeline import parse_stage_list, select_stages
+        data = export_stages(select_stages(parse_stage_list(args.stages)))
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"✅ Wrote {sum(len(s['rules']) for s in data['stages'])} rules to {args.output}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, delta-compressed snapshots of the report
+
+Replaces the full PROJECT_REPORT_BACKUP*.md copies the repo used to keep:
+
+    python snapshot_store.py save PROJECT_REPORT.md -m "before add_screenshots.sh"
+    python snapshot_store.py list
+    python snapshot_store.py diff 3            # snapshot 3 -> the file on disk
+    python snapshot_store.py diff 3 -1         # snapshot 3 -> the latest snapshot
+    python snapshot_store.py restore -2        # put the second-to-last snapshot back
+    python snapshot_store.py save PROJECT_REPORT_BACKUP.md --as PROJECT_REPORT.md
+
+A snapshot is a list of blocks. Block boundaries are content-defined (before
+each heading line, or after a line whose CRC hits a mask once a block is
+big enough), so an edit only changes the blocks it touches and the rest are
+shared with earlier snapshots by their SHA-256. A new block is stored
+zlib-compressed with the block it replaced in the previous snapshot as the
+preset dictionary, which makes it a delta a few dozen bytes long for a
+small edit. report_pipeline build saves the version before each stage here.
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sys
+import time
+import zlib
+
+from rewrite_engine import HEADING
+
+STORE_DIR = '.report-snapshots'
+INDEX_FILE = 'snapshots.jsonl'
+
+# Block sizes in bytes; MAX_BLOCK stays within zlib's 32 KiB window so a
+# whole base block is usable as a delta dictionary
+MIN_BLOCK = 1024
+MAX_BLOCK = 32 * 1024
+BOUNDARY_MASK = 0x1F
+# Deltas against deltas are allowed this many levels deep before a block is stored whole
+MAX_CHAIN = 8
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def iter_blocks(lines):
+    """Group lines into content-defined blocks (bytes)"""
+    block, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        if block and (size + len(data) > MAX_BLOCK or (size >= MIN_BLOCK and HEADING.match(line))):
+            yield b''.join(block)
+            block, size = [], 0
+        block.append(data)
+        size += len(data)
+        if size >= MIN_BLOCK and zlib.crc32(data) & BOUNDARY_MASK == 0:
+            yield b''.join(block)
+            block, size = [], 0
+    if block:
+        yield b''.join(block)
+
+
+class SnapshotStore:
+    """objects/<aa>/<digest> block files plus an append-only snapshots.jsonl index"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.objects = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self._blocks = {}
+
+    def snapshots(self, name=None):
+        try:
+            with open(self.index_path, 'r') as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+        return [entry for entry in entries if name is None or entry['file'] == name]
+
+    def get(self, ref, name=None):
+        """A snapshot by number (negative counts back from the latest) or content hash prefix"""
+        entries = self.snapshots(name)
+        if not entries:
+            raise SnapshotError('No snapshots yet' + (f' of {name}' if name else ''))
+        ref = str(ref)
+        try:
+            number = int(ref)
+        except ValueError:
+            found = [entry for entry in entries if entry['sha256'].startswith(ref)]
+            if not found:
+                raise SnapshotError(f'No snapshot matches {ref!r}')
+            return found[-1]
+        if number < 0:
+            if -number > len(entries):
+                raise SnapshotError(f'Only {len(entries)} snapshot(s)')
+            return entries[number]
+        for entry in entries:
+            if entry['id'] == number:
+                return entry
+        raise SnapshotError(f'No snapshot #{number}')
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def _write_object(self, digest, payload):
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return len(payload)
+
+    def _read_object(self, digest):
+        """(block bytes, delta chain depth) for a stored block"""
+        if digest in self._blocks:
+            return self._blocks[digest]
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            raise SnapshotError(f'Missing block {digest[:12]} (store damaged?)')
+        if payload[:1] == b'F':
+            block, depth = zlib.decompress(payload[1:]), 0
+        else:
+            depth = payload[1]
+            base, _ = self._read_object(payload[2:34].hex())
+            decompressor = zlib.decompressobj(zdict=base)
+            block = decompressor.decompress(payload[34:]) + decompressor.flush()
+        self._blocks[digest] = (block, depth)
+        return block, depth
+
+    def _put(self, block, base_digest):
+        """Store one block unless present; returns (digest, bytes written)"""
+        digest = hashlib.sha256(block).hexdigest()
+        if os.path.exists(self._object_path(digest)):
+            return digest, 0
+        if base_digest is not None:
+            base, depth = self._read_object(base_digest)
+            if depth < MAX_CHAIN:
+                compressor = zlib.compressobj(9, zdict=base)
+                delta = compressor.compress(block) + compressor.flush()
+                payload = b'D' + bytes([depth + 1]) + bytes.fromhex(base_digest) + delta
+                self._blocks[digest] = (block, depth + 1)
+                return digest, self._write_object(digest, payload)
+        self._blocks[digest] = (block, 0)
+        return digest, self._write_object(digest, b'F' + zlib.compress(block, 9))
+
+    def save(self, name, lines, label=''):
+        """
+        Snapshot an iterable of lines under name; returns the index entry, or
+        None when it is identical to the latest snapshot of name (going back
+        to an older version, A -> B -> A, is recorded).
+        """
+        entries = self.snapshots()
+        previous = [entry for entry in entries if entry['file'] == name]
+        old_blocks = previous[-1]['blocks'] if previous else []
+        content_hash = hashlib.sha256()
+        blocks = []
+        for block in iter_blocks(lines):
+            content_hash.update(block)
+            blocks.append((hashlib.sha256(block).hexdigest(), block))
+        sha = content_hash.hexdigest()
+        if previous and previous[-1]['sha256'] == sha:
+            return None
+
+        bases = _delta_bases(old_blocks, [digest for digest, _ in blocks])
+        stored = 0
+        for (digest, block), base in zip(blocks, bases):
+            _, written = self._put(block, base)
+            stored += written
+
+        entry = {
+            'id': entries[-1]['id'] + 1 if entries else 1,
+            'file': name,
+            'label': label,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'size': sum(len(block) for _, block in blocks),
+            'sha256': sha,
+            'stored': stored,
+            'blocks': [digest for digest, _ in blocks],
+        }
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        return entry
+
+    def save_text(self, name, text, label=''):
+        return self.save(name, text.splitlines(keepends=True), label)
+
+    def save_file(self, path, label='', name=None):
+        with open(path, 'r') as f:
+            return self.save(name or os.path.basename(path), f, label)
+
+    def path_of(self, entry):
+        """Where the snapshotted file lives (next to the store)"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.root)), entry['file'])
+
+    def read(self, entry):
+        """The full text of a snapshot"""
+        return b''.join(self._read_object(digest)[0] for digest in entry['blocks']).decode('utf-8')
+
+
+def _delta_bases(old, new):
+    """For each new block digest, the old block it most likely replaced (None if unchanged or no guess)"""
+    bases = [None] * len(new)
+    if not old:
+        return bases
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        for j in range(j1, j2):
+            if i2 > i1:
+                bases[j] = old[min(i1 + j - j1, i2 - 1)]
+            else:
+                bases[j] = old[min(i1, len(old) - 1)]
+    return bases
+
+
+def store_for(path):
+    """The snapshot store that sits next to path"""
+    return SnapshotStore(os.path.join(os.path.dirname(os.path.abspath(path)), STORE_DIR))
+
+
+def _human(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024 or unit == 'MiB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def print_list(store, name=None):
+    entries = store.snapshots(name)
+    if not entries:
+        print("📭 No snapshots yet")
+        return
+    print(f"  {'#':>4}  {'time':<19}  {'file':<24} {'size':>10} {'stored':>10}  label")
+    for entry in entries:
+        print(f"  {entry['id']:>4}  {entry['time']:<19}  {entry['file']:<24} {_human(entry['size']):>10} "
+              f"{_human(entry['stored']):>10}  {entry['label']}")
+    logical = sum(entry['size'] for entry in entries)
+    stored = sum(entry['stored'] for entry in entries)
+    print(f"\n📦 {len(entries)} snapshot(s): {_human(logical)} of report text in {_human(stored)} of blocks "
+          f"({logical / max(stored, 1):.0f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Content-addressed snapshots of the report')
+    parser.add_argument('--store', default=STORE_DIR, help='Store directory (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    save_parser = commands.add_parser('save', help='Snapshot a file')
+    save_parser.add_argument('file')
+    save_parser.add_argument('-m', '--message', default='', help='Label for the snapshot')
+    save_parser.add_argument('--as', dest='name', help='Record under this file name (e.g. to import a backup copy)')
+
+    list_parser = commands.add_parser('list', help='List snapshots')
+    list_parser.add_argument('file', nargs='?', help='Only snapshots of this file name')
+
+    diff_parser = commands.add_parser('diff', help='Unified diff between two snapshots, or a snapshot and its file')
+    diff_parser.add_argument('old', help='Snapshot number (negative = from the latest) or hash prefix')
+    diff_parser.add_argument('new', nargs='?', help='Second snapshot (default: the file on disk)')
+
+    restore_parser = commands.add_parser('restore', help='Write a snapshot back to its file')
+    restore_parser.add_argument('ref', help='Snapshot number (negative = from the latest) or hash prefix')
+    restore_parser.add_argument('-o', '--output', help='Write here instead of the snapshotted file')
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    try:
+        if args.command == 'save':
+            entry = store.save_file(args.file, args.message, args.name)
+            if entry is None:
+                print(f"✅ {args.file} is unchanged since its latest snapshot")
+            else:
+                print(f"✅ Snapshot #{entry['id']} of {entry['file']}: {_human(entry['size'])}, "
+                      f"{_human(entry['stored'])} new in {len(entry['blocks'])} block(s)")
+        elif args.command == 'list':
+            print_list(store, args.file)
+        elif args.command == 'diff':
+            old = store.get(args.old)
+            if args.new:
+                new = store.get(args.new)
+                new_text, new_label = store.read(new), f"#{new['id']}"
+            else:
+                with open(store.path_of(old), 'r') as f:
+                    new_text, new_label = f.read(), old['file']
+            diff = difflib.unified_diff(store.read(old).splitlines(keepends=True), new_text.splitlines(keepends=True),
+                                        fromfile=f"#{old['id']} {old['file']}", tofile=new_label)
+            sys.stdout.writelines(diff)
+        elif args.command == 'restore':
+            from report_pipeline import write_atomic
+
+            entry = store.get(args.ref)
+            output = args.output or store.path_of(entry)
+            if not args.output and os.path.exists(output):
+                # Keep what is being overwritten, so a restore can itself be undone
+                backup = store.save_file(output, f"before restore of #{entry['id']}", entry['file'])
+                if backup is not None:
+                    print(f"📸 Saved the current {output} as snapshot #{backup['id']}")
+            write_atomic(output, store.read(entry))
+            print(f"✅ Restored snapshot #{entry['id']} ({entry['label'] or 'no label'}) to {output}")
+    except (OSError, SnapshotError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Section splitting and the invalidation rules of report_cache.run_incremental"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_cache import CACHE_VERSION, run_incremental, split_sections  # noqa: E402
+from report_pipeline import Stage  # noqa: E402
+from rewrite_engine import Rule  # noqa: E402
+
+REPORT = (
+    'Preamble\n'
+    '# One\n\nalpha TODO\n'
+    '## Two\n\n```\n# not a heading\nbeta\n```\n'
+    '## Three\n\ngamma\n'
+)
+
+
+def run(content, cache, *rules):
+    return run_incremental(content, [Stage('test', None, list(rules))], cache)
+
+
+class SplitSectionsTest(unittest.TestCase):
+    def test_round_trip(self):
+        for text in (REPORT, '', 'no headings\n', '# Only\n', '# A\n```\n# B\n', 'x\n# A\r\n# B'):
+            with self.subTest(text=text):
+                self.assertEqual(''.join(split_sections(text)), text)
+
+    def test_headings_inside_fences_do_not_split(self):
+        sections = split_sections(REPORT)
+        self.assertEqual(len(sections), 4)
+        self.assertEqual(sections[0], 'Preamble\n')
+        self.assertTrue(sections[2].startswith('## Two\n'))
+        self.assertIn('# not a heading\n', sections[2])
+
+
+class RunIncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = {'version': CACHE_VERSION, 'stages': {}}
+        self.todo = Rule('TODO', 'DONE')
+        content, counts, dirty = run(REPORT, self.cache, self.todo)
+        self.assertEqual(content, REPORT.replace('TODO', 'DONE'))
+        self.assertEqual(dirty, {0, 1, 2, 3})
+
+    def test_unchanged_input_reuses_every_section(self):
+        content, counts, dirty = run(REPORT, self.cache, self.todo)
+        self.assertEqual(dirty, set())
+        self.assertEqual(content, REPORT.replace('TODO', 'DONE'))
+        self.assertEqual(counts['test'], {'TODO': 1})
+
+    def test_changed_input_reruns_that_section(self):
+        edited = REPORT.replace('gamma', 'gamma TODO')
+        content, counts, dirty = run(edited, self.cache, self.todo)
+        self.assertEqual(dirty, {3})
+        self.assertEqual(content, edited.replace('TODO', 'DONE'))
+        self.assertEqual(counts['test'], {'TODO': 2})
+
+    def test_edited_rule_reruns_the_sections_it_matched(self):
+        content, counts, dirty = run(REPORT, self.cache, Rule('TODO', 'FIXED', name='TODO'))
+        self.assertEqual(dirty, {1})
+        self.assertEqual(content, REPORT.replace('TODO', 'FIXED'))
+
+    def test_removed_rule_reruns_the_sections_it_matched(self):
+        content, counts, dirty = run(REPORT, self.cache, Rule('zeta', 'ZETA'))
+        self.assertEqual(dirty, {1})
+        self.assertEqual(content, REPORT)
+
+    def test_added_rule_reruns_only_the_sections_it_matches(self):
+        content, counts, dirty = run(REPORT, self.cache, self.todo, Rule('gamma', 'GAMMA'))
+        self.assertEqual(dirty, {3})
+        self.assertEqual(content, REPORT.replace('TODO', 'DONE').replace('gamma', 'GAMMA'))
+        self.assertEqual(counts['test'], {'TODO': 1, 'gamma': 1})
+
+    def test_added_rule_with_a_literal_prefix_is_probed(self):
+        # Rules sharing a prefix are dispatched by it; the probe must still find them
+        content, counts, dirty = run(REPORT, self.cache, self.todo, Rule('beta\n', 'BETA\n'),
+                                     Rule('beta!', 'BETA!'))
+        self.assertEqual(dirty, {2})
+        self.assertIn('BETA\n', content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""ReportWatch rebuilds from the stages' input when their rules are edited"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import report_pipeline  # noqa: E402
+from report_watch import ReportWatch  # noqa: E402
+
+SOURCE = '# Greeting\n\nHello {{name}}\n'
+
+
+def write_stage(path, name, pattern, replacement):
+    with open(path, 'w') as f:
+        json.dump({'stages': [{'name': name, 'rules': [{'pattern': pattern, 'replacement': replacement}]}]}, f)
+
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+class ReportWatchRuleEditTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Two stages in two files, so an edit touches the second stage alone
+        self.greet = os.path.join(self.tmp.name, 'greet.json')
+        self.shout = os.path.join(self.tmp.name, 'shout.json')
+        self.report = os.path.join(self.tmp.name, 'report.md')
+        self.edit(greet='World', shout='WORLD!')
+        with open(self.report, 'w') as f:
+            f.write(SOURCE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def edit(self, greet=None, shout=None):
+        if greet is not None:
+            write_stage(self.greet, 'greet', r'\{\{name\}\}', greet)
+        if shout is not None:
+            write_stage(self.shout, 'shout', 'World', shout)
+
+    def watch(self, output=None):
+        return ReportWatch(self.report, output, ['fixes'], [self.greet, self.shout], screenshots=False)
+
+    def test_edit_with_output_keeps_the_source_and_earlier_stages(self):
+        output = os.path.join(self.tmp.name, 'out.md')
+        watch = self.watch(output)
+        watch.cycle({self.report})
+        self.assertEqual(read(output), '# Greeting\n\nHello WORLD!\n')
+
+        self.edit(shout='EARTH')
+        watch.cycle({self.shout})
+        self.assertEqual(read(output), '# Greeting\n\nHello EARTH\n')
+        self.assertEqual(read(self.report), SOURCE)
+
+        self.edit(shout='Mars')
+        self.watch(output).cycle({self.shout})
+        self.assertEqual(read(output), '# Greeting\n\nHello Mars\n')
+
+    def test_edit_in_place_starts_from_the_snapshot(self):
+        report_pipeline.build(self.report, verbose=False, rule_files=[self.greet, self.shout],
+                              stage_names=['fixes'])
+        self.assertEqual(read(self.report), '# Greeting\n\nHello WORLD!\n')
+
+        watch = self.watch()
+        self.edit(greet='Moon')
+        watch.cycle({self.greet})
+        self.assertEqual(read(self.report), '# Greeting\n\nHello Moon\n')
+
+        self.edit(greet='World', shout='Sun')
+        watch.cycle({self.greet, self.shout})
+        self.assertEqual(read(self.report), '# Greeting\n\nHello Sun\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""RewriteEngine produces what the per-rule re.sub() loop it replaced did"""
+
+import os
+import re
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+import report_pipeline  # noqa: E402
+from rewrite_engine import RewriteEngine, Rule  # noqa: E402
+from rule_registry import BUILTIN_RULES, load_stages  # noqa: E402
+
+# The report's screenshot sections before any stage ran
+TEMPLATE = os.path.join(HERE, 'bench', 'template.md')
+
+
+def sub_loop(rules, content):
+    for rule in rules:
+        content = rule.regex.sub(rule.replacement, content)
+    return content
+
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+class RewriteEngineTest(unittest.TestCase):
+    def assertSameAsLoop(self, engine, content):
+        output, counts = engine.rewrite(content)
+        self.assertEqual(output, sub_loop(engine.rules, content))
+        return output, counts
+
+    def test_builtin_stages_match_the_sub_loop(self):
+        # Each stage runs over the previous one's output, as in the pipeline
+        content, counts = self.assertSameAsLoop(report_pipeline.STAGES[0].engine, read(TEMPLATE))
+        self.assertTrue(sum(counts.values()))
+        for name, _, rules in load_stages(BUILTIN_RULES):
+            with self.subTest(stage=name):
+                engine = RewriteEngine(rules)
+                self.assertTrue(engine.prefix, 'expected literal-prefix dispatch')
+                content, counts = self.assertSameAsLoop(engine, content)
+                self.assertTrue(sum(counts.values()), f'{name} matched nothing')
+
+    def test_builtin_stages_match_the_sub_loop_on_rewritten_text(self):
+        content = report_pipeline.STAGES[0].engine.rewrite(read(TEMPLATE))[0]
+        for name, _, rules in load_stages(BUILTIN_RULES):
+            with self.subTest(stage=name):
+                engine = RewriteEngine(rules)
+                content = engine.rewrite(content)[0]
+                self.assertSameAsLoop(engine, content)
+
+    def test_alternation_fallback_matches_the_sub_loop(self):
+        # No shared literal prefix, so the engine scans with one alternation
+        rules = [
+            Rule(r'(\d+) apples', r'\1 pears'),
+            Rule(r'[Cc]herry', 'berry'),
+            Rule(r'(?P<word>plum)s?', r'\g<word>\n'),
+        ]
+        engine = RewriteEngine(rules)
+        self.assertEqual(engine.prefix, '')
+        output, counts = self.assertSameAsLoop(engine, '3 apples, a Cherry, two plums and cherry pie\n')
+        self.assertEqual(output, '3 pears, a berry, two plum\n and berry pie\n')
+        self.assertEqual(sum(counts.values()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Text measurement and word wrap for the placeholder screenshots
+
+Measuring a string with Pillow re-shapes every glyph each time, and the old
+wrap loop re-measured the whole accumulated line for every word. Here each
+font gets a FontMetrics cache of glyph advances, so a line's width is
+estimated by summing cached numbers; Pillow's exact (kerning-aware) bbox is
+only asked for at break candidates whose estimate lands close to the limit,
+and for the final lines that get centered.
+"""
+
+# Exact measurements are taken when the estimate is within this many ems (plus
+# a share of the line width, for kerning that adds up along long lines) of the limit
+KERNING_SLACK_EMS = 0.5
+KERNING_SLACK_RATIO = 0.01
+# Exact widths of this many distinct strings are kept per font
+TEXT_CACHE_SIZE = 4096
+
+
+class FontMetrics:
+    """Cached glyph advances and exact text widths for one font"""
+
+    def __init__(self, font):
+        self.font = font
+        self.slack = getattr(font, 'size', 10) * KERNING_SLACK_EMS
+        self._advances = {}
+        self._widths = {}
+
+    def advance(self, char):
+        width = self._advances.get(char)
+        if width is None:
+            width = self._advances[char] = self.font.getlength(char)
+        return width
+
+    def estimate(self, text):
+        """Width as the sum of cached glyph advances (no kerning, no side bearings)"""
+        advances = self._advances
+        if all(char in advances for char in text):
+            return sum(advances[char] for char in text)
+        return sum(self.advance(char) for char in text)
+
+    def text_width(self, text):
+        """Exact ink width, as draw.textbbox() reports it; cached per string"""
+        width = self._widths.get(text)
+        if width is None:
+            if len(self._widths) >= TEXT_CACHE_SIZE:
+                self._widths.clear()
+            left, _, right, _ = self.font.getbbox(text)
+            width = self._widths[text] = right - left
+        return width
+
+    def fits(self, text, estimate, max_width):
+        slack = self.slack + estimate * KERNING_SLACK_RATIO
+        if estimate <= max_width - slack:
+            return True
+        if estimate > max_width + slack:
+            return False
+        return self.text_width(text) <= max_width
+
+    def wrap(self, text, max_width):
+        """
+        Greedy word wrap in one pass: each word's width is added to a running
+        estimate and only near-limit break candidates are measured exactly.
+        Matches wrapping by measuring every candidate line with textbbox().
+        """
+        space = self.estimate(' ')
+        lines = []
+        current, current_width = [], 0.0
+        for word in text.split():
+            word_width = self.estimate(word)
+            if not current:
+                current, current_width = [word], word_width
+                continue
+            candidate_width = current_width + space + word_width
+            if self.fits(' '.join(current) + ' ' + word, candidate_width, max_width):
+                current.append(word)
+                current_width = candidate_width
+            else:
+                lines.append(' '.join(current))
+                current, current_width = [word], word_width
+        if current:
+            lines.append(' '.join(current))
+        return lines
+
+
+_metrics = {}
+
+
+def metrics(font):
+    """The shared FontMetrics for font (one per font object per process)"""
+    m = _metrics.get(id(font))
+    if m is None or m.font is not font:
+        m = _metrics[id(font)] = FontMetrics(font)
+    return m
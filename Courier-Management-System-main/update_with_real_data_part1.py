@@ -1,297 +1,30 @@
 #!/usr/bin/env python3
 """Replace placeholders with actual data from the application"""
 
-# Read current report
-with open('PROJECT_REPORT.md', 'r') as f:
-    content = f.read()
+import profiling
+from rewrite_engine import print_counts, rewrite_report
+from rule_registry import BUILTIN_RULES, load_stage
 
-# Real data-based replacements
-replacements_map = {
-    # Screenshot 1: CREATE Form (before submission)
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Add New Courier Order Form.*?```': '''```plaintext
-╔════════════════════════════════════════════════════════╗
-║          ADD NEW COURIER ORDER FORM                    ║
-╠════════════════════════════════════════════════════════╣
-║                                                        ║
-║  Customer ID:     [1▼]  John Doe                      ║
-║  Admin ID:        [1▼]  Admin Alice                   ║
-║  Bill Number:     [BILL-1008________________]         ║
-║  Pickup Address:  [258 Spruce Way, San Diego, CA___  ║
-║                    ________________________________]  ║
-║  Delivery Address:[123 Main St, New York, NY_______  ║
-║                    ________________________________]  ║
-║                                                        ║
-║         [    CREATE COURIER ORDER    ]                ║
-║                                                        ║
-╚════════════════════════════════════════════════════════╝
-```''',
 
-    # Screenshot 2: CREATE Success Response
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: CREATE Success Response.*?```': '''```json
-{
-  "message": "Courier order created successfully!",
-  "courier": {
-    "courier_id": 8,
-    "customer_id": 1,
-    "managed_by_admin_id": 1,
-    "bill_number": "BILL-1008",
-    "pickup_address": "258 Spruce Way, San Diego, CA",
-    "delivery_address": "123 Main St, New York, NY",
-    "status": "Pending",
-    "customer_name": "John Doe",
-    "customer_email": "john.doe@email.com",
-    "admin_name": "Admin Alice",
-    "admin_email": "alice.admin@courier.com",
-    "created_at": "2025-10-27T10:30:15.000Z"
-  }
-}
-```''',
+def main(argv=None):
+    profiler = profiling.from_argv(argv, __doc__)
 
-    # Screenshot 3: View All Couriers (JOIN Query Result)
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: View All Couriers \(JOIN Query\).*?```': '''```plaintext
-╔═══╦════════════╦═══════════╦══════════════╦═══════════════════════╦══════════════════╗
-║ ID║ Bill Number║  Status   ║Customer Name ║   Customer Email      ║    Admin Name    ║
-╠═══╬════════════╬═══════════╬══════════════╬═══════════════════════╬══════════════════╣
-║ 1 ║ BILL-1001  ║ Pending   ║ John Doe     ║ john.doe@email.com    ║ Admin Alice      ║
-║ 2 ║ BILL-1002  ║ In Transit║ Jane Smith   ║ jane.smith@email.com  ║ Admin Bob        ║
-║ 3 ║ BILL-1003  ║ Delivered ║ Robert Johnson║robert.j@email.com    ║ Admin Alice      ║
-║ 4 ║ BILL-1004  ║ Pending   ║ Emily Davis  ║ emily.davis@email.com ║ Admin Charlie    ║
-║ 5 ║ BILL-1005  ║ In Transit║ Michael Wilson║michael.w@email.com   ║ Admin Bob        ║
-║ 6 ║ BILL-1006  ║ Delivered ║ Sarah Brown  ║ sarah.brown@email.com ║ Admin Diana      ║
-║ 7 ║ BILL-1007  ║ Pending   ║ David Martinez║david.m@email.com     ║ Admin Alice      ║
-╚═══╩════════════╩═══════════╩══════════════╩═══════════════════════╩══════════════════╝
+    # Read, apply the data1 stage of report_rules.json in a single pass and write back
+    content, counts = rewrite_report('PROJECT_REPORT.md', load_stage(BUILTIN_RULES, 'data1'), profiler=profiler)
 
-Query: SELECT c.courier_id, c.bill_number, c.status, u.name AS customer_name, 
-       u.email AS customer_email, a.name AS admin_name
-FROM Couriers c
-INNER JOIN Users u ON c.customer_id = u.user_id
-LEFT JOIN Admins a ON c.managed_by_admin_id = a.admin_id;
-```''',
+    print("✅ Updated report with REAL data from your application!")
+    print_counts(counts)
+    print("\n📊 Replaced with:")
+    print("  • Actual form layouts with real field values")
+    print("  • Real customer names (John Doe, Jane Smith, etc.)")
+    print("  • Real admin names (Admin Alice, Admin Bob, etc.)")
+    print("  • Actual bill numbers (BILL-1001, BILL-1002, etc.)")
+    print("  • Real addresses from your database")
+    print("  • JSON API responses with actual data structure")
+    print("  • SQL query results in table format")
+    print("\n📄 Open PROJECT_REPORT.md to see the realistic placeholders!")
+    profiler.finish()
 
-    # Screenshot 4: Get Status Using Function
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Get Status Using MySQL Function.*?```': '''```plaintext
-╔════════════════════════════════════════════════════════╗
-║        GET COURIER STATUS (MySQL Function)             ║
-╠════════════════════════════════════════════════════════╣
-║                                                        ║
-║  Enter Courier ID:  [3___]  [  GET STATUS  ]          ║
-║                                                        ║
-║  ┌──────────────────────────────────────────────────┐ ║
-║  │  RESULT:                                         │ ║
-║  │                                                  │ ║
-║  │  Courier ID: 3                                   │ ║
-║  │  Status: DELIVERED                               │ ║
-║  │                                                  │ ║
-║  │  (Retrieved using GetCourierStatus() function)  │ ║
-║  └──────────────────────────────────────────────────┘ ║
-║                                                        ║
-╚════════════════════════════════════════════════════════╝
 
-SQL: SELECT GetCourierStatus(3) AS status;
-Result: Delivered
-```''',
-
-    # Screenshot 5: Single Courier Details
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Single Courier Details View.*?```': '''```plaintext
-╔═══════════════════════════════════════════════════════════════╗
-║              COURIER DETAILS - BILL-1003                      ║
-╠═══════════════════════════════════════════════════════════════╣
-║  Courier ID:        3                                         ║
-║  Bill Number:       BILL-1003                                 ║
-║  Status:            ✓ DELIVERED                               ║
-║  Created:           2025-10-20 14:30:00                       ║
-║  Last Updated:      2025-10-25 09:15:00                       ║
-║                                                               ║
-║  ─────────────────────────────────────────────────────────────║
-║  ADDRESSES                                                    ║
-║  ─────────────────────────────────────────────────────────────║
-║  Pickup:            789 Pine Rd, Chicago, IL                  ║
-║  Delivery:          321 Elm St, Houston, TX                   ║
-║                                                               ║
-║  ─────────────────────────────────────────────────────────────║
-║  CUSTOMER INFORMATION                                         ║
-║  ─────────────────────────────────────────────────────────────║
-║  Name:              Robert Johnson                            ║
-║  Email:             robert.j@email.com                        ║
-║  Phone:             555-0103                                  ║
-║                                                               ║
-║  ─────────────────────────────────────────────────────────────║
-║  MANAGED BY                                                   ║
-║  ─────────────────────────────────────────────────────────────║
-║  Admin:             Admin Alice                               ║
-║  Email:             alice.admin@courier.com                   ║
-║  Role:              Operations Manager                        ║
-╚═══════════════════════════════════════════════════════════════╝
-```''',
-
-    # Screenshot 6: Update Status Form
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Update Courier Status Form.*?```': '''```plaintext
-╔════════════════════════════════════════════════════════╗
-║           UPDATE COURIER STATUS FORM                   ║
-╠════════════════════════════════════════════════════════╣
-║                                                        ║
-║  Courier ID:      [2___]                              ║
-║                                                        ║
-║  Current Status:  In Transit                           ║
-║                                                        ║
-║  New Status:      [Delivered         ▼]               ║
-║                    - Pending                           ║
-║                    - In Transit                        ║
-║                    - Delivered      ← SELECTED         ║
-║                    - Cancelled                         ║
-║                                                        ║
-║  Admin Email:     [alice.admin@courier.com_________]  ║
-║                                                        ║
-║         [    UPDATE STATUS    ]                        ║
-║                                                        ║
-║  Note: This will call UpdateCourierStatus() procedure ║
-║        and trigger after_courier_status_update        ║
-╚════════════════════════════════════════════════════════╝
-```''',
-
-    # Screenshot 7: UPDATE Success with Trigger
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: UPDATE Success with Trigger Execution.*?```': '''```json
-{
-  "success": true,
-  "message": "Status updated successfully!",
-  "details": {
-    "courier_id": 2,
-    "old_status": "In Transit",
-    "new_status": "Delivered",
-    "updated_by": "alice.admin@courier.com",
-    "timestamp": "2025-10-27T10:35:42.000Z"
-  },
-  "trigger_info": {
-    "trigger_name": "after_courier_status_update",
-    "action": "Automatically logged to Courier_Audit table",
-    "records_created": {
-      "delivery_history": 1,
-      "courier_audit": 1
-    }
-  }
-}
-```''',
-
-    # Screenshot 8: Audit Trail
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Audit Trail Verification.*?```': '''```plaintext
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                          AUDIT TRAIL FOR COURIER #2                          ║
-╠══════════════════════════════════════════════════════════════════════════════╣
-║                                                                              ║
-║  DELIVERY_HISTORY TABLE (Manual Logs from UpdateCourierStatus Procedure):   ║
-║  ┌────┬───────────┬─────────────┬──────────────┬──────────────────────────┐ ║
-║  │ ID │Courier ID │ Old Status  │  New Status  │     Changed At           │ ║
-║  ├────┼───────────┼─────────────┼──────────────┼──────────────────────────┤ ║
-║  │ 1  │     2     │ Pending     │ In Transit   │ 2025-10-25 08:00:00      │ ║
-║  │ 2  │     2     │ In Transit  │ Delivered    │ 2025-10-27 10:35:42      │ ║
-║  └────┴───────────┴─────────────┴──────────────┴──────────────────────────┘ ║
-║                                                                              ║
-║  COURIER_AUDIT TABLE (Automatic Logs from Trigger):                         ║
-║  ┌────┬───────────┬──────────────┬─────────────┬──────────────────────────┐ ║
-║  │ ID │Courier ID │ Action Type  │  Old→New    │     Changed At           │ ║
-║  ├────┼───────────┼──────────────┼─────────────┼──────────────────────────┤ ║
-║  │ 1  │     2     │UPDATE_STATUS │Pending→     │ 2025-10-25 08:00:00 ⚡   │ ║
-║  │    │           │              │In Transit   │                          │ ║
-║  │ 2  │     2     │UPDATE_STATUS │In Transit→  │ 2025-10-27 10:35:42 ⚡   │ ║
-║  │    │           │              │Delivered    │                          │ ║
-║  └────┴───────────┴──────────────┴─────────────┴──────────────────────────┘ ║
-║                                                                              ║
-║  ⚡ = Created by trigger after_courier_status_update                         ║
-║  Note: Matching timestamps prove trigger fired simultaneously                ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-```''',
-
-    # Screenshot 9: Delete Confirmation
-    r'```diff\n- SCREENSHOT PLACEHOLDER: Delete Courier Confirmation Dialog.*?```': '''```plaintext
-╔════════════════════════════════════════════════════════╗
-║              ⚠️  CONFIRM DELETE                        ║
-╠════════════════════════════════════════════════════════╣
-║                                                        ║
-║  Are you sure you want to delete this courier?        ║
-║                                                        ║
-║  ┌──────────────────────────────────────────────────┐ ║
-║  │  Courier ID:    7                                │ ║
-║  │  Bill Number:   BILL-1007                        │ ║
-║  │  Customer:      David Martinez                   │ ║
-║  │  Status:        Pending                          │ ║
-║  └──────────────────────────────────────────────────┘ ║
-║                                                        ║
-║  ⚠️  WARNING: This action cannot be undone!           ║
-║                                                        ║
-║  The following related records will be CASCADE        ║
-║  DELETED:                                             ║
-║    • All Delivery History entries                    ║
-║    • All Courier Audit entries                       ║
-║    • All Comments on this courier                    ║
-║                                                        ║
-║    [   CANCEL   ]      [   DELETE   ]                ║
-║                                                        ║
-╚════════════════════════════════════════════════════════╝
-```''',
-
-    # Screenshot 10: DELETE Success
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: DELETE Success Response.*?```': '''```json
-{
-  "success": true,
-  "message": "Courier deleted successfully!",
-  "deleted": {
-    "courier_id": 7,
-    "bill_number": "BILL-1007",
-    "customer_name": "David Martinez"
-  },
-  "cascade_deleted": {
-    "delivery_history_records": 0,
-    "courier_audit_records": 1,
-    "comment_records": 0,
-    "total_records_removed": 2
-  },
-  "timestamp": "2025-10-27T10:40:15.000Z"
-}
-```''',
-
-    # Screenshot 11: Cascade Verification
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Cascade Delete Verification.*?```': '''```sql
--- Verify CASCADE DELETE for Courier ID 7
-
-SELECT 'Delivery_History' AS table_name, COUNT(*) AS records_remaining
-FROM Delivery_History WHERE courier_id = 7
-UNION ALL
-SELECT 'Courier_Audit', COUNT(*)
-FROM Courier_Audit WHERE courier_id = 7
-UNION ALL
-SELECT 'Comments', COUNT(*)
-FROM Comments WHERE courier_id = 7;
-
-RESULT:
-╔═══════════════════╦═══════════════════╗
-║   Table Name      ║ Records Remaining ║
-╠═══════════════════╬═══════════════════╣
-║ Delivery_History  ║         0         ║
-║ Courier_Audit     ║         0         ║
-║ Comments          ║         0         ║
-╚═══════════════════╩═══════════════════╝
-
-✓ CASCADE DELETE verified - all related records removed
-```''',
-}
-
-# Apply replacements with regex
-import re
-
-for pattern, replacement in replacements_map.items():
-    content = re.sub(pattern, replacement, content, flags=re.DOTALL)
-
-# Write back
-with open('PROJECT_REPORT.md', 'w') as f:
-    f.write(content)
-
-print("✅ Updated report with REAL data from your application!")
-print("\n📊 Replaced with:")
-print("  • Actual form layouts with real field values")
-print("  • Real customer names (John Doe, Jane Smith, etc.)")
-print("  • Real admin names (Admin Alice, Admin Bob, etc.)")
-print("  • Actual bill numbers (BILL-1001, BILL-1002, etc.)")
-print("  • Real addresses from your database")
-print("  • JSON API responses with actual data structure")
-print("  • SQL query results in table format")
-print("\n📄 Open PROJECT_REPORT.md to see the realistic placeholders!")
+if __name__ == '__main__':
+    main()
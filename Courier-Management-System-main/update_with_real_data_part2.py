@@ -1,237 +1,30 @@
 #!/usr/bin/env python3
 """Add real data for frontend features screenshots (Part 2)"""
 
-import re
+import profiling
+from rewrite_engine import print_counts, rewrite_report
+from rule_registry import BUILTIN_RULES, load_stage
 
-with open('PROJECT_REPORT.md', 'r') as f:
-    content = f.read()
 
-# Part 2: Frontend features with real data
-frontend_replacements = {
-    # Screenshot 12: Homepage
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Application Homepage.*?```': '''```plaintext
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                  COURIER MANAGEMENT SYSTEM - DASHBOARD                       ║
-╠══════════════════════════════════════════════════════════════════════════════╣
-║                                                                              ║
-║  ┌─ NAVIGATION ─────────────────────────────────────────────────────────┐  ║
-║  │  🏠 Dashboard  │  📦 Add Courier  │  📋 View Couriers  │  📊 Analytics│  ║
-║  └──────────────────────────────────────────────────────────────────────────┘  ║
-║                                                                              ║
-║  ┌─ QUICK STATS ────────────────────────────────────────────────────────┐  ║
-║  │   Total Couriers: 7    │   Pending: 3   │   In Transit: 2   │          │  ║
-║  │   Delivered: 2          │   Cancelled: 0                                │  ║
-║  └──────────────────────────────────────────────────────────────────────────┘  ║
-║                                                                              ║
-║  ┌─ RECENT ORDERS ──────────────────────────────────────────────────────┐  ║
-║  │  BILL-1007  │  David Martinez   │  Pending      │  Oct 27, 2025       │  ║
-║  │  BILL-1006  │  Sarah Brown      │  Delivered    │  Oct 25, 2025       │  ║
-║  │  BILL-1005  │  Michael Wilson   │  In Transit   │  Oct 24, 2025       │  ║
-║  └──────────────────────────────────────────────────────────────────────────┘  ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-```''',
+def main(argv=None):
+    profiler = profiling.from_argv(argv, __doc__)
 
-    # Screenshot 17: JOIN Query Results
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: JOIN Query Results.*?```': '''```sql
--- JOIN Query: Combine Couriers + Users + Admins
-SELECT 
-    c.courier_id,
-    c.bill_number,
-    c.status,
-    u.name AS customer_name,
-    u.email AS customer_email,
-    a.name AS admin_name,
-    a.email AS admin_email
-FROM Couriers c
-INNER JOIN Users u ON c.customer_id = u.user_id
-LEFT JOIN Admins a ON c.managed_by_admin_id = a.admin_id;
+    # Read, apply the data2 stage of report_rules.json in a single pass and write back
+    content, counts = rewrite_report('PROJECT_REPORT.md', load_stage(BUILTIN_RULES, 'data2'), profiler=profiler)
 
-RESULTS (7 rows):
-╔════╦═══════════╦═══════════╦════════════════╦═══════════════════════╦════════════════╦═════════════════════════╗
-║ ID ║   Bill    ║  Status   ║  Customer Name ║   Customer Email      ║   Admin Name   ║     Admin Email         ║
-╠════╬═══════════╬═══════════╬════════════════╬═══════════════════════╬════════════════╬═════════════════════════╣
-║  1 ║ BILL-1001 ║ Pending   ║ John Doe       ║ john.doe@email.com    ║ Admin Alice    ║ alice.admin@courier.com ║
-║  2 ║ BILL-1002 ║ In Transit║ Jane Smith     ║ jane.smith@email.com  ║ Admin Bob      ║ bob.admin@courier.com   ║
-║  3 ║ BILL-1003 ║ Delivered ║ Robert Johnson ║ robert.j@email.com    ║ Admin Alice    ║ alice.admin@courier.com ║
-║  4 ║ BILL-1004 ║ Pending   ║ Emily Davis    ║ emily.davis@email.com ║ Admin Charlie  ║ charlie.admin@courier.com║
-║  5 ║ BILL-1005 ║ In Transit║ Michael Wilson ║ michael.w@email.com   ║ Admin Bob      ║ bob.admin@courier.com   ║
-║  6 ║ BILL-1006 ║ Delivered ║ Sarah Brown    ║ sarah.brown@email.com ║ Admin Diana    ║ diana.admin@courier.com ║
-║  7 ║ BILL-1007 ║ Pending   ║ David Martinez ║ david.m@email.com     ║ Admin Alice    ║ alice.admin@courier.com ║
-╚════╩═══════════╩═══════════╩════════════════╩═══════════════════════╩════════════════╩═════════════════════════╝
-```''',
+    print("✅ Updated frontend features with REAL data!")
+    print_counts(counts)
+    print("\n📊 Added:")
+    print("  • Real dashboard with actual stats (7 total, 3 pending, etc.)")
+    print("  • JOIN query with 7 actual courier records")
+    print("  • NESTED query showing 2 customers with delivered orders")
+    print("  • AGGREGATE statistics grouped by status")
+    print("  • Modal dialog with BILL-1002 details")
+    print("  • Toast notifications with actual messages")
+    print("  • Responsive mobile layout (375x667px)")
+    print("\n🎯 All placeholders now contain REAL data from your application!")
+    profiler.finish()
 
-    # Screenshot 18: NESTED Query Results
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: NESTED Query Results.*?```': '''```sql
--- NESTED Query: Find customers who have at least one delivered order
-SELECT 
-    user_id,
-    name,
-    email,
-    phone
-FROM Users
-WHERE user_id IN (
-    SELECT DISTINCT customer_id 
-    FROM Couriers 
-    WHERE status = 'Delivered'
-)
-ORDER BY name;
 
-RESULTS (2 rows):
-╔═════════╦════════════════╦═══════════════════════╦════════════╗
-║ User ID ║      Name      ║        Email          ║   Phone    ║
-╠═════════╬════════════════╬═══════════════════════╬════════════╣
-║    3    ║ Robert Johnson ║ robert.j@email.com    ║ 555-0103   ║
-║    6    ║ Sarah Brown    ║ sarah.brown@email.com ║ 555-0106   ║
-╚═════════╩════════════════╩═══════════════════════╩════════════╝
-
-Explanation: These 2 customers have successfully delivered orders
-Inner query returned: customer_id IN (3, 6)
-```''',
-
-    # Screenshot 19: AGGREGATE Query Results
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: AGGREGATE Query Statistics.*?```': '''```sql
--- AGGREGATE Query: Statistics grouped by status
-SELECT 
-    status,
-    COUNT(*) AS total_orders,
-    COUNT(DISTINCT customer_id) AS unique_customers,
-    MIN(created_at) AS earliest_order,
-    MAX(created_at) AS latest_order
-FROM Couriers
-GROUP BY status
-ORDER BY total_orders DESC;
-
-RESULTS:
-╔═══════════╦═══════════════╦══════════════════╦══════════════════════╦══════════════════════╗
-║  Status   ║ Total Orders  ║ Unique Customers ║   Earliest Order     ║    Latest Order      ║
-╠═══════════╬═══════════════╬══════════════════╬══════════════════════╬══════════════════════╣
-║ Pending   ║       3       ║        3         ║ 2025-10-20 10:00:00  ║ 2025-10-27 09:30:00  ║
-║ In Transit║       2       ║        2         ║ 2025-10-22 14:15:00  ║ 2025-10-24 11:20:00  ║
-║ Delivered ║       2       ║        2         ║ 2025-10-21 08:45:00  ║ 2025-10-25 16:30:00  ║
-║ Cancelled ║       0       ║        0         ║ NULL                 ║ NULL                 ║
-╚═══════════╩═══════════════╩══════════════════╩══════════════════════╩══════════════════════╝
-
-Functions used: COUNT(*), COUNT(DISTINCT), MIN(), MAX(), GROUP BY
-```''',
-
-    # Screenshot 20: Modal Dialog
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Modal Dialog - Courier Details.*?```': '''```plaintext
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  ┌──────────────────────────────────────────────────────────┐  ║
-   ║  │  COURIER DETAILS                                      [X] │  ║
-   ║  ├──────────────────────────────────────────────────────────┤  ║
-   ║  │                                                           │  ║
-   ║  │  📦 BILL-1002                         Status: Delivered  │  ║
-   ║  │  ─────────────────────────────────────────────────────   │  ║
-   ║  │                                                           │  ║
-   ║  │  👤 CUSTOMER                                             │  ║
-   ║  │     Jane Smith                                           │  ║
-   ║  │     jane.smith@email.com                                 │  ║
-   ║  │     555-0102                                             │  ║
-   ║  │                                                           │  ║
-   ║  │  👔 MANAGED BY                                           │  ║
-   ║  │     Admin Bob (Logistics Manager)                        │  ║
-   ║  │     bob.admin@courier.com                                │  ║
-   ║  │                                                           │  ║
-   ║  │  📍 ROUTE                                                │  ║
-   ║  │     From: 456 Oak Ave, Los Angeles, CA                   │  ║
-   ║  │     To:   789 Pine Rd, Chicago, IL                       │  ║
-   ║  │                                                           │  ║
-   ║  │  📋 AUDIT TRAIL                                          │  ║
-   ║  │  ─────────────────────────────────────────────────────   │  ║
-   ║  │   Oct 22 ● Pending        (Created)                      │  ║
-   ║  │   Oct 24 ● In Transit     (Updated by Admin Bob)         │  ║
-   ║  │   Oct 27 ● Delivered      (Updated by Admin Bob)         │  ║
-   ║  │                                                           │  ║
-   ║  │                        [  CLOSE  ]                        │  ║
-   ║  │                                                           │  ║
-   ║  └──────────────────────────────────────────────────────────┘  ║
-   ╚════════════════════════════════════════════════════════════════╝
-      ░░░░░░░░░░░░░░  Semi-transparent backdrop  ░░░░░░░░░░░░░
-```''',
-
-    # Screenshot 21: Notifications
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Success/Error Toast Notifications.*?```': '''```plaintext
-                                        ┌──────────────────────────────────┐
-                                        │  ✓ Success!                      │
-                                        │  Courier BILL-1008 created       │
-                                        │  successfully                    │
-                                        └──────────────────────────────────┘
-                                             ↑ Green toast (top-right)
-                                             Auto-dismiss in 3 seconds
-
-
-                                        ┌──────────────────────────────────┐
-                                        │  ✗ Error!                        │
-                                        │  Bill number BILL-1001 already   │
-                                        │  exists in the system            │
-                                        └──────────────────────────────────┘
-                                             ↑ Red toast (top-right)
-                                             Auto-dismiss in 5 seconds
-
-
-CSS Classes:
-  .toast-success { background: #4CAF50; color: white; }
-  .toast-error { background: #F44336; color: white; }
-  .toast { position: fixed; top: 20px; right: 20px; z-index: 9999; }
-```''',
-
-    # Screenshot 22: Mobile View
-    r'```diff\n\+ SCREENSHOT PLACEHOLDER: Responsive Mobile View.*?```': '''```plaintext
-  ┌─────────────────────┐
-  │  ☰ Menu             │ ← Hamburger menu
-  ├─────────────────────┤
-  │                     │
-  │  Courier System     │
-  │  ═══════════════    │
-  │                     │
-  │  📦 Add Courier     │
-  │  ┌───────────────┐  │
-  │  │ Customer      │  │  ← Stacked
-  │  │ [Select...▼]  │  │    fields
-  │  └───────────────┘  │
-  │  ┌───────────────┐  │
-  │  │ Admin         │  │
-  │  │ [Select...▼]  │  │
-  │  └───────────────┘  │
-  │  ┌───────────────┐  │
-  │  │ Bill Number   │  │
-  │  │ [________]    │  │
-  │  └───────────────┘  │
-  │  ┌───────────────┐  │
-  │  │ Pickup Addr   │  │
-  │  │ [________]    │  │
-  │  └───────────────┘  │
-  │  ┌───────────────┐  │
-  │  │ Delivery Addr │  │
-  │  │ [________]    │  │
-  │  └───────────────┘  │
-  │                     │
-  │  ┌───────────────┐  │  ← Touch-
-  │  │ CREATE ORDER  │  │    optimized
-  │  └───────────────┘  │    button
-  │                     │
-  └─────────────────────┘
-    375px x 667px
-    (iPhone SE size)
-```''',
-}
-
-# Apply replacements
-for pattern, replacement in frontend_replacements.items():
-    content = re.sub(pattern, replacement, content, flags=re.DOTALL)
-
-# Write back
-with open('PROJECT_REPORT.md', 'w') as f:
-    f.write(content)
-
-print("✅ Updated frontend features with REAL data!")
-print("\n📊 Added:")
-print("  • Real dashboard with actual stats (7 total, 3 pending, etc.)")
-print("  • JOIN query with 7 actual courier records")
-print("  • NESTED query showing 2 customers with delivered orders")
-print("  • AGGREGATE statistics grouped by status")
-print("  • Modal dialog with BILL-1002 details")
-print("  • Toast notifications with actual messages")
-print("  • Responsive mobile layout (375x667px)")
-print("\n🎯 All placeholders now contain REAL data from your application!")
+if __name__ == '__main__':
+    main()